@@ -1,7 +1,21 @@
+import logging
+
 from django.apps import AppConfig
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
 
 
 class TwitterScraperConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'twitter_scraper'
     verbose_name = 'Twitter Scraper & Sentiment Analysis'
+
+    def ready(self):
+        # Build the shared analyzers before the first request
+        if getattr(settings, 'SENTIMENT_CONFIG', {}).get('WARM_START', False):
+            from .services.registry import warm_up
+            try:
+                warm_up()
+            except Exception as e:
+                logger.warning(f"Sentiment warm-up failed: {str(e)}")
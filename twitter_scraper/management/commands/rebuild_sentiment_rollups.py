@@ -0,0 +1,24 @@
+"""
+Management command to recompute the hour/day/week sentiment rollups.
+Run with: python manage.py rebuild_sentiment_rollups
+
+Needed once after migrating, and after the analyzer version changes
+(lexicon / model update) once the stored tweets have been rescored.
+"""
+
+from django.core.management.base import BaseCommand
+
+from twitter_scraper.services.aggregation import rebuild_rollups
+from twitter_scraper.services.registry import get_sentiment_analyzer
+
+
+class Command(BaseCommand):
+    help = 'Recompute the sentiment_rollup table from stored tweet sentiments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyzer-version', help='Default: version of the shared auto/auto analyzer')
+
+    def handle(self, *args, **options):
+        version = options['analyzer_version'] or get_sentiment_analyzer(method='auto', language='auto').version
+        written = rebuild_rollups(version)
+        self.stdout.write(self.style.SUCCESS(f'{written} rollup rows written for analyzer version {version}'))
@@ -0,0 +1,47 @@
+"""
+Management command to run the sentiment monitor over the watch targets.
+Run with: python manage.py run_sentiment_monitor [--loop] [--sleep 60] [--target 3]
+
+Schedule it with cron (single pass) or keep it running with --loop.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from twitter_scraper.models import WatchTarget
+from twitter_scraper.services.monitor import run_due
+from twitter_scraper.services.registry import get_scraper, get_sentiment_analyzer
+
+
+class Command(BaseCommand):
+    help = 'Scrape, score and roll up the due sentiment watch targets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running, checking for due targets')
+        parser.add_argument('--sleep', type=int, default=60, help='Seconds between checks with --loop')
+        parser.add_argument('--target', type=int, action='append', help='Run this target id now (repeatable)')
+
+    def handle(self, *args, **options):
+        scraper = get_scraper()
+        analyzer = get_sentiment_analyzer(method='auto', language='auto')
+
+        targets = None
+        if options['target']:
+            targets = list(WatchTarget.objects.filter(pk__in=options['target']))
+            if not targets:
+                raise CommandError('No watch target with the given id')
+
+        while True:
+            for report in run_due(scraper, analyzer, targets=targets):
+                if 'error' in report:
+                    self.stderr.write(self.style.ERROR(f"{report['target']}: {report['error']}"))
+                else:
+                    self.stdout.write(
+                        f"{report['target']}: {report['fetched']} tweets, {report['rollups']} keyword rollups"
+                    )
+
+            if not options['loop']:
+                break
+            targets = None
+            time.sleep(options['sleep'])
@@ -0,0 +1,57 @@
+"""
+Management command to train the local (offline) sentiment scorer.
+Run with: python manage.py train_local_sentiment
+"""
+
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+
+from twitter_scraper.models import LabeledSentimentSample
+from twitter_scraper.services.local_sentiment import LocalSentimentScorer, default_model_path
+
+
+class Command(BaseCommand):
+    help = 'Train the local sentiment model from the lexicon and LabeledSentimentSample rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--language', default='id', help='Only samples in this language (default: id)')
+        parser.add_argument('--epochs', type=int, default=20)
+        parser.add_argument('--learning-rate', type=float, default=0.05)
+        parser.add_argument('--l2', type=float, default=0.001, help='Pull towards the lexicon prior')
+        parser.add_argument('--holdout', type=float, default=0.2, help='Fraction kept aside for evaluation')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Model file (default: SENTIMENT_CONFIG LOCAL_MODEL_PATH)')
+
+    def handle(self, *args, **options):
+        samples = list(
+            LabeledSentimentSample.objects
+            .filter(language=options['language'])
+            .values_list('text', 'label')
+        )
+        if not samples:
+            raise CommandError('No labeled samples found; the lexicon-only model is used as is')
+
+        random.Random(options['seed']).shuffle(samples)
+        split = int(len(samples) * (1 - options['holdout']))
+        train, test = samples[:split], samples[split:]
+
+        baseline = LocalSentimentScorer()
+        scorer = LocalSentimentScorer().fit(
+            train,
+            epochs=options['epochs'],
+            learning_rate=options['learning_rate'],
+            l2=options['l2'],
+            seed=options['seed'],
+        )
+
+        self.stdout.write(f'Trained on {len(train)} samples')
+        if test:
+            self.stdout.write(
+                f'Holdout accuracy ({len(test)} samples): '
+                f'lexicon prior {baseline.evaluate(test):.3f} -> trained {scorer.evaluate(test):.3f}'
+            )
+
+        path = options['output'] or default_model_path()
+        scorer.save(path)
+        self.stdout.write(self.style.SUCCESS(f'Model saved to {path}'))
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabeledSentimentSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('label', models.CharField(choices=[('positive', 'Positive'), ('neutral', 'Neutral'), ('negative', 'Negative')], db_index=True, max_length=10)),
+                ('language', models.CharField(default='id', max_length=5)),
+                ('source', models.CharField(blank=True, help_text='e.g. twitter, survey, news', max_length=100, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Labeled Sentiment Sample',
+                'verbose_name_plural': 'Labeled Sentiment Samples',
+                'db_table': 'sentiment_labeled_sample',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twitter_scraper', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tweet',
+            fields=[
+                ('tweet_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('username', models.CharField(db_index=True, max_length=50)),
+                ('user_display_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('text', models.TextField()),
+                ('created_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('likes_count', models.IntegerField(default=0)),
+                ('retweets_count', models.IntegerField(default=0)),
+                ('replies_count', models.IntegerField(default=0)),
+                ('url', models.CharField(blank=True, max_length=255, null=True)),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tweet',
+                'verbose_name_plural': 'Tweets',
+                'db_table': 'tweet',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TweetSentiment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('analyzer_version', models.CharField(db_index=True, max_length=64)),
+                ('sentiment', models.CharField(max_length=10)),
+                ('score', models.FloatField(default=0)),
+                ('language', models.CharField(blank=True, max_length=10, null=True)),
+                ('method', models.CharField(blank=True, max_length=30, null=True)),
+                ('details', models.JSONField(default=dict)),
+                ('analyzed_at', models.DateTimeField(auto_now_add=True)),
+                ('tweet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sentiments', to='twitter_scraper.tweet')),
+            ],
+            options={
+                'verbose_name': 'Tweet Sentiment',
+                'verbose_name_plural': 'Tweet Sentiments',
+                'db_table': 'tweet_sentiment',
+                'unique_together': {('tweet', 'analyzer_version')},
+            },
+        ),
+    ]
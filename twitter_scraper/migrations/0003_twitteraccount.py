@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twitter_scraper', '0002_tweet_tweetsentiment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TwitterAccount',
+            fields=[
+                ('user_id', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('username', models.CharField(help_text='Lowercase, without @', max_length=50, unique=True)),
+                ('display_name', models.CharField(blank=True, max_length=100, null=True)),
+                ('since_id', models.CharField(blank=True, help_text='Newest tweet id fetched', max_length=32, null=True)),
+                ('covered_since', models.DateTimeField(blank=True, help_text='Oldest point of the contiguous fetch', null=True)),
+                ('last_fetched_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Twitter Account',
+                'verbose_name_plural': 'Twitter Accounts',
+                'db_table': 'twitter_account',
+            },
+        ),
+    ]
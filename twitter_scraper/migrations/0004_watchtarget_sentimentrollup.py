@@ -0,0 +1,64 @@
+# Generated by Django 4.2.7 on 2026-10-17 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('twitter_scraper', '0003_twitteraccount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WatchTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('account', 'Account'), ('keyword', 'Keyword')], default='account', max_length=10)),
+                ('value', models.CharField(help_text='Username (without @) or search query', max_length=255)),
+                ('label', models.CharField(blank=True, max_length=100, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('days', models.IntegerField(default=7, help_text='Look-back window per run')),
+                ('max_tweets', models.IntegerField(default=100)),
+                ('interval_minutes', models.IntegerField(default=60)),
+                ('since_id', models.CharField(blank=True, help_text='Keyword search checkpoint', max_length=32, null=True)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('tweets', models.ManyToManyField(blank=True, related_name='watch_targets', to='twitter_scraper.tweet')),
+            ],
+            options={
+                'verbose_name': 'Watch Target',
+                'verbose_name_plural': 'Watch Targets',
+                'db_table': 'sentiment_watch_target',
+                'ordering': ['kind', 'value'],
+                'unique_together': {('kind', 'value')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SentimentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('account', 'Account'), ('keyword', 'Keyword')], max_length=10)),
+                ('key', models.CharField(help_text='Lowercase username or search query', max_length=255)),
+                ('period', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day'), ('week', 'Week')], max_length=5)),
+                ('bucket', models.DateTimeField(help_text='Start of the hour / day / week (Monday)')),
+                ('total', models.IntegerField(default=0)),
+                ('positive', models.IntegerField(default=0)),
+                ('neutral', models.IntegerField(default=0)),
+                ('negative', models.IntegerField(default=0)),
+                ('average_score', models.FloatField(default=0)),
+                ('engagement', models.IntegerField(default=0, help_text='Likes + retweets')),
+                ('weighted_score', models.FloatField(default=0, help_text='Score weighted by 1 + likes + retweets')),
+                ('analyzer_version', models.CharField(max_length=64)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Sentiment Rollup',
+                'verbose_name_plural': 'Sentiment Rollups',
+                'db_table': 'sentiment_rollup',
+                'ordering': ['kind', 'key', 'period', 'bucket'],
+                'unique_together': {('kind', 'key', 'period', 'bucket')},
+            },
+        ),
+    ]
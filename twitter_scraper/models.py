@@ -0,0 +1,182 @@
+from django.db import models
+
+
+# -----------------------------
+# LABELED SENTIMENT SAMPLES
+# -----------------------------
+class LabeledSentimentSample(models.Model):
+    """
+    Manually labeled text used to train the local sentiment scorer
+    Train with: python manage.py train_local_sentiment
+    """
+    LABEL_CHOICES = [
+        ('positive', 'Positive'),
+        ('neutral', 'Neutral'),
+        ('negative', 'Negative'),
+    ]
+
+    text = models.TextField()
+    label = models.CharField(max_length=10, choices=LABEL_CHOICES, db_index=True)
+    language = models.CharField(max_length=5, default='id')
+    source = models.CharField(max_length=100, blank=True, null=True, help_text='e.g. twitter, survey, news')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sentiment_labeled_sample'
+        verbose_name = 'Labeled Sentiment Sample'
+        verbose_name_plural = 'Labeled Sentiment Samples'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"[{self.label}] {self.text[:50]}"
+
+
+# -----------------------------
+# TWEETS
+# -----------------------------
+class Tweet(models.Model):
+    """Tweet fetched from the Twitter API (metrics refreshed on every fetch)"""
+    tweet_id = models.CharField(max_length=32, primary_key=True)
+    username = models.CharField(max_length=50, db_index=True)
+    user_display_name = models.CharField(max_length=100, blank=True, null=True)
+    text = models.TextField()
+    created_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    likes_count = models.IntegerField(default=0)
+    retweets_count = models.IntegerField(default=0)
+    replies_count = models.IntegerField(default=0)
+    url = models.CharField(max_length=255, blank=True, null=True)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'tweet'
+        verbose_name = 'Tweet'
+        verbose_name_plural = 'Tweets'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"@{self.username}: {self.text[:50]}"
+
+
+# -----------------------------
+# TWEET SENTIMENT
+# -----------------------------
+class TweetSentiment(models.Model):
+    """
+    Sentiment of a tweet for one analyzer version
+    A new lexicon/model version gets its own row; older rows are kept
+    """
+    tweet = models.ForeignKey(Tweet, on_delete=models.CASCADE, related_name='sentiments')
+    analyzer_version = models.CharField(max_length=64, db_index=True)
+    sentiment = models.CharField(max_length=10)
+    score = models.FloatField(default=0)
+    language = models.CharField(max_length=10, blank=True, null=True)
+    method = models.CharField(max_length=30, blank=True, null=True)
+    details = models.JSONField(default=dict)
+    analyzed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'tweet_sentiment'
+        verbose_name = 'Tweet Sentiment'
+        verbose_name_plural = 'Tweet Sentiments'
+        unique_together = [('tweet', 'analyzer_version')]
+
+    def __str__(self):
+        return f"{self.tweet_id} [{self.analyzer_version[:8]}]: {self.sentiment}"
+
+
+# -----------------------------
+# TWITTER ACCOUNTS (scrape checkpoints)
+# -----------------------------
+class TwitterAccount(models.Model):
+    """
+    Username -> user id cache and incremental scrape checkpoint
+    Every tweet from covered_since up to since_id is in the Tweet table
+    """
+    user_id = models.CharField(max_length=32, primary_key=True)
+    username = models.CharField(max_length=50, unique=True, help_text='Lowercase, without @')
+    display_name = models.CharField(max_length=100, blank=True, null=True)
+    since_id = models.CharField(max_length=32, blank=True, null=True, help_text='Newest tweet id fetched')
+    covered_since = models.DateTimeField(blank=True, null=True, help_text='Oldest point of the contiguous fetch')
+    last_fetched_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'twitter_account'
+        verbose_name = 'Twitter Account'
+        verbose_name_plural = 'Twitter Accounts'
+
+    def __str__(self):
+        return f"@{self.username} ({self.user_id})"
+
+
+# -----------------------------
+# SENTIMENT MONITORING
+# -----------------------------
+class WatchTarget(models.Model):
+    """
+    Account or keyword monitored by: python manage.py run_sentiment_monitor
+    """
+    KIND_CHOICES = [
+        ('account', 'Account'),
+        ('keyword', 'Keyword'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='account')
+    value = models.CharField(max_length=255, help_text='Username (without @) or search query')
+    label = models.CharField(max_length=100, blank=True, null=True)
+    is_active = models.BooleanField(default=True)
+    days = models.IntegerField(default=7, help_text='Look-back window per run')
+    max_tweets = models.IntegerField(default=100)
+    interval_minutes = models.IntegerField(default=60)
+    since_id = models.CharField(max_length=32, blank=True, null=True, help_text='Keyword search checkpoint')
+    last_run_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    tweets = models.ManyToManyField(Tweet, related_name='watch_targets', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'sentiment_watch_target'
+        verbose_name = 'Watch Target'
+        verbose_name_plural = 'Watch Targets'
+        unique_together = [('kind', 'value')]
+        ordering = ['kind', 'value']
+
+    def __str__(self):
+        prefix = '@' if self.kind == 'account' else ''
+        return f"{prefix}{self.value}"
+
+
+class SentimentRollup(models.Model):
+    """
+    Sentiment of one account or keyword per hour / day / week bucket
+    (Asia/Makassar), maintained by services/aggregation.py
+    """
+    KIND_CHOICES = WatchTarget.KIND_CHOICES
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+        ('week', 'Week'),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=255, help_text='Lowercase username or search query')
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    bucket = models.DateTimeField(help_text='Start of the hour / day / week (Monday)')
+    total = models.IntegerField(default=0)
+    positive = models.IntegerField(default=0)
+    neutral = models.IntegerField(default=0)
+    negative = models.IntegerField(default=0)
+    average_score = models.FloatField(default=0)
+    engagement = models.IntegerField(default=0, help_text='Likes + retweets')
+    weighted_score = models.FloatField(default=0, help_text='Score weighted by 1 + likes + retweets')
+    analyzer_version = models.CharField(max_length=64)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'sentiment_rollup'
+        verbose_name = 'Sentiment Rollup'
+        verbose_name_plural = 'Sentiment Rollups'
+        unique_together = [('kind', 'key', 'period', 'bucket')]
+        ordering = ['kind', 'key', 'period', 'bucket']
+
+    def __str__(self):
+        return f"{self.kind}:{self.key} {self.period} {self.bucket:%Y-%m-%d %H:%M}: {self.average_score}"
@@ -0,0 +1,205 @@
+"""
+Sentiment Aggregation
+
+Ringkasan sentiment per akun / keyword per jam, hari dan minggu (waktu
+lokal, minggu mulai Senin) di tabel sentiment_rollup. Setiap kali tweet
+baru di-score hanya bucket yang terkena yang dihitung ulang, sehingga
+grafik tren cukup membaca satu range dari tabel rollup.
+
+- total / positive / neutral / negative
+- average_score
+- weighted_score: skor dengan bobot 1 + likes + retweets
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import SentimentRollup, Tweet, TweetSentiment
+
+logger = logging.getLogger(__name__)
+
+PERIODS = ('hour', 'day', 'week')
+
+_STEP = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+}
+
+
+def bucket_start(dt: datetime, period: str) -> datetime:
+    """Start of the local hour / day / week (Monday) containing ``dt``"""
+    local = timezone.localtime(dt)
+    if period == 'hour':
+        return local.replace(minute=0, second=0, microsecond=0)
+    day = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'day':
+        return day
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    raise ValueError(f"Unknown period: {period}")
+
+
+def _refresh(kind: str, key: str, sentiments, created_ats: Iterable[datetime], analyzer_version: str) -> int:
+    """
+    Recompute every bucket containing one of ``created_ats`` from the
+    TweetSentiment rows in ``sentiments`` (already scoped to kind/key)
+
+    Returns:
+        Number of rollup rows written
+    """
+    wanted = {
+        (period, bucket_start(dt, period))
+        for dt in created_ats if dt is not None
+        for period in PERIODS
+    }
+    if not wanted:
+        return 0
+
+    low = min(bucket for _, bucket in wanted)
+    high = max(bucket + _STEP[period] for period, bucket in wanted)
+
+    totals: Dict[tuple, Dict] = {
+        bucket: {
+            'total': 0, 'positive': 0, 'neutral': 0, 'negative': 0,
+            'score_sum': 0.0, 'engagement': 0, 'weight_sum': 0, 'weighted_sum': 0.0,
+        }
+        for bucket in wanted
+    }
+    rows = (
+        sentiments
+        .filter(analyzer_version=analyzer_version, tweet__created_at__gte=low, tweet__created_at__lt=high)
+        .values_list('tweet__created_at', 'sentiment', 'score', 'tweet__likes_count', 'tweet__retweets_count')
+    )
+    for created_at, sentiment, score, likes, retweets in rows.iterator():
+        engagement = (likes or 0) + (retweets or 0)
+        for period in PERIODS:
+            acc = totals.get((period, bucket_start(created_at, period)))
+            if acc is None:
+                continue
+            acc['total'] += 1
+            acc[sentiment if sentiment in ('positive', 'negative') else 'neutral'] += 1
+            acc['score_sum'] += score
+            acc['engagement'] += engagement
+            acc['weight_sum'] += 1 + engagement
+            acc['weighted_sum'] += score * (1 + engagement)
+
+    existing = {
+        (row.period, row.bucket): row
+        for row in SentimentRollup.objects.filter(kind=kind, key=key, bucket__gte=low, bucket__lt=high)
+    }
+    now = timezone.now()
+    to_create, to_update, to_delete = [], [], []
+    for (period, bucket), acc in totals.items():
+        row = existing.get((period, bucket))
+        if not acc['total']:
+            if row is not None:
+                to_delete.append(row.pk)
+            continue
+        if row is None:
+            row = SentimentRollup(kind=kind, key=key, period=period, bucket=bucket)
+            to_create.append(row)
+        else:
+            to_update.append(row)
+        row.total = acc['total']
+        row.positive = acc['positive']
+        row.neutral = acc['neutral']
+        row.negative = acc['negative']
+        row.average_score = round(acc['score_sum'] / acc['total'], 4)
+        row.engagement = acc['engagement']
+        row.weighted_score = round(acc['weighted_sum'] / acc['weight_sum'], 4)
+        row.analyzer_version = analyzer_version
+        row.updated_at = now  # not set by bulk_update
+
+    with transaction.atomic():
+        SentimentRollup.objects.bulk_create(to_create, batch_size=500)
+        if to_update:
+            SentimentRollup.objects.bulk_update(
+                to_update,
+                ['total', 'positive', 'neutral', 'negative', 'average_score',
+                 'engagement', 'weighted_score', 'analyzer_version', 'updated_at'],
+                batch_size=500,
+            )
+        if to_delete:
+            SentimentRollup.objects.filter(pk__in=to_delete).delete()
+
+    return len(to_create) + len(to_update)
+
+
+def update_account_rollups(tweets_data: List[Dict], analyzer_version: str) -> int:
+    """Refresh the account buckets of newly scored tweets"""
+    by_username: Dict[str, List] = {}
+    for data in tweets_data:
+        by_username.setdefault(data['username'], []).append(data.get('created_at'))
+
+    written = 0
+    for username, created_ats in by_username.items():
+        written += _refresh(
+            'account', username.lower(),
+            TweetSentiment.objects.filter(tweet__username=username),
+            created_ats, analyzer_version,
+        )
+    return written
+
+
+def update_keyword_rollups(target, tweets_data: List[Dict], analyzer_version: str) -> int:
+    """Refresh the buckets of a keyword WatchTarget after tweets were added to it"""
+    return _refresh(
+        'keyword', target.value,
+        TweetSentiment.objects.filter(tweet__watch_targets=target),
+        [data.get('created_at') for data in tweets_data],
+        analyzer_version,
+    )
+
+
+def rebuild_rollups(analyzer_version: str) -> int:
+    """Recompute all rollups from the tweet store (e.g. after a new analyzer version)"""
+    from ..models import WatchTarget
+
+    written = 0
+    usernames = Tweet.objects.order_by('username').values_list('username', flat=True).distinct()
+    for username in usernames:
+        created_ats = Tweet.objects.filter(
+            username=username, sentiments__analyzer_version=analyzer_version
+        ).values_list('created_at', flat=True)
+        written += _refresh(
+            'account', username.lower(),
+            TweetSentiment.objects.filter(tweet__username=username),
+            list(created_ats), analyzer_version,
+        )
+
+    for target in WatchTarget.objects.filter(kind='keyword'):
+        written += update_keyword_rollups(
+            target, list(target.tweets.values('created_at')), analyzer_version
+        )
+    return written
+
+
+def query_rollups(
+    kind: Optional[str] = None,
+    key: Optional[str] = None,
+    period: str = 'day',
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None
+):
+    """
+    Rollups of one period, optionally for one account / keyword and
+    buckets starting in [start, end)
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+
+    rollups = SentimentRollup.objects.filter(period=period)
+    if kind:
+        rollups = rollups.filter(kind=kind)
+    if key:
+        rollups = rollups.filter(key=key.lower() if kind == 'account' else key)
+    if start is not None:
+        rollups = rollups.filter(bucket__gte=start)
+    if end is not None:
+        rollups = rollups.filter(bucket__lt=end)
+    return rollups.order_by('kind', 'key', 'bucket')
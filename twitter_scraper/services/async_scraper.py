@@ -0,0 +1,127 @@
+"""
+Async Twitter/X Scraper
+
+Varian TwitterScraper untuk ASGI dengan tweepy.asynchronous.AsyncClient:
+request ke API di-await sehingga satu worker bisa menangani banyak
+analisis akun sekaligus. Lookup/checkpoint di database (twitter_account,
+tweet) tetap memakai kode sync lewat sync_to_async.
+
+Requires: pip install "tweepy[async]"
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+import os
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from .scraper import StubTwitterClient, TwitterScraper
+
+try:
+    from tweepy.asynchronous import AsyncClient
+    ASYNC_CLIENT_AVAILABLE = True
+except Exception:
+    # ImportError, or TweepyException when aiohttp / async_lru are missing
+    ASYNC_CLIENT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncTwitterScraper(TwitterScraper):
+    """TwitterScraper with awaitable API calls (aget_user / ascrape_by_username)"""
+    
+    def _build_client(self):
+        """tweepy AsyncClient from the env credentials, None if unavailable"""
+        if not ASYNC_CLIENT_AVAILABLE:
+            return None
+        
+        api_key = os.getenv('TWITTER_API_KEY')
+        api_secret = os.getenv('TWITTER_API_SECRET')
+        bearer_token = os.getenv('TWITTER_BEARER_TOKEN')
+        if not (api_key and api_secret):
+            return None
+        
+        if bearer_token:
+            return AsyncClient(bearer_token=bearer_token)
+        return AsyncClient(consumer_key=api_key, consumer_secret=api_secret)
+    
+    async def ascrape_by_username(
+        self,
+        username: str,
+        days: int = None,
+        max_tweets: int = None,
+        incremental: bool = True
+    ) -> List[Dict]:
+        """Async scrape_by_username()"""
+        days = days or self.default_days
+        max_tweets = self._tweet_limit(max_tweets)
+        username = username.lstrip('@')
+        
+        if not self.use_api or not self.tweepy_client:
+            raise Exception("Twitter API is not configured. Please provide valid API credentials.")
+        
+        now = timezone.now()
+        start_time = now - timedelta(days=days)
+        
+        try:
+            user = await self.aget_user(username)
+            logger.info(f"Found user: @{user[1]} (ID: {user[0]})")
+            
+            account, since_id = await sync_to_async(self._checkpoint)(user[1], start_time, incremental)
+            fetched, exhausted = await self._afetch_pages(
+                user[0], max_tweets, start_time=start_time, since_id=since_id
+            )
+            return await sync_to_async(self._finish)(
+                user, account, since_id, fetched, exhausted, start_time, now, max_tweets, incremental
+            )
+        except Exception as e:
+            logger.error(f"Error scraping with Twitter API: {str(e)}")
+            raise Exception(f"Failed to scrape tweets with Twitter API: {str(e)}")
+    
+    async def aget_user(self, username: str) -> tuple:
+        """Async get_user()"""
+        user = await sync_to_async(self._known_user)(username)
+        if user is None:
+            response = await self.tweepy_client.get_user(username=username)
+            user = await sync_to_async(self._remember_user)(username, response)
+        return user
+    
+    async def _afetch_pages(
+        self,
+        user_id: str,
+        max_tweets: int,
+        start_time: Optional[datetime] = None,
+        since_id: Optional[str] = None
+    ) -> tuple:
+        """Async _fetch_pages()"""
+        tweets = []
+        pagination_token = None
+        
+        while True:
+            response = await self.tweepy_client.get_users_tweets(
+                **self._page_params(user_id, max_tweets - len(tweets), start_time, since_id, pagination_token)
+            )
+            
+            page = list(response.data or [])
+            tweets.extend(page)
+            pagination_token = (response.meta or {}).get('next_token')
+            
+            if len(tweets) >= max_tweets:
+                return tweets[:max_tweets], pagination_token is None and len(tweets) == max_tweets
+            if not pagination_token or not page:
+                return tweets, True
+
+
+class AsyncStubTwitterClient(StubTwitterClient):
+    """Offline stand-in for tweepy AsyncClient"""
+    
+    async def get_user(self, username: str, **kwargs):
+        return super().get_user(username, **kwargs)
+    
+    async def get_users_tweets(self, id, **kwargs):
+        return super().get_users_tweets(id, **kwargs)
+    
+    async def search_recent_tweets(self, query, **kwargs):
+        return super().search_recent_tweets(query, **kwargs)
@@ -0,0 +1,182 @@
+"""
+Table Cache Backend
+
+Django cache backend di atas tabel `cache` (model valemis.Cache, format
+Laravel: key / value / expiration epoch), sehingga cache dipakai bersama
+oleh semua proses worker tanpa Redis/Memcached.
+
+    CACHES = {
+        'shared': {
+            'BACKEND': 'twitter_scraper.services.cache_backend.TableCache',
+            'KEY_PREFIX': 'django_cache',
+            'TIMEOUT': 3600,
+        },
+    }
+
+Nilai disimpan sebagai JSON, bukan pickle: tabel ini ikut ditulis oleh
+Laravel, dan isi yang di-unpickle bisa menjalankan kode. datetime tetap
+kembali sebagai datetime; tuple kembali sebagai list, tipe lain yang tidak
+didukung JSON ditolak saat set(). Database errors dianggap cache miss,
+sama seperti TranslationMemory.
+"""
+
+from datetime import datetime
+import json
+import logging
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, transaction
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Laravel stores "forever" entries with a far-future expiration
+_FOREVER = 9999999999
+
+_DATETIME = '__datetime__'
+
+
+class _Encoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder, with datetimes tagged so they decode as datetimes"""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return {_DATETIME: o.isoformat()}
+        return super().default(o)
+
+
+def _object_hook(obj):
+    if len(obj) == 1 and _DATETIME in obj:
+        return parse_datetime(obj[_DATETIME])
+    return obj
+
+
+class TableCache(BaseCache):
+    """Cache entries stored as rows of the `cache` table"""
+
+    # Expired rows of this backend are deleted after this many writes
+    PRUNE_EVERY = 500
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        # Keys are always prefixed: the table is shared with Laravel and
+        # the translation memory, clear() only touches this prefix
+        self.key_prefix = self.key_prefix or 'django_cache'
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _model():
+        from django.apps import apps
+        return apps.get_model('valemis', 'Cache')
+
+    @staticmethod
+    def _encode(value) -> str:
+        return json.dumps(value, cls=_Encoder, separators=(',', ':'))
+
+    @staticmethod
+    def _decode(value: str):
+        return json.loads(value, object_hook=_object_hook)
+
+    def _expiration(self, timeout) -> int:
+        expiry = self.get_backend_timeout(timeout)
+        return _FOREVER if expiry is None else int(expiry)
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        try:
+            row = self._model().objects.filter(key=key, expiration__gt=int(time.time())).first()
+        except DatabaseError as e:
+            logger.warning(f"Table cache unavailable: {str(e)}")
+            return default
+        if row is None:
+            return default
+        try:
+            return self._decode(row.value)
+        except Exception:
+            # Not written by this backend
+            return default
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None and timeout <= 0:
+            self._delete(key)
+            return
+        try:
+            self._model().objects.update_or_create(
+                key=key,
+                defaults={'value': self._encode(value), 'expiration': self._expiration(timeout)},
+            )
+        except DatabaseError as e:
+            logger.warning(f"Table cache unavailable: {str(e)}")
+            return
+        self._written()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        Cache = self._model()
+        try:
+            with transaction.atomic():
+                Cache.objects.filter(key=key, expiration__lte=int(time.time())).delete()
+                Cache.objects.create(key=key, value=self._encode(value), expiration=self._expiration(timeout))
+        except IntegrityError:
+            return False
+        except DatabaseError as e:
+            logger.warning(f"Table cache unavailable: {str(e)}")
+            return False
+        self._written()
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        try:
+            return bool(
+                self._model().objects
+                .filter(key=key, expiration__gt=int(time.time()))
+                .update(expiration=self._expiration(timeout))
+            )
+        except DatabaseError as e:
+            logger.warning(f"Table cache unavailable: {str(e)}")
+            return False
+
+    def delete(self, key, version=None):
+        return self._delete(self.make_and_validate_key(key, version=version))
+
+    def _delete(self, key) -> bool:
+        try:
+            deleted, _ = self._model().objects.filter(key=key).delete()
+        except DatabaseError as e:
+            logger.warning(f"Table cache unavailable: {str(e)}")
+            return False
+        return bool(deleted)
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        try:
+            return self._model().objects.filter(key=key, expiration__gt=int(time.time())).exists()
+        except DatabaseError as e:
+            logger.warning(f"Table cache unavailable: {str(e)}")
+            return False
+
+    def clear(self):
+        try:
+            self._model().objects.filter(key__startswith=f"{self.key_prefix}:").delete()
+        except DatabaseError as e:
+            logger.warning(f"Table cache unavailable: {str(e)}")
+
+    def _written(self):
+        with self._lock:
+            self._writes += 1
+            due = self._writes >= self.PRUNE_EVERY
+            if due:
+                self._writes = 0
+        if due:
+            try:
+                self._model().objects.filter(
+                    key__startswith=f"{self.key_prefix}:", expiration__lte=int(time.time())
+                ).delete()
+            except DatabaseError as e:
+                logger.warning(f"Table cache prune failed: {str(e)}")
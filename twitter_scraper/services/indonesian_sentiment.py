@@ -7,12 +7,191 @@ Multi-layer approach untuk analisis sentiment bahasa Indonesia:
 3. Pre-trained Indonesian model (most accurate)
 """
 
-from typing import Dict, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
 import re
 import logging
 
+try:
+    import numpy as np
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from .registry import get_vader
+from .text import Document, preprocess, preprocess_many
+from .translation import BatchTranslator
+from .translation_cache import TranslationMemory, get_sentiment_config
+
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r'\w+')
+
+# Jenis entri lexicon
+POSITIVE = 'positive'
+NEGATIVE = 'negative'
+INTENSIFIER = 'intensifier'
+NEGATION = 'negation'
+
+# Jumlah token (di luar lexicon) setelah negasi/intensifier yang masih
+# terpengaruh, mis. "tidak terlalu bagus", "tidak begitu bagus"
+MODIFIER_WINDOW = 3
+
+
+class LexiconMatcher:
+    """
+    Word-level trie over all lexicon entries
+
+    Multi-word entries ('luar biasa', 'gulung tikar', 'benar-benar') are
+    stored as token sequences; at each position the longest entry wins.
+    """
+
+    _END = ''
+
+    def __init__(self, entries: Dict[str, Tuple[str, float]]):
+        """
+        Args:
+            entries: {phrase: (kind, weight)}
+        """
+        self.entries = entries
+        self.root: Dict = {}
+        for phrase in entries:
+            node = self.root
+            for word in _WORD_RE.findall(phrase.lower()):
+                node = node.setdefault(word, {})
+            node[self._END] = phrase
+
+        # Changes whenever an entry, weight or the modifier window changes
+        fingerprint = json.dumps([sorted(entries.items()), MODIFIER_WINDOW])
+        self.version = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()[:12]
+
+        # Column per entry + polarity vectors for score_batch()
+        self.columns = {phrase: i for i, phrase in enumerate(entries)}
+        if SCIPY_AVAILABLE:
+            self.positive_weights = np.zeros(len(entries))
+            self.negative_weights = np.zeros(len(entries))
+            for phrase, (kind, weight) in entries.items():
+                if kind == POSITIVE:
+                    self.positive_weights[self.columns[phrase]] = weight
+                elif kind == NEGATIVE:
+                    self.negative_weights[self.columns[phrase]] = weight
+
+    def match(self, tokens: List[str]) -> List[Optional[str]]:
+        """Lexicon phrase per matched span, None for every other token"""
+        terms = []
+        i = 0
+        n = len(tokens)
+
+        while i < n:
+            node = self.root.get(tokens[i])
+            phrase = None
+            end = i + 1
+            j = i
+            while node is not None:
+                if self._END in node:
+                    phrase = node[self._END]
+                    end = j + 1
+                j += 1
+                if j >= n:
+                    break
+                node = node.get(tokens[j])
+
+            terms.append(phrase)
+            i = end if phrase is not None else i + 1
+
+        return terms
+
+    def occurrences(self, terms: List[Optional[str]]) -> List[Tuple[str, float, bool]]:
+        """
+        Sentiment entries of a matched term sequence with their modifiers
+
+        An intensifier or negation applies to the next sentiment entry
+        within MODIFIER_WINDOW tokens; negation flips its polarity.
+
+        Returns:
+            List of (phrase, intensifier, negated)
+        """
+        found = []
+        intensifier = 1.0
+        negated = False
+        window = 0
+
+        for phrase in terms:
+            if phrase is None:
+                if window:
+                    window -= 1
+                    if not window:
+                        intensifier = 1.0
+                        negated = False
+                continue
+
+            kind, weight = self.entries[phrase]
+            if kind == INTENSIFIER:
+                intensifier = weight
+                window = MODIFIER_WINDOW
+            elif kind == NEGATION:
+                negated = True
+                window = MODIFIER_WINDOW
+            else:
+                found.append((phrase, intensifier, negated))
+                intensifier = 1.0
+                negated = False
+                window = 0
+
+        return found
+
+    def score(self, terms: List[Optional[str]]) -> Tuple[float, float]:
+        """Positive and negative totals of a matched term sequence"""
+        positive_score = 0.0
+        negative_score = 0.0
+
+        for phrase, intensifier, negated in self.occurrences(terms):
+            kind, weight = self.entries[phrase]
+            score = weight * intensifier
+            if (kind == POSITIVE) != negated:
+                positive_score += score  # negated negative = positive
+            else:
+                negative_score += score  # negated positive = negative
+
+        # Drop float noise so word_counts (int of the totals) is exact
+        return round(positive_score, 9), round(negative_score, 9)
+
+    def score_batch(self, token_lists: List[List[str]]) -> Tuple[List[float], List[float]]:
+        """
+        Positive and negative totals for a whole corpus
+
+        Builds two sparse document x entry matrices (plain and negated
+        occurrences, weighted by intensifier) and multiplies them with the
+        polarity vectors of the lexicon in one go.
+        """
+        if not SCIPY_AVAILABLE:
+            totals = [self.score(self.match(tokens)) for tokens in token_lists]
+            return [t[0] for t in totals], [t[1] for t in totals]
+
+        rows, cols, data, negated_flags = [], [], [], []
+        for row, tokens in enumerate(token_lists):
+            for phrase, intensifier, negated in self.occurrences(self.match(tokens)):
+                rows.append(row)
+                cols.append(self.columns[phrase])
+                data.append(intensifier)
+                negated_flags.append(negated)
+
+        shape = (len(token_lists), len(self.entries))
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        data = np.asarray(data, dtype=float)
+        negated_flags = np.asarray(negated_flags, dtype=bool)
+
+        plain = sparse.csr_matrix((data * ~negated_flags, (rows, cols)), shape=shape)
+        flipped = sparse.csr_matrix((data * negated_flags, (rows, cols)), shape=shape)
+
+        positive_scores = plain @ self.positive_weights + flipped @ self.negative_weights
+        negative_scores = plain @ self.negative_weights + flipped @ self.positive_weights
+
+        return np.round(positive_scores, 9).tolist(), np.round(negative_scores, 9).tolist()
+
 
 class IndonesianLexiconAnalyzer:
     """
@@ -80,28 +259,35 @@ class IndonesianLexiconAnalyzer:
             'tidak', 'bukan', 'jangan', 'belum', 'tak', 'gak', 'nggak',
             'enggak', 'ga', 'ngga', 'ngg', 'ndak', 'kagak'
         }
+        
+        self.matcher = self._build_matcher()
+
+    @property
+    def version(self) -> str:
+        """Lexicon fingerprint (stored with persisted results)"""
+        return self.matcher.version
     
-    def _preprocess(self, text: str) -> str:
-        """Preprocessing text"""
-        text = text.lower()
-        # Remove URLs
-        text = re.sub(r'http\S+|www.\S+', '', text)
-        # Remove mentions
-        text = re.sub(r'@\w+', '', text)
-        # Remove hashtags (keep the word)
-        text = re.sub(r'#', '', text)
-        return text
-    
-    def _tokenize(self, text: str) -> list:
-        """Simple tokenization"""
-        # Split by whitespace and punctuation
-        tokens = re.findall(r'\w+', text)
-        return tokens
-    
-    def analyze(self, text: str) -> Dict:
+    def _build_matcher(self) -> LexiconMatcher:
+        """Compile all word lists into one matcher"""
+        entries = {}
+        for word in self.positive_words:
+            entries[word] = (POSITIVE, 1.0)
+        for word in self.negative_words:
+            entries[word] = (NEGATIVE, 1.0)
+        for word, weight in self.intensifiers.items():
+            entries[word] = (INTENSIFIER, weight)
+        for word in self.negations:
+            entries[word] = (NEGATION, 1.0)
+        return LexiconMatcher(entries)
+
+    def analyze(self, text: str, document: Document = None) -> Dict:
         """
         Analyze sentiment menggunakan lexicon-based approach
         
+        Args:
+            text: Text to analyze
+            document: preprocess(text), when the caller already has it
+        
         Returns:
             Dictionary dengan sentiment, score, dan details
         """
@@ -117,9 +303,8 @@ class IndonesianLexiconAnalyzer:
                 'method': 'lexicon'
             }
         
-        # Preprocess
-        processed_text = self._preprocess(text)
-        tokens = self._tokenize(processed_text)
+        # Tokenize + lexicon match (URL/mention/hashtag handled by the scanner)
+        tokens = (document or preprocess(text)).tokens
         
         if not tokens:
             return {
@@ -134,47 +319,29 @@ class IndonesianLexiconAnalyzer:
             }
         
         # Calculate sentiment
-        positive_score = 0.0
-        negative_score = 0.0
+        positive_score, negative_score = self.matcher.score(self.matcher.match(tokens))
+        return self._build_result(positive_score, negative_score)
+    
+    def batch_analyze(self, texts: List[str], documents: List[Document] = None) -> List[Dict]:
+        """
+        Analyze a list of texts in one pass (see LexiconMatcher.score_batch)
         
-        i = 0
-        while i < len(tokens):
-            token = tokens[i]
-            
-            # Check for intensifier
-            intensifier = 1.0
-            if token in self.intensifiers:
-                intensifier = self.intensifiers[token]
-                i += 1
-                if i >= len(tokens):
-                    break
-                token = tokens[i]
-            
-            # Check for negation
-            negated = False
-            if token in self.negations:
-                negated = True
-                i += 1
-                if i >= len(tokens):
-                    break
-                token = tokens[i]
-            
-            # Check sentiment
-            if token in self.positive_words:
-                score = 1.0 * intensifier
-                if negated:
-                    negative_score += score  # negated positive = negative
-                else:
-                    positive_score += score
-            elif token in self.negative_words:
-                score = 1.0 * intensifier
-                if negated:
-                    positive_score += score  # negated negative = positive
-                else:
-                    negative_score += score
-            
-            i += 1
+        Args:
+            texts: Texts to analyze
+            documents: preprocess_many(texts), when the caller already has them
         
+        Returns:
+            List of results, same format and order as analyze()
+        """
+        documents = documents or preprocess_many(texts)
+        positive_scores, negative_scores = self.matcher.score_batch([d.tokens for d in documents])
+        return [
+            self._build_result(positive_score, negative_score)
+            for positive_score, negative_score in zip(positive_scores, negative_scores)
+        ]
+    
+    def _build_result(self, positive_score: float, negative_score: float) -> Dict:
+        """Result dictionary from positive/negative totals"""
         # Normalize scores
         total_score = positive_score + negative_score
         
@@ -228,58 +395,74 @@ class TranslationBasedAnalyzer:
     Fallback method jika lexicon tidak confident
     """
     
-    def __init__(self):
-        try:
-            from deep_translator import GoogleTranslator
-            self.translator = GoogleTranslator(source='id', target='en')
-            self.available = True
-        except ImportError:
+    def __init__(self, translator_factory: Callable = None):
+        """
+        Args:
+            translator_factory: Callable(source, target) returning an object
+                with translate(text); default GoogleTranslator. Use
+                StubTranslator for offline tests.
+        """
+        # Translation memory (repeated texts skip the network)
+        memory = None
+        if get_sentiment_config('TRANSLATION_CACHE_ENABLED', True):
+            memory = TranslationMemory(source='id', target='en')
+        
+        self.batch_translator = BatchTranslator(
+            source='id', target='en', translator_factory=translator_factory, memory=memory
+        )
+        self.available = self.batch_translator.available
+        if not self.available:
             logger.warning("deep-translator not installed. Translation method unavailable.")
-            self.available = False
         
-        # Import VADER
-        try:
-            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-            self.vader = SentimentIntensityAnalyzer()
-        except ImportError:
+        # Shared VADER instance
+        self.vader = get_vader()
+        if self.vader is None:
             logger.error("vaderSentiment not installed")
-            self.vader = None
     
     def analyze(self, text: str) -> Dict:
         """Translate to English then analyze with VADER"""
+        return self.batch_analyze([text])[0]
+    
+    def batch_analyze(self, texts: List[str]) -> List[Optional[Dict]]:
+        """
+        Translate all texts (batched, concurrent) then analyze with VADER
+        
+        Returns:
+            Result per text, None where translation was not possible
+        """
         if not self.available or not self.vader:
-            return None
+            return [None] * len(texts)
         
-        try:
-            # Translate to English
-            translated = self.translator.translate(text)
-            
-            # Analyze with VADER
-            scores = self.vader.polarity_scores(translated)
-            compound = scores['compound']
-            
-            # Determine sentiment
-            if compound >= 0.05:
-                sentiment = 'positive'
-            elif compound <= -0.05:
-                sentiment = 'negative'
-            else:
-                sentiment = 'neutral'
-            
-            return {
-                'sentiment': sentiment,
-                'score': compound,
-                'details': {
-                    'positive': scores['pos'],
-                    'neutral': scores['neu'],
-                    'negative': scores['neg']
-                },
-                'method': 'translation+vader',
-                'translated_text': translated
-            }
-        except Exception as e:
-            logger.error(f"Translation error: {str(e)}")
-            return None
+        translations = self.batch_translator.translate_many(texts)
+        return [
+            self._score(translated) if translated is not None else None
+            for translated in translations
+        ]
+    
+    def _score(self, translated: str) -> Dict:
+        """VADER result for an English text"""
+        scores = self.vader.polarity_scores(translated)
+        compound = scores['compound']
+        
+        # Determine sentiment
+        if compound >= 0.05:
+            sentiment = 'positive'
+        elif compound <= -0.05:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
+        
+        return {
+            'sentiment': sentiment,
+            'score': compound,
+            'details': {
+                'positive': scores['pos'],
+                'neutral': scores['neu'],
+                'negative': scores['neg']
+            },
+            'method': 'translation+vader',
+            'translated_text': translated
+        }
 
 
 class HybridIndonesianSentimentAnalyzer:
@@ -288,21 +471,48 @@ class HybridIndonesianSentimentAnalyzer:
     untuk hasil terbaik
     """
     
-    def __init__(self, method: str = 'hybrid'):
+    def __init__(self, method: str = 'hybrid', translator_factory: Callable = None):
         """
         Initialize analyzer
         
         Args:
-            method: 'lexicon', 'translation', 'hybrid', or 'auto'
+            method: 'lexicon', 'translation', 'hybrid', 'auto', or 'local'
+                ('local' = offline linear model, no translation; see local_sentiment)
+            translator_factory: See TranslationBasedAnalyzer
         """
         self.method = method
         self.lexicon_analyzer = IndonesianLexiconAnalyzer()
-        self.translation_analyzer = TranslationBasedAnalyzer()
+        self.translation_analyzer = TranslationBasedAnalyzer(translator_factory=translator_factory)
     
-    def analyze(self, text: str) -> Dict:
+    @property
+    def version(self) -> str:
+        """Method + lexicon (+ local model) fingerprint"""
+        version = f"{self.method}:{self.lexicon_analyzer.version}"
+        if self.method == 'local':
+            version += f":{self._local_scorer().version}"
+        return version
+    
+    def _local_scorer(self):
+        """Offline model (reloaded by local_sentiment when retrained)"""
+        from .local_sentiment import get_local_scorer
+        return get_local_scorer()
+    
+    def _needs_translation(self, lexicon_result: Dict) -> bool:
+        """Auto mode only consults the translation when the lexicon is unsure"""
+        if self.method in ['translation', 'hybrid']:
+            return True
+        if self.method == 'auto':
+            return abs(lexicon_result['score']) <= 0.3
+        return False
+    
+    def analyze(self, text: str, document: Document = None) -> Dict:
         """
         Analyze sentiment dengan hybrid approach
         
+        Args:
+            text: Text to analyze
+            document: preprocess(text), when the caller already has it
+        
         Returns:
             Dictionary dengan sentiment analysis result
         """
@@ -318,17 +528,82 @@ class HybridIndonesianSentimentAnalyzer:
                 'method': 'none'
             }
         
+        document = document or preprocess(text)
+        
+        if self.method == 'local':
+            return self._local_scorer().analyze(text, document=document)
+        
         # Method 1: Lexicon-based (fast, always run)
-        lexicon_result = self.lexicon_analyzer.analyze(text)
+        lexicon_result = self.lexicon_analyzer.analyze(text, document=document)
         
         if self.method == 'lexicon':
             return lexicon_result
         
         # Method 2: Translation-based (if available)
         translation_result = None
-        if self.method in ['translation', 'hybrid', 'auto']:
+        if self._needs_translation(lexicon_result):
             translation_result = self.translation_analyzer.analyze(text)
         
+        return self._combine(lexicon_result, translation_result)
+    
+    def batch_analyze(self, texts: List[str], documents: List[Document] = None) -> List[Dict]:
+        """
+        Analyze a list of texts; the lexicon pass is vectorized over all texts
+        
+        Args:
+            texts: Texts to analyze
+            documents: preprocess_many(texts), when the caller already has them
+        
+        Returns:
+            List of results, same format and order as analyze()
+        """
+        documents = documents or preprocess_many(texts)
+        
+        if self.method == 'local':
+            scorer = self._local_scorer()
+            return [
+                self.analyze(text) if document.is_empty else scorer.analyze(text, document=document)
+                for text, document in zip(texts, documents)
+            ]
+        
+        lexicon_results = self.lexicon_analyzer.batch_analyze(texts, documents=documents)
+        
+        # Texts that need a translation go out together (batched, concurrent);
+        # where translation fails the lexicon result is used
+        wanted = [
+            i for i, (text, lexicon_result) in enumerate(zip(texts, lexicon_results))
+            if text and text.strip() and self._needs_translation(lexicon_result)
+        ]
+        translation_results = {}
+        if wanted:
+            batch = self.translation_analyzer.batch_analyze([texts[i] for i in wanted])
+            translation_results = dict(zip(wanted, batch))
+        
+        results = []
+        for i, (text, lexicon_result) in enumerate(zip(texts, lexicon_results)):
+            if not text or not text.strip():
+                results.append({
+                    'sentiment': 'neutral',
+                    'score': 0.0,
+                    'details': {
+                        'positive': 0.0,
+                        'neutral': 1.0,
+                        'negative': 0.0
+                    },
+                    'method': 'none'
+                })
+                continue
+            
+            if self.method == 'lexicon':
+                results.append(lexicon_result)
+                continue
+            
+            results.append(self._combine(lexicon_result, translation_results.get(i)))
+        
+        return results
+    
+    def _combine(self, lexicon_result: Dict, translation_result: Dict) -> Dict:
+        """Merge lexicon and translation results according to self.method"""
         if self.method == 'translation':
             return translation_result if translation_result else lexicon_result
         
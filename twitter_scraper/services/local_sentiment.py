@@ -0,0 +1,226 @@
+"""
+Local Sentiment Scorer
+
+Model linear kecil untuk bahasa Indonesia tanpa terjemahan (tanpa
+network). Bobot awal diambil dari lexicon (IndonesianLexiconAnalyzer),
+lalu disesuaikan dengan data berlabel di tabel sentiment_labeled_sample.
+
+    score = tanh(bias + sum(weight[f] * value[f]))
+
+Fitur: entri lexicon (dengan intensifier, negasi sebagai fitur terpisah)
+dan token lain.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+
+from django.conf import settings
+
+from .indonesian_sentiment import NEGATIVE, POSITIVE, IndonesianLexiconAnalyzer
+from .text import Document, preprocess, tokenize
+from .translation_cache import get_sentiment_config
+
+logger = logging.getLogger(__name__)
+
+LABEL_TARGETS = {'positive': 1.0, 'neutral': 0.0, 'negative': -1.0}
+
+# Bobot awal entri lexicon; tanh(0.5) ~ 0.46 untuk satu kata
+LEXICON_PRIOR = 0.5
+
+
+def default_model_path() -> str:
+    path = get_sentiment_config('LOCAL_MODEL_PATH')
+    if path:
+        return str(path)
+    return os.path.join(str(settings.MEDIA_ROOT), 'sentiment', 'local_model.json')
+
+
+class LocalSentimentScorer:
+    """Linear sentiment model over lexicon + token features"""
+
+    VERSION = 1
+
+    def __init__(self, weights: Dict[str, float] = None, bias: float = 0.0, lexicon: IndonesianLexiconAnalyzer = None):
+        self.lexicon = lexicon or IndonesianLexiconAnalyzer()
+        self.matcher = self.lexicon.matcher
+        self.prior = self.lexicon_prior()
+        self.weights = dict(self.prior) if weights is None else weights
+        self.bias = bias
+
+    @property
+    def version(self) -> str:
+        """Fingerprint of the weights"""
+        payload = json.dumps([self.VERSION, self.bias, sorted(self.weights.items())])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:12]
+
+    def lexicon_prior(self) -> Dict[str, float]:
+        """Lexicon polarity as initial weights (negated entries flipped)"""
+        prior = {}
+        for phrase, (kind, weight) in self.matcher.entries.items():
+            if kind == POSITIVE:
+                polarity = weight * LEXICON_PRIOR
+            elif kind == NEGATIVE:
+                polarity = -weight * LEXICON_PRIOR
+            else:
+                continue
+            prior[f"lex:{phrase}"] = polarity
+            prior[f"not:{phrase}"] = -polarity
+        return prior
+
+    def features(self, tokens: List[str]) -> Dict[str, float]:
+        """Sparse feature vector of a tokenized text"""
+        terms = self.matcher.match(tokens)
+        vector: Dict[str, float] = {}
+
+        for phrase, intensifier, negated in self.matcher.occurrences(terms):
+            key = f"not:{phrase}" if negated else f"lex:{phrase}"
+            vector[key] = vector.get(key, 0.0) + intensifier
+
+        # Token lain (di luar lexicon) sebagai fitur biner
+        for token, phrase in zip(tokens, terms):
+            if phrase is None:
+                vector[f"tok:{token}"] = 1.0
+
+        return vector
+
+    def score_tokens(self, tokens: List[str]) -> float:
+        z = self.bias
+        for key, value in self.features(tokens).items():
+            z += self.weights.get(key, 0.0) * value
+        return math.tanh(z)
+
+    def analyze(self, text: str, document: Document = None) -> Dict:
+        """Same result format as IndonesianLexiconAnalyzer.analyze()"""
+        tokens = (document or preprocess(text)).tokens
+        score = self.score_tokens(tokens) if tokens else 0.0
+
+        if score >= 0.1:
+            sentiment = 'positive'
+        elif score <= -0.1:
+            sentiment = 'negative'
+        else:
+            sentiment = 'neutral'
+
+        return {
+            'sentiment': sentiment,
+            'score': round(score, 4),
+            'details': {
+                'positive': round(max(score, 0.0), 4),
+                'neutral': round(1 - abs(score), 4),
+                'negative': round(max(-score, 0.0), 4)
+            },
+            'method': 'local'
+        }
+
+    def batch_analyze(self, texts: List[str]) -> List[Dict]:
+        return [self.analyze(text) for text in texts]
+
+    # ==============================
+    # Training
+    # ==============================
+    def fit(
+        self,
+        samples: Iterable[Tuple[str, str]],
+        epochs: int = 20,
+        learning_rate: float = 0.05,
+        l2: float = 0.001,
+        seed: int = 0,
+    ) -> 'LocalSentimentScorer':
+        """
+        SGD on squared error of tanh(z) against -1/0/+1 labels
+
+        L2 pulls weights back towards the lexicon prior, not towards zero,
+        so a small labeled set refines the lexicon instead of replacing it.
+
+        Args:
+            samples: (text, label) pairs, label in LABEL_TARGETS
+        """
+        data = [
+            (self.features(tokenize(text)), LABEL_TARGETS[label])
+            for text, label in samples
+            if label in LABEL_TARGETS and text
+        ]
+        rng = random.Random(seed)
+
+        for _ in range(epochs):
+            rng.shuffle(data)
+            for vector, target in data:
+                z = self.bias + sum(self.weights.get(k, 0.0) * v for k, v in vector.items())
+                prediction = math.tanh(z)
+                # d/dz (prediction - target)^2 / 2
+                gradient = (prediction - target) * (1 - prediction * prediction)
+
+                self.bias -= learning_rate * gradient
+                for key, value in vector.items():
+                    weight = self.weights.get(key, 0.0)
+                    weight -= learning_rate * (gradient * value + l2 * (weight - self.prior.get(key, 0.0)))
+                    self.weights[key] = weight
+
+        # Bobot token yang praktis nol tidak perlu disimpan
+        self.weights = {
+            k: w for k, w in self.weights.items()
+            if k in self.prior or abs(w) > 1e-4
+        }
+        return self
+
+    def evaluate(self, samples: Iterable[Tuple[str, str]]) -> float:
+        """Accuracy on (text, label) pairs"""
+        total = correct = 0
+        for text, label in samples:
+            total += 1
+            correct += self.analyze(text)['sentiment'] == label
+        return correct / total if total else 0.0
+
+    # ==============================
+    # Persistence
+    # ==============================
+    def save(self, path: str = None):
+        path = path or default_model_path()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'bias': self.bias, 'weights': self.weights}, f)
+
+    @classmethod
+    def load(cls, path: str = None) -> 'LocalSentimentScorer':
+        path = path or default_model_path()
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(weights=data['weights'], bias=data['bias'])
+
+
+_scorer = None
+_scorer_mtime = None
+_scorer_lock = threading.Lock()
+
+
+def get_local_scorer() -> LocalSentimentScorer:
+    """
+    Trained model from LOCAL_MODEL_PATH (reloaded when the file changes);
+    the lexicon-prior model when nothing has been trained yet
+    """
+    global _scorer, _scorer_mtime
+
+    path = default_model_path()
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        mtime = None
+
+    with _scorer_lock:
+        if _scorer is None or mtime != _scorer_mtime:
+            if mtime is None:
+                _scorer = LocalSentimentScorer()
+            else:
+                try:
+                    _scorer = LocalSentimentScorer.load(path)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.error(f"Cannot load local sentiment model {path}: {str(e)}")
+                    _scorer = LocalSentimentScorer()
+            _scorer_mtime = mtime
+        return _scorer
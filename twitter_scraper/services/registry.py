@@ -0,0 +1,74 @@
+"""
+Analyzer Registry
+
+Instance analyzer/scraper dibuat sekali per proses worker dan dipakai
+bersama oleh semua request (thread-safe). Di-warm-up saat startup lewat
+TwitterScraperConfig.ready() jika SENTIMENT_CONFIG['WARM_START'] aktif
+(diaktifkan oleh wsgi.py / asgi.py, tidak untuk management command).
+"""
+
+from typing import Callable, Dict
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+_instances: Dict = {}
+# Reentrant: building an analyzer asks the registry for the shared VADER
+_lock = threading.RLock()
+
+
+def _get(key, factory: Callable):
+    instance = _instances.get(key)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(key)
+            if instance is None:
+                instance = factory()
+                _instances[key] = instance
+    return instance
+
+
+def get_vader():
+    """Shared VADER SentimentIntensityAnalyzer (lexicon loaded once), None if not installed"""
+    def build():
+        try:
+            from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+        except ImportError:
+            return False
+        return SentimentIntensityAnalyzer()
+
+    # False marks "not installed" so the import is not retried every call
+    return _get('vader', build) or None
+
+
+def get_sentiment_analyzer(method: str = 'auto', language: str = 'auto'):
+    """Shared SentimentAnalyzer for this method/language"""
+    from .sentiment_analyzer import SentimentAnalyzer
+    return _get(('sentiment', method, language), lambda: SentimentAnalyzer(method=method, language=language))
+
+
+def get_scraper():
+    """Shared TwitterScraper (one API client per process)"""
+    from .scraper import TwitterScraper
+    return _get('scraper', TwitterScraper)
+
+
+def get_async_scraper():
+    """Shared AsyncTwitterScraper (ASGI views)"""
+    from .async_scraper import AsyncTwitterScraper
+    return _get('async_scraper', AsyncTwitterScraper)
+
+
+def warm_up():
+    """Build the instances used by the API before the first request"""
+    get_vader()
+    get_sentiment_analyzer('auto', 'auto')
+    get_scraper()
+    logger.info("Sentiment analyzers warmed up")
+
+
+def reset():
+    """Drop every shared instance (tests, settings changes)"""
+    with _lock:
+        _instances.clear()
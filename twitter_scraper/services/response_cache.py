@@ -0,0 +1,244 @@
+"""
+Account Analysis Cache
+
+Response analyze-account di-cache lewat Django cache framework
+(SCRAPING_CONFIG CACHE_ALIAS), di-key dengan username + max_tweets + days
++ versi analyzer.
+
+- Fresh selama CACHE_TIMEOUT detik
+- Setelah itu masih dikirim (stale) sampai CACHE_STALE_TIMEOUT detik
+  berikutnya, sementara refresh jalan di background
+- Request identik yang bersamaan menunggu satu fetch yang sama
+  (single-flight per proses; refresh background juga dikunci lintas
+  proses lewat cache.add)
+- Varian async (aget_or_compute) untuk view ASGI: single-flight dan
+  refresh background sebagai asyncio task di event loop yang sama
+"""
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+HIT = 'HIT'
+STALE = 'STALE'
+MISS = 'MISS'
+
+
+def get_scraping_config(key: str, default=None):
+    """Read a value from settings.SCRAPING_CONFIG"""
+    if not settings.configured:
+        return default
+    return getattr(settings, 'SCRAPING_CONFIG', {}).get(key, default)
+
+
+class AccountAnalysisCache:
+    """Stale-while-revalidate, single-flight cache of computed responses"""
+
+    PREFIX = 'analyze_account'
+
+    def __init__(self, alias: str = None, timeout: int = None, stale_timeout: int = None):
+        self.alias = alias or get_scraping_config('CACHE_ALIAS', 'default')
+        self.timeout = timeout if timeout is not None else get_scraping_config('CACHE_TIMEOUT', 3600)
+        self.stale_timeout = (
+            stale_timeout if stale_timeout is not None
+            else get_scraping_config('CACHE_STALE_TIMEOUT', 3600)
+        )
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        # (event loop, key) -> asyncio.Future of the running async compute
+        self._ainflight: Dict[tuple, asyncio.Future] = {}
+        self._tasks = set()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.timeout)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, username: str, max_tweets, days, analyzer_version: str) -> str:
+        return f"{self.PREFIX}:{username.lower()}:{int(max_tweets)}:{int(days)}:{analyzer_version}"
+
+    def peek(self, key: str) -> Tuple[Optional[Dict], str]:
+        """
+        Cached value without computing
+
+        Returns:
+            (value, HIT / STALE) or (None, MISS)
+        """
+        entry = self.cache.get(key) if self.enabled else None
+        if entry is None:
+            return None, MISS
+        state = HIT if time.time() - entry['stored_at'] < self.timeout else STALE
+        return entry['value'], state
+
+    def get_or_compute(self, key: str, compute: Callable[[], Optional[Dict]]) -> Tuple[Optional[Dict], str]:
+        """
+        Cached value, or compute() (None results are not cached)
+
+        Returns:
+            (value, HIT / STALE / MISS)
+        """
+        if not self.enabled:
+            return compute(), MISS
+
+        value, state = self.peek(key)
+        if state == STALE:
+            self.revalidate(key, compute)
+        if state != MISS:
+            return value, state
+
+        return self._single_flight(key, compute), MISS
+
+    def _single_flight(self, key: str, compute: Callable):
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            # Identical request already fetching: share its result
+            return future.result()
+
+        try:
+            value = compute()
+            if value is not None:
+                self.store(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def store(self, key: str, value: Dict):
+        """Cache a computed value (fresh from now)"""
+        if not self.enabled:
+            return
+        self.cache.set(
+            key,
+            {'value': value, 'stored_at': time.time()},
+            timeout=self.timeout + self.stale_timeout,
+        )
+
+    def revalidate(self, key: str, compute: Callable):
+        """Recompute ``key`` in a background thread (at most one at a time)"""
+        with self._lock:
+            if key in self._inflight:
+                return
+        # One refresh across threads and worker processes
+        if not self._claim_refresh(key):
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='analysis-refresh')
+            executor = self._executor
+
+        def refresh():
+            try:
+                self._single_flight(key, compute)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {str(e)}")
+            finally:
+                self.cache.delete(self._refresh_key(key))
+                connections.close_all()
+
+        executor.submit(refresh)
+
+    def _refresh_key(self, key: str) -> str:
+        return f"{key}:refreshing"
+
+    def _claim_refresh(self, key: str) -> bool:
+        return self.cache.add(self._refresh_key(key), 1, timeout=max(60, self.timeout // 10))
+
+    # ==============================
+    # Async (ASGI views)
+    # ==============================
+    async def aget_or_compute(
+        self,
+        key: str,
+        acompute: Callable[[], Awaitable[Optional[Dict]]]
+    ) -> Tuple[Optional[Dict], str]:
+        """Async get_or_compute(); ``acompute`` is a coroutine function"""
+        if not self.enabled:
+            return await acompute(), MISS
+
+        value, state = await sync_to_async(self.peek)(key)
+        if state == STALE:
+            await self.arevalidate(key, acompute)
+        if state != MISS:
+            return value, state
+
+        return await self._asingle_flight(key, acompute), MISS
+
+    async def _asingle_flight(self, key: str, acompute: Callable):
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+
+        future = self._ainflight.get(flight)
+        if future is not None:
+            # Identical request already fetching on this loop: share its result
+            return await asyncio.shield(future)
+
+        future = loop.create_future()
+        self._ainflight[flight] = future
+        try:
+            value = await acompute()
+            if value is not None:
+                await sync_to_async(self.store)(key, value)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: no "never retrieved" warning without waiters
+            raise
+        finally:
+            self._ainflight.pop(flight, None)
+
+    async def arevalidate(self, key: str, acompute: Callable):
+        """
+        Recompute ``key`` in an asyncio task on the running loop (ASGI:
+        outlives the request; under WSGI it ends with the request)
+        """
+        if (asyncio.get_running_loop(), key) in self._ainflight:
+            return
+        if not await sync_to_async(self._claim_refresh)(key):
+            return
+
+        async def refresh():
+            try:
+                await self._asingle_flight(key, acompute)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key} failed: {str(e)}")
+            finally:
+                await sync_to_async(self.cache.delete)(self._refresh_key(key))
+
+        task = asyncio.create_task(refresh())
+        # Keep a reference until done (the loop only holds weak ones)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def clear(self, key: str):
+        self.cache.delete(key)
+
+
+analysis_cache = AccountAnalysisCache()
@@ -2,27 +2,59 @@
 Twitter/X Scraper Service
 
 Menggunakan Twitter API v2 dengan Tweepy untuk scraping tweets.
+- Username -> user id di-cache (memori + tabel twitter_account)
+- Pagination (next_token) sampai max_tweets, start_time dari days
+- Checkpoint since_id per akun: request berikutnya hanya mengambil tweet
+  baru, sisanya dibaca dari tabel tweet
 """
 
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import List, Dict, Optional
 import logging
 import os
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+TWEET_FIELDS = ['created_at', 'public_metrics', 'text']
+
+# API: max_results per page must be 5..100
+PAGE_MIN = 5
+PAGE_MAX = 100
+
+# search_recent_tweets: 10..100 per page, only the last 7 days
+SEARCH_PAGE_MIN = 10
+SEARCH_MAX_DAYS = 7
+
 
 class TwitterScraper:
     """Service untuk scraping tweets dari Twitter/X"""
     
-    def __init__(self):
-        self.max_tweets = 100
-        self.default_days = 7
+    def __init__(self, client=None):
+        """
+        Args:
+            client: Optional tweepy.Client-compatible client (e.g.
+                StubTwitterClient for tests); default built from env credentials
+        """
+        config = getattr(settings, 'SCRAPING_CONFIG', {}) if settings.configured else {}
+        self.max_tweets = config.get('MAX_TWEETS_PER_REQUEST', 100)
+        self.default_days = config.get('DEFAULT_DAYS', 7)
         
-        # Try to initialize Tweepy if credentials available
-        self.use_api = False
-        self.tweepy_client = None
+        # username (lowercase) -> (user_id, username, display name)
+        self._users: Dict[str, tuple] = {}
+        self._users_lock = threading.Lock()
         
+        # Try to initialize Tweepy if credentials available
+        self.tweepy_client = client if client is not None else self._build_client()
+        self.use_api = self.tweepy_client is not None
+    
+    def _build_client(self):
+        """tweepy.Client from the env credentials, None if unavailable"""
         try:
             api_key = os.getenv('TWITTER_API_KEY')
             api_secret = os.getenv('TWITTER_API_SECRET')
@@ -33,27 +65,26 @@ class TwitterScraper:
                 
                 # Twitter API v2 with Bearer Token (recommended)
                 if bearer_token:
-                    self.tweepy_client = tweepy.Client(bearer_token=bearer_token)
-                    self.use_api = True
                     logger.info("Using Twitter API v2 with Bearer Token")
-                else:
-                    # Try OAuth 1.0a
-                    self.tweepy_client = tweepy.Client(
-                        consumer_key=api_key,
-                        consumer_secret=api_secret
-                    )
-                    self.use_api = True
-                    logger.info("Using Twitter API v2 with OAuth 1.0a")
+                    return tweepy.Client(bearer_token=bearer_token)
+                
+                # Try OAuth 1.0a
+                logger.info("Using Twitter API v2 with OAuth 1.0a")
+                return tweepy.Client(
+                    consumer_key=api_key,
+                    consumer_secret=api_secret
+                )
                     
         except Exception as e:
             logger.warning(f"Failed to initialize Twitter API, will use snscrape: {str(e)}")
-            self.use_api = False
+        return None
     
     def scrape_by_username(
         self,
         username: str,
         days: int = None,
-        max_tweets: int = None
+        max_tweets: int = None,
+        incremental: bool = True
     ) -> List[Dict]:
         """
         Scrape tweets dari username tertentu
@@ -62,12 +93,14 @@ class TwitterScraper:
             username: Twitter username (tanpa @)
             days: Jumlah hari ke belakang
             max_tweets: Maksimum tweets yang akan di-scrape
+            incremental: Use the since_id checkpoint; only tweets newer than
+                the last fetch come from the API, older ones from the tweet table
             
         Returns:
-            List of tweet dictionaries
+            List of tweet dictionaries (newest first)
         """
         days = days or self.default_days
-        max_tweets = max_tweets or self.max_tweets
+        max_tweets = self._tweet_limit(max_tweets)
         
         # Remove @ if present
         username = username.lstrip('@')
@@ -76,65 +109,403 @@ class TwitterScraper:
         if not self.use_api or not self.tweepy_client:
             raise Exception("Twitter API is not configured. Please provide valid API credentials.")
         
-        return self._scrape_with_api(username, max_tweets)
+        return self._scrape_with_api(username, max_tweets, days, incremental)
+    
+    def _tweet_limit(self, max_tweets: Optional[int]) -> int:
+        """max_tweets, capped at SCRAPING_CONFIG['MAX_TWEETS_PER_REQUEST']"""
+        return min(max_tweets or self.max_tweets, self.max_tweets)
+    
+    # ==============================
+    # User lookup (cached)
+    # ==============================
+    def get_user(self, username: str) -> tuple:
+        """
+        (user_id, username, display name), looked up in memory, then in the
+        twitter_account table, then through the API
+        """
+        user = self._known_user(username)
+        if user is None:
+            user = self._remember_user(username, self.tweepy_client.get_user(username=username))
+        return user
+    
+    def _known_user(self, username: str) -> Optional[tuple]:
+        """Memory / twitter_account lookup, None if the API has to be asked"""
+        key = username.lower()
+        with self._users_lock:
+            if key in self._users:
+                return self._users[key]
+        
+        account = self._load_account(key)
+        if account is None:
+            return None
+        user = (account.user_id, account.username, account.display_name or account.username)
+        with self._users_lock:
+            self._users[key] = user
+        return user
+    
+    def _remember_user(self, username: str, response) -> tuple:
+        """get_user API response -> user tuple, stored in memory and twitter_account"""
+        if not response or not response.data:
+            raise Exception(f"User @{username} not found")
+        user = (str(response.data.id), response.data.username, response.data.name)
+        self._save_account(user)
+        with self._users_lock:
+            self._users[username.lower()] = user
+        return user
+    
+    def _load_account(self, key: str):
+        from ..models import TwitterAccount
+        try:
+            return TwitterAccount.objects.filter(username=key).first()
+        except DatabaseError as e:
+            logger.warning(f"twitter_account table unavailable: {str(e)}")
+            return None
+    
+    def _save_account(self, user: tuple, **checkpoint):
+        from ..models import TwitterAccount
+        user_id, user_name, display_name = user
+        try:
+            # Handles renamed accounts: the old username row is dropped
+            TwitterAccount.objects.filter(username=user_name.lower()).exclude(user_id=user_id).delete()
+            TwitterAccount.objects.update_or_create(
+                user_id=user_id,
+                defaults={'username': user_name.lower(), 'display_name': display_name, **checkpoint},
+            )
+        except DatabaseError as e:
+            logger.warning(f"Could not store Twitter account checkpoint: {str(e)}")
+    
+    # ==============================
+    # Fetching
+    # ==============================
+    @staticmethod
+    def _page_params(user_id, remaining, start_time, since_id, pagination_token) -> Dict:
+        """get_users_tweets() arguments of the next page"""
+        return dict(
+            id=user_id,
+            max_results=max(PAGE_MIN, min(remaining, PAGE_MAX)),
+            tweet_fields=TWEET_FIELDS,
+            exclude=['retweets', 'replies'],  # Optional: exclude RTs and replies
+            start_time=start_time,
+            since_id=since_id,
+            pagination_token=pagination_token,
+        )
+    
+    def _fetch_pages(
+        self,
+        user_id: str,
+        max_tweets: int,
+        start_time: Optional[datetime] = None,
+        since_id: Optional[str] = None
+    ) -> tuple:
+        """
+        Follow next_token until max_tweets or the last page
+        
+        Returns:
+            (tweets, exhausted) - exhausted is False when max_tweets cut the
+            pagination short (older matching tweets were not fetched)
+        """
+        tweets = []
+        pagination_token = None
+        
+        while True:
+            response = self.tweepy_client.get_users_tweets(
+                **self._page_params(user_id, max_tweets - len(tweets), start_time, since_id, pagination_token)
+            )
+            
+            page = list(response.data or [])
+            tweets.extend(page)
+            pagination_token = (response.meta or {}).get('next_token')
+            
+            if len(tweets) >= max_tweets:
+                return tweets[:max_tweets], pagination_token is None and len(tweets) == max_tweets
+            if not pagination_token or not page:
+                return tweets, True
+    
+    def _to_dict(self, tweet, user_name: str, user_display_name: str) -> Dict:
+        metrics = tweet.public_metrics or {}
+        return {
+            'tweet_id': str(tweet.id),
+            'username': user_name,
+            'user_display_name': user_display_name,
+            'text': tweet.text,
+            'created_at': tweet.created_at,
+            'likes_count': metrics.get('like_count', 0),
+            'retweets_count': metrics.get('retweet_count', 0),
+            'replies_count': metrics.get('reply_count', 0),
+            'url': f"https://x.com/{user_name}/status/{tweet.id}",
+        }
+    
+    def _stored_tweets(self, user_name: str, start_time: datetime, limit: int) -> List[Dict]:
+        from ..models import Tweet
+        rows = (
+            Tweet.objects
+            .filter(username__iexact=user_name, created_at__gte=start_time)
+            .order_by('-created_at')[:limit]
+        )
+        return [
+            {
+                'tweet_id': row.tweet_id,
+                'username': row.username,
+                'user_display_name': row.user_display_name,
+                'text': row.text,
+                'created_at': row.created_at,
+                'likes_count': row.likes_count,
+                'retweets_count': row.retweets_count,
+                'replies_count': row.replies_count,
+                'url': row.url,
+            }
+            for row in rows
+        ]
+    
+    def _checkpoint(self, user_name: str, start_time: datetime, incremental: bool) -> tuple:
+        """
+        (account, since_id) - since_id only if the stored range covers the
+        whole window; a wider window falls back to a full fetch (backfill)
+        """
+        account = self._load_account(user_name.lower()) if incremental else None
+        since_id = None
+        if account and account.since_id and account.covered_since and account.covered_since <= start_time:
+            since_id = account.since_id
+        return account, since_id
+    
+    def _finish(
+        self,
+        user: tuple,
+        account,
+        since_id: Optional[str],
+        fetched: List,
+        exhausted: bool,
+        start_time: datetime,
+        now: datetime,
+        max_tweets: int,
+        incremental: bool
+    ) -> List[Dict]:
+        """Store fetched tweets, move the checkpoint, return the tweets in the window"""
+        from .store import save_tweets
+        
+        user_id, user_name, user_display_name = user
+        new_tweets = [self._to_dict(t, user_name, user_display_name) for t in fetched]
+        
+        if not incremental:
+            logger.info(f"Successfully scraped {len(new_tweets)} tweets using Twitter API")
+            return new_tweets
+        
+        # Persist before moving the checkpoint
+        try:
+            if new_tweets:
+                save_tweets(new_tweets)
+            
+            newest = max([int(t['tweet_id']) for t in new_tweets] + ([int(since_id)] if since_id else []), default=None)
+            if exhausted:
+                covered_since = account.covered_since if since_id else start_time
+            else:
+                # max_tweets cut the fetch: only the fetched span is contiguous
+                covered_since = min(t['created_at'] for t in new_tweets)
+            
+            self._save_account(
+                user,
+                since_id=str(newest) if newest is not None else None,
+                covered_since=covered_since,
+                last_fetched_at=now,
+            )
+            
+            if since_id:
+                tweets = self._stored_tweets(user_name, start_time, max_tweets)
+            else:
+                tweets = new_tweets
+        except DatabaseError as e:
+            logger.warning(f"Tweet checkpoint unavailable: {str(e)}")
+            tweets = new_tweets
+        
+        if tweets:
+            logger.info(
+                f"Successfully scraped {len(new_tweets)} new tweets using Twitter API "
+                f"({len(tweets)} in window)"
+            )
+        else:
+            logger.warning(f"No tweets found for user @{user_name}")
+        return tweets
     
-    def _scrape_with_api(self, username: str, max_tweets: int) -> List[Dict]:
+    def _scrape_with_api(self, username: str, max_tweets: int, days: int = None, incremental: bool = True) -> List[Dict]:
         """
         Scrape tweets menggunakan Twitter API v2
         
         Args:
             username: Twitter username
             max_tweets: Maximum number of tweets
+            days: Only tweets from the last ``days`` days
+            incremental: See scrape_by_username()
             
         Returns:
             List of tweet dictionaries
         """
-        tweets = []
+        days = days or self.default_days
+        now = timezone.now()
+        start_time = now - timedelta(days=days)
         
         try:
-            # Get user ID first
-            user = self.tweepy_client.get_user(username=username)
-            if not user or not user.data:
-                raise Exception(f"User @{username} not found")
+            user = self.get_user(username)
+            logger.info(f"Found user: @{user[1]} (ID: {user[0]})")
             
-            user_id = user.data.id
-            user_name = user.data.username
-            user_display_name = user.data.name
-            
-            logger.info(f"Found user: @{user_name} (ID: {user_id})")
-            
-            # Get user tweets with tweet fields
-            response = self.tweepy_client.get_users_tweets(
-                id=user_id,
-                max_results=min(max_tweets, 100),  # API limit is 100 per request
-                tweet_fields=['created_at', 'public_metrics', 'text'],
-                exclude=['retweets', 'replies']  # Optional: exclude RTs and replies
+            account, since_id = self._checkpoint(user[1], start_time, incremental)
+            fetched, exhausted = self._fetch_pages(
+                user[0], max_tweets, start_time=start_time, since_id=since_id
+            )
+            return self._finish(
+                user, account, since_id, fetched, exhausted, start_time, now, max_tweets, incremental
             )
-            
-            if response.data:
-                for tweet in response.data:
-                    metrics = tweet.public_metrics
-                    
-                    tweet_data = {
-                        'tweet_id': str(tweet.id),
-                        'username': user_name,
-                        'user_display_name': user_display_name,
-                        'text': tweet.text,
-                        'created_at': tweet.created_at,
-                        'likes_count': metrics.get('like_count', 0),
-                        'retweets_count': metrics.get('retweet_count', 0),
-                        'replies_count': metrics.get('reply_count', 0),
-                        'url': f"https://x.com/{user_name}/status/{tweet.id}",
-                    }
-                    
-                    tweets.append(tweet_data)
-                
-                logger.info(f"Successfully scraped {len(tweets)} tweets using Twitter API")
-            else:
-                logger.warning(f"No tweets found for user @{username}")
-                
         except Exception as e:
             logger.error(f"Error scraping with Twitter API: {str(e)}")
             raise Exception(f"Failed to scrape tweets with Twitter API: {str(e)}")
+    
+    def search_recent(
+        self,
+        query: str,
+        days: int = None,
+        max_tweets: int = None,
+        since_id: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Recent search (keyword / hashtag), newest first
         
-        return tweets
+        Args:
+            query: Search query, e.g. "pln -is:retweet lang:id"
+            days: Jumlah hari ke belakang (max 7, API limit)
+            max_tweets: Maksimum tweets
+            since_id: Only tweets newer than this id
+            
+        Returns:
+            List of tweet dictionaries
+        """
+        if not self.use_api or not self.tweepy_client:
+            raise Exception("Twitter API is not configured. Please provide valid API credentials.")
+        
+        days = min(days or self.default_days, SEARCH_MAX_DAYS)
+        max_tweets = self._tweet_limit(max_tweets)
+        # start_time must be after now - 7 days at request time
+        start_time = timezone.now() - timedelta(days=days) + timedelta(minutes=1)
+        
+        tweets = []
+        pagination_token = None
+        while len(tweets) < max_tweets:
+            remaining = max_tweets - len(tweets)
+            response = self.tweepy_client.search_recent_tweets(
+                query=query,
+                max_results=max(SEARCH_PAGE_MIN, min(remaining, PAGE_MAX)),
+                tweet_fields=TWEET_FIELDS + ['author_id'],
+                expansions=['author_id'],
+                user_fields=['username', 'name'],
+                start_time=start_time,
+                since_id=since_id,
+                next_token=pagination_token,
+            )
+            
+            users = {
+                str(user.id): user
+                for user in ((response.includes or {}).get('users') or [])
+            }
+            page = list(response.data or [])
+            for tweet in page:
+                user = users.get(str(tweet.author_id))
+                user_name = user.username if user else str(tweet.author_id)
+                tweets.append(self._to_dict(tweet, user_name, user.name if user else user_name))
+            
+            pagination_token = (response.meta or {}).get('next_token')
+            if not pagination_token or not page:
+                break
+        
+        logger.info(f"Search '{query}' returned {len(tweets[:max_tweets])} tweets")
+        return tweets[:max_tweets]
+
+
+class StubTwitterClient:
+    """
+    Offline stand-in for tweepy.Client (get_user / get_users_tweets /
+    search_recent_tweets)
+    
+    Args:
+        users: {username: {'id': ..., 'name': ...}}
+        tweets: {user_id: [{'id', 'text', 'created_at', 'public_metrics'}]}
+    """
+    
+    def __init__(self, users: Dict[str, Dict] = None, tweets: Dict[str, List[Dict]] = None):
+        self.users = {name.lower(): dict(data, username=name) for name, data in (users or {}).items()}
+        self.tweets = tweets or {}
+        self.calls = []
+    
+    def get_user(self, username: str, **kwargs):
+        self.calls.append(('get_user', username))
+        data = self.users.get(username.lower())
+        return SimpleNamespace(
+            data=SimpleNamespace(id=data['id'], username=data['username'], name=data.get('name', data['username']))
+            if data else None
+        )
+    
+    def get_users_tweets(self, id, max_results=10, start_time=None, since_id=None, pagination_token=None, **kwargs):
+        self.calls.append(('get_users_tweets', id, since_id, pagination_token))
+        
+        # Newest first, like the API
+        tweets = sorted(self.tweets.get(str(id), []), key=lambda t: int(t['id']), reverse=True)
+        if start_time is not None:
+            tweets = [t for t in tweets if t['created_at'] >= start_time]
+        if since_id is not None:
+            tweets = [t for t in tweets if int(t['id']) > int(since_id)]
+        
+        offset = int(pagination_token or 0)
+        page = tweets[offset:offset + max_results]
+        next_offset = offset + max_results
+        
+        meta = {'result_count': len(page)}
+        if next_offset < len(tweets):
+            meta['next_token'] = str(next_offset)
+        
+        data = [
+            SimpleNamespace(
+                id=t['id'],
+                text=t['text'],
+                created_at=t['created_at'],
+                public_metrics=t.get('public_metrics', {}),
+            )
+            for t in page
+        ]
+        return SimpleNamespace(data=data or None, meta=meta)
+    
+    def search_recent_tweets(self, query, max_results=10, start_time=None, since_id=None, next_token=None, **kwargs):
+        """Case-insensitive substring match of query over all stub tweets"""
+        self.calls.append(('search_recent_tweets', query, since_id, next_token))
+        
+        authors = {str(data['id']): data for data in self.users.values()}
+        matches = [
+            dict(t, author_id=user_id)
+            for user_id, tweets in self.tweets.items()
+            for t in tweets
+            if query.lower() in t['text'].lower()
+        ]
+        matches.sort(key=lambda t: int(t['id']), reverse=True)
+        if start_time is not None:
+            matches = [t for t in matches if t['created_at'] >= start_time]
+        if since_id is not None:
+            matches = [t for t in matches if int(t['id']) > int(since_id)]
+        
+        offset = int(next_token or 0)
+        page = matches[offset:offset + max_results]
+        meta = {'result_count': len(page)}
+        if offset + max_results < len(matches):
+            meta['next_token'] = str(offset + max_results)
+        
+        data = [
+            SimpleNamespace(
+                id=t['id'],
+                text=t['text'],
+                created_at=t['created_at'],
+                public_metrics=t.get('public_metrics', {}),
+                author_id=t['author_id'],
+            )
+            for t in page
+        ]
+        users = [
+            SimpleNamespace(id=authors[uid]['id'], username=authors[uid]['username'],
+                            name=authors[uid].get('name', authors[uid]['username']))
+            for uid in {t['author_id'] for t in page} if uid in authors
+        ]
+        return SimpleNamespace(data=data or None, includes={'users': users}, meta=meta)
@@ -6,12 +6,15 @@ Multi-language sentiment analyzer:
 - English: VADER + TextBlob
 """
 
-from typing import Dict
+from typing import Dict, List, Tuple
+import hashlib
 import logging
 import re
 
 # Import Indonesian analyzer
 from .indonesian_sentiment import HybridIndonesianSentimentAnalyzer
+from .registry import get_vader
+from .text import Document, preprocess, tokenize
 
 # Import English analyzers
 try:
@@ -28,6 +31,71 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Bump when the scoring code changes in a way the lexicon/model
+# fingerprints do not capture; stored results are then recomputed
+ANALYZER_VERSION = 1
+
+# Common Indonesian words and patterns
+INDONESIAN_INDICATORS = frozenset([
+    # Common particles & conjunctions
+    'yang', 'adalah', 'dengan', 'untuk', 'tidak', 'ini', 'itu',
+    'dari', 'di', 'ke', 'pada', 'atau', 'dan', 'juga', 'akan',
+    'telah', 'sudah', 'belum', 'sangat', 'banget', 'sekali',
+    'saja', 'hanya', 'bisa', 'dapat', 'harus', 'mau', 'ingin',
+    # Company/location specific
+    'indonesia', 'perusahaan', 'karyawan', 'lapangan', 'kerja',
+    # Verbs
+    'membuka', 'menurun', 'meningkat', 'berkembang',
+    # Time markers
+    'hari', 'bulan', 'tahun', 'minggu',
+    # Common words
+    'baru', 'lama', 'banyak', 'sedikit', 'besar', 'kecil',
+    'baik', 'buruk', 'bagus', 'jelek', 'rugi', 'untung',
+    'naik', 'turun', 'bubar', 'tutup', 'buka',
+    # Prefix indicators (me-, ber-, pe-, ter-)
+    'kinerja', 'harga', 'saham', 'phk', 'cuaca', 'cerah'
+])
+
+# Common English function words; only used for the confidence of 'en'
+ENGLISH_INDICATORS = frozenset([
+    'the', 'a', 'an', 'is', 'are', 'was', 'were', 'be', 'been', 'am',
+    'and', 'or', 'but', 'not', 'no', 'of', 'to', 'in', 'on', 'at', 'for',
+    'with', 'from', 'by', 'about', 'this', 'that', 'these', 'those', 'it',
+    'i', 'you', 'he', 'she', 'we', 'they', 'my', 'your', 'our', 'their',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'can',
+    'could', 'should', 'very', 'so', 'just', 'what', 'who', 'how', 'why',
+])
+
+# Indonesian prefixes (me-, ber-, pe-, ter-, ke-, se-), matched per token
+_PREFIX_RE = re.compile(r'(?:me|ber|pe|ter|ke|se)[a-z]{3,}')
+
+
+def detect_language(tokens: List[str]) -> Tuple[str, float]:
+    """
+    Language of a tokenized text (see text.tokenize)
+    
+    Any Indonesian indicator word or prefixed word makes the text 'id',
+    otherwise it is 'en'.
+    
+    Returns:
+        (language, confidence) - language 'id' or 'en'; confidence is the
+        share of tokens that support the label (Indonesian indicators for
+        'id', English function words for 'en'; 0.0 for no tokens)
+    """
+    if not tokens:
+        return 'en', 0.0  # default to English
+    
+    evidence = sum(
+        1 for token in tokens
+        if token in INDONESIAN_INDICATORS or _PREFIX_RE.fullmatch(token)
+    )
+    
+    if evidence:
+        return 'id', round(evidence / len(tokens), 4)
+    
+    english = sum(1 for token in tokens if token in ENGLISH_INDICATORS)
+    return 'en', round(english / len(tokens), 4)
+
 
 class SentimentAnalyzer:
     """
@@ -35,85 +103,61 @@ class SentimentAnalyzer:
     Auto-detect language and use appropriate method
     """
     
-    def __init__(self, method: str = 'auto', language: str = 'auto'):
+    def __init__(self, method: str = 'auto', language: str = 'auto', translator_factory=None):
         """
         Initialize sentiment analyzer
         
         Args:
-            method: 'auto', 'lexicon', 'hybrid', 'vader', 'textblob'
+            method: 'auto', 'lexicon', 'hybrid', 'local', 'vader', 'textblob'
             language: 'auto', 'id' (Indonesian), 'en' (English)
+            translator_factory: Translator used by the hybrid path
+                (default GoogleTranslator, StubTranslator for tests)
         """
         self.method = method
         self.language = language
         
         # Initialize Indonesian analyzer
         self.indonesian_analyzer = HybridIndonesianSentimentAnalyzer(
-            method='hybrid' if method == 'auto' else method
+            method='hybrid' if method == 'auto' else method,
+            translator_factory=translator_factory,
         )
         
         # Initialize English analyzers
         if VADER_AVAILABLE and method in ['vader', 'both', 'auto']:
-            self.vader_analyzer = SentimentIntensityAnalyzer()
+            self.vader_analyzer = get_vader()
         else:
             self.vader_analyzer = None
     
+    @property
+    def version(self) -> str:
+        """
+        Identifies everything that affects a score (code, method, lexicon,
+        local model). Persisted results with another version are stale.
+        """
+        fingerprint = f"{ANALYZER_VERSION}:{self.method}:{self.language}:{self.indonesian_analyzer.version}"
+        return hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+    
     def _detect_language(self, text: str) -> str:
         """
         Simple language detection
         Returns 'id' for Indonesian, 'en' for English
         """
-        # Common Indonesian words and patterns
-        indonesian_indicators = [
-            # Common particles & conjunctions
-            'yang', 'adalah', 'dengan', 'untuk', 'tidak', 'ini', 'itu',
-            'dari', 'di', 'ke', 'pada', 'atau', 'dan', 'juga', 'akan',
-            'telah', 'sudah', 'belum', 'sangat', 'banget', 'sekali',
-            'saja', 'hanya', 'bisa', 'dapat', 'harus', 'mau', 'ingin',
-            # Company/location specific
-            'indonesia', 'perusahaan', 'karyawan', 'lapangan', 'kerja',
-            # Verbs
-            'membuka', 'menurun', 'meningkat', 'berkembang',
-            # Time markers
-            'hari', 'bulan', 'tahun', 'minggu',
-            # Common words
-            'baru', 'lama', 'banyak', 'sedikit', 'besar', 'kecil',
-            'baik', 'buruk', 'bagus', 'jelek', 'rugi', 'untung',
-            'naik', 'turun', 'bubar', 'tutup', 'buka',
-            # Prefix indicators (me-, ber-, pe-, ter-)
-            'kinerja', 'harga', 'saham', 'phk', 'cuaca', 'cerah'
-        ]
-        
-        text_lower = text.lower()
-        words = re.findall(r'\w+', text_lower)
-        
-        if not words:
-            return 'en'  # default to English
-        
-        # Count Indonesian indicators
-        id_count = sum(1 for word in words if word in indonesian_indicators)
-        
-        # Check for Indonesian prefixes (me-, ber-, pe-, ter-, ke-, se-)
-        prefix_pattern = r'\b(me|ber|pe|ter|ke|se)[a-z]{3,}\b'
-        prefix_matches = len(re.findall(prefix_pattern, text_lower))
-        
-        # If any Indonesian indicators found OR has Indonesian prefixes, treat as Indonesian
-        # Lower threshold to 5% or at least 1 indicator
-        if len(words) > 0 and ((id_count / len(words)) > 0.05 or id_count >= 1 or prefix_matches >= 1):
-            return 'id'
-        
-        return 'en'
+        return detect_language(tokenize(text))[0]
     
     def analyze(self, text: str) -> Dict:
         """
         Analyze sentiment dari text with auto language detection
         
         Args:
-            text: Text yang akan dianalisis
+            text: Text yang akan dianalisis (str atau Document dari text.preprocess)
             
         Returns:
             Dictionary dengan hasil sentiment analysis
         """
-        if not text or not text.strip():
+        # Preprocessed once for detection and the Indonesian analyzers
+        document = self._prepare(text)
+        
+        if document.is_empty:
             return {
                 'sentiment': 'neutral',
                 'score': 0.0,
@@ -125,33 +169,43 @@ class SentimentAnalyzer:
                 'language': 'unknown'
             }
         
-        # Detect language if auto
-        detected_lang = self.language
-        if self.language == 'auto':
-            detected_lang = self._detect_language(text)
-        
         # Use appropriate analyzer based on language
-        if detected_lang == 'id':
-            result = self.indonesian_analyzer.analyze(text)
+        if document.language == 'id':
+            result = self.indonesian_analyzer.analyze(document.text, document=document)
             result['language'] = 'id'
-            return result
         else:
-            # Use English analyzers
-            if self.method == 'vader' and self.vader_analyzer:
-                result = self._analyze_vader(text)
-            elif self.method == 'textblob' and TEXTBLOB_AVAILABLE:
-                result = self._analyze_textblob(text)
-            else:  # auto or both
-                if self.vader_analyzer:
-                    result = self._analyze_vader(text)
-                elif TEXTBLOB_AVAILABLE:
-                    result = self._analyze_textblob(text)
-                else:
-                    # Fallback to Indonesian analyzer
-                    result = self.indonesian_analyzer.analyze(text)
-            
+            # VADER keeps its own tokenization (needs case and punctuation)
+            result = self._analyze_english(document.text)
             result['language'] = 'en'
-            return result
+        
+        result['language_confidence'] = document.language_confidence
+        return result
+    
+    def _prepare(self, text) -> Document:
+        """Preprocess (unless already done) and detect the language"""
+        document = preprocess(text)
+        if document.language is None:
+            if self.language == 'auto':
+                document.language, document.language_confidence = detect_language(document.tokens)
+            else:
+                document.language, document.language_confidence = self.language, 1.0
+        return document
+    
+    def _analyze_english(self, text: str) -> Dict:
+        """English analyzers: VADER / TextBlob, Indonesian lexicon as last resort"""
+        if self.method == 'vader' and self.vader_analyzer:
+            return self._analyze_vader(text)
+        if self.method == 'textblob' and TEXTBLOB_AVAILABLE:
+            return self._analyze_textblob(text)
+        
+        # auto or both
+        if self.vader_analyzer:
+            return self._analyze_vader(text)
+        if TEXTBLOB_AVAILABLE:
+            return self._analyze_textblob(text)
+        
+        # Fallback to Indonesian analyzer
+        return self.indonesian_analyzer.analyze(text)
     
     def _analyze_vader(self, text: str) -> Dict:
         """
@@ -274,17 +328,52 @@ class SentimentAnalyzer:
         """
         Analyze sentiment untuk multiple texts
         
+        Texts are grouped by language first: the Indonesian group is scored
+        in one vectorized lexicon pass, only the English group goes through
+        VADER/TextBlob.
+        
         Args:
-            texts: List of texts to analyze
+            texts: List of texts (str or Document) to analyze
             
         Returns:
-            List of sentiment analysis results
+            List of sentiment analysis results (same order as texts)
         """
-        results = []
+        results = [None] * len(texts)
+        indonesian = []
+        documents = {}
+        
+        for i, text in enumerate(texts):
+            document = self._prepare(text)
+            if document.is_empty:
+                results[i] = {
+                    'sentiment': 'neutral',
+                    'score': 0.0,
+                    'details': {
+                        'positive': 0.0,
+                        'neutral': 1.0,
+                        'negative': 0.0
+                    },
+                    'language': 'unknown'
+                }
+                continue
+            
+            if document.language == 'id':
+                indonesian.append(i)
+                documents[i] = document
+            else:
+                results[i] = self._analyze_english(document.text)
+                results[i]['language'] = 'en'
+                results[i]['language_confidence'] = document.language_confidence
         
-        for text in texts:
-            result = self.analyze(text)
-            results.append(result)
+        if indonesian:
+            batch = self.indonesian_analyzer.batch_analyze(
+                [documents[i].text for i in indonesian],
+                documents=[documents[i] for i in indonesian],
+            )
+            for i, result in zip(indonesian, batch):
+                result['language'] = 'id'
+                result['language_confidence'] = documents[i].language_confidence
+                results[i] = result
         
         return results
     
@@ -0,0 +1,168 @@
+"""
+Tweet Store
+
+Tweet dan hasil sentiment disimpan di database. Hasil di-key dengan
+tweet_id + versi analyzer (SentimentAnalyzer.version), sehingga request
+berikutnya hanya menganalisis tweet baru, dan semuanya dihitung ulang
+jika lexicon/model berubah. Hasil fallback lexicon (translator tidak
+tersedia) juga disimpan, dan dianalisis ulang setelah
+SENTIMENT_CONFIG DEGRADED_RETRY_INTERVAL.
+"""
+
+from datetime import timedelta
+from typing import Dict, List
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+from ..models import Tweet, TweetSentiment
+from .aggregation import update_account_rollups
+
+logger = logging.getLogger(__name__)
+
+# Batas parameter per query (SQL Server: 2100)
+_CHUNK = 1000
+
+TWEET_FIELDS = [
+    'username', 'user_display_name', 'text', 'created_at',
+    'likes_count', 'retweets_count', 'replies_count', 'url',
+]
+
+
+def _chunks(items: List, size: int = _CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def save_tweets(tweets_data: List[Dict]):
+    """Insert new tweets, refresh text/metrics of known ones"""
+    tweets = {}
+    for data in tweets_data:
+        tweets[data['tweet_id']] = Tweet(
+            tweet_id=data['tweet_id'],
+            **{field: data.get(field) for field in TWEET_FIELDS if data.get(field) is not None}
+        )
+
+    ids = list(tweets)
+    existing = set()
+    for chunk in _chunks(ids):
+        existing.update(Tweet.objects.filter(tweet_id__in=chunk).values_list('tweet_id', flat=True))
+
+    with transaction.atomic():
+        Tweet.objects.bulk_create(
+            [tweet for tweet_id, tweet in tweets.items() if tweet_id not in existing],
+            batch_size=_CHUNK,
+        )
+        if existing:
+            Tweet.objects.bulk_update(
+                [tweets[tweet_id] for tweet_id in existing],
+                TWEET_FIELDS,
+                batch_size=_CHUNK,
+            )
+
+
+def _is_degraded(analyzer, result: Dict) -> bool:
+    """Lexicon fallback where a translation was expected: retried later"""
+    return (
+        result.get('language') == 'id'
+        and result.get('method') == 'lexicon'
+        and analyzer.indonesian_analyzer.method in ('hybrid', 'translation')
+    )
+
+
+def score_tweets(tweets_data: List[Dict], analyzer) -> List[Dict]:
+    """
+    Sentiment per tweet, reusing stored results of the same analyzer version
+
+    Args:
+        tweets_data: Tweets as returned by TwitterScraper
+        analyzer: SentimentAnalyzer
+
+    Returns:
+        Results in the order of tweets_data (analyze() format)
+    """
+    if not tweets_data:
+        return []
+
+    version = analyzer.version
+    ids = [data['tweet_id'] for data in tweets_data]
+    retry_interval = getattr(settings, 'SENTIMENT_CONFIG', {}).get('DEGRADED_RETRY_INTERVAL', 300)
+    now = timezone.now()
+
+    try:
+        save_tweets(tweets_data)
+
+        stored = {}
+        retry = {}
+        for chunk in _chunks(ids):
+            rows = TweetSentiment.objects.filter(tweet_id__in=chunk, analyzer_version=version)
+            for row in rows:
+                result = {
+                    'sentiment': row.sentiment,
+                    'score': row.score,
+                    'details': row.details,
+                    'language': row.language,
+                    'method': row.method,
+                }
+                # Degraded rows are served until the retry interval has passed
+                if _is_degraded(analyzer, result) and row.analyzed_at <= now - timedelta(seconds=retry_interval):
+                    retry[row.tweet_id] = row
+                else:
+                    stored[row.tweet_id] = result
+    except DatabaseError as e:
+        logger.warning(f"Tweet store unavailable, scoring every tweet: {str(e)}")
+        return analyzer.batch_analyze([data.get('text', '') for data in tweets_data])
+
+    # Only unseen tweets, degraded results due for a retry (or new analyzer
+    # versions) are scored
+    missing = [data for data in tweets_data if data['tweet_id'] not in stored]
+    fresh = analyzer.batch_analyze([data.get('text', '') for data in missing]) if missing else []
+
+    new_rows = []
+    retried_rows = []
+    for data, result in zip(missing, fresh):
+        stored[data['tweet_id']] = result
+        row = retry.get(data['tweet_id'])
+        if row is None:
+            row = TweetSentiment(tweet_id=data['tweet_id'], analyzer_version=version)
+            new_rows.append(row)
+        else:
+            row.analyzed_at = now
+            retried_rows.append(row)
+        row.sentiment = result['sentiment']
+        row.score = result['score']
+        row.language = result.get('language')
+        row.method = result.get('method')
+        row.details = result.get('details', {})
+
+    if missing:
+        try:
+            with transaction.atomic():
+                TweetSentiment.objects.bulk_create(new_rows, batch_size=_CHUNK, ignore_conflicts=True)
+                TweetSentiment.objects.bulk_update(
+                    retried_rows,
+                    ['sentiment', 'score', 'language', 'method', 'details', 'analyzed_at'],
+                    batch_size=_CHUNK,
+                )
+            # Only the hour/day/week buckets of the new results are recomputed
+            update_account_rollups(missing, version)
+        except DatabaseError as e:
+            logger.warning(f"Could not store tweet sentiments: {str(e)}")
+
+    logger.info(
+        f"Scored {len(missing)} tweets ({len(retried_rows)} degraded retries), "
+        f"reused {len(ids) - len(missing)} stored results"
+    )
+    return [stored[tweet_id] for tweet_id in ids]
+
+
+def iter_scored_tweets(tweets_data: List[Dict], analyzer, chunk_size: int = 20):
+    """
+    score_tweets() in chunks, yielding (tweet, result) as soon as each
+    chunk is scored (streaming responses)
+    """
+    for chunk in _chunks(tweets_data, chunk_size):
+        for tweet, result in zip(chunk, score_tweets(chunk, analyzer)):
+            yield tweet, result
@@ -0,0 +1,103 @@
+"""
+Account Summary
+
+Agregasi sentiment per akun (distribusi, rata-rata skor, kesimpulan),
+dihitung incremental per tweet sehingga bisa dipakai untuk response biasa
+maupun streaming tanpa menyimpan semua hasil di memori.
+"""
+
+from typing import Dict
+
+from django.utils import timezone
+
+
+def tweet_result(tweet: Dict, sentiment_result: Dict) -> Dict:
+    """Per-tweet item of the analyze-account response"""
+    details = sentiment_result.get('details', {})
+    return {
+        'tweet_id': tweet.get('tweet_id'),
+        'text': tweet.get('text', ''),
+        'created_at': tweet.get('created_at'),
+        'likes_count': tweet.get('likes_count', 0),
+        'retweets_count': tweet.get('retweets_count', 0),
+        'replies_count': tweet.get('replies_count', 0),
+        'url': tweet.get('url', ''),
+        'sentiment': sentiment_result['sentiment'],
+        'score': round(sentiment_result['score'], 3),
+        'language': sentiment_result.get('language', 'unknown'),
+        'details': {
+            'positive': round(details.get('positive', 0), 3),
+            'neutral': round(details.get('neutral', 0), 3),
+            'negative': round(details.get('negative', 0), 3)
+        }
+    }
+
+
+class SentimentSummary:
+    """Running counts and score total of one account"""
+
+    def __init__(self, username: str):
+        self.username = username
+        self.positive_count = 0
+        self.neutral_count = 0
+        self.negative_count = 0
+        self.total_score = 0
+
+    @property
+    def total_tweets(self) -> int:
+        return self.positive_count + self.neutral_count + self.negative_count
+
+    def add(self, tweet: Dict, sentiment_result: Dict) -> Dict:
+        """Count one scored tweet; returns its response item"""
+        sentiment = sentiment_result['sentiment']
+        if sentiment == 'positive':
+            self.positive_count += 1
+        elif sentiment == 'negative':
+            self.negative_count += 1
+        else:
+            self.neutral_count += 1
+
+        self.total_score += sentiment_result['score']
+        return tweet_result(tweet, sentiment_result)
+
+    def to_dict(self) -> Dict:
+        """Aggregates and conclusion (analyze-account response without 'tweets')"""
+        total_tweets = self.total_tweets
+        average_score = self.total_score / total_tweets if total_tweets > 0 else 0
+
+        def percentage(count):
+            return round(count / total_tweets * 100, 2) if total_tweets > 0 else 0
+
+        username = self.username
+        if average_score > 0.2:
+            overall_sentiment = 'POSITIVE'
+            conclusion = f"Account @{username} cenderung posting tweets dengan sentimen positif"
+        elif average_score < -0.2:
+            overall_sentiment = 'NEGATIVE'
+            conclusion = f"Account @{username} cenderung posting tweets dengan sentimen negatif"
+        else:
+            overall_sentiment = 'NEUTRAL'
+            conclusion = f"Account @{username} cenderung posting tweets dengan sentimen netral/seimbang"
+
+        return {
+            'username': username,
+            'analyzed_at': timezone.now().isoformat(),
+            'total_tweets': total_tweets,
+            'sentiment_distribution': {
+                'positive': {
+                    'count': self.positive_count,
+                    'percentage': percentage(self.positive_count)
+                },
+                'neutral': {
+                    'count': self.neutral_count,
+                    'percentage': percentage(self.neutral_count)
+                },
+                'negative': {
+                    'count': self.negative_count,
+                    'percentage': percentage(self.negative_count)
+                }
+            },
+            'average_score': round(average_score, 3),
+            'overall_sentiment': overall_sentiment,
+            'conclusion': conclusion,
+        }
@@ -0,0 +1,65 @@
+"""
+Text Preprocessing
+
+Satu kali preprocessing per teks, dipakai bersama oleh deteksi bahasa,
+lexicon, dan local scorer (baik single maupun batch).
+"""
+
+from typing import Iterable, List, Optional, Tuple
+import re
+
+# Single pass over the raw text: URL dan mention dilewati (tidak punya
+# group), '#' bukan \w sehingga hashtag tinggal katanya
+_TOKEN_RE = re.compile(r'http\S+|www.\S+|@\w+|(\w+)', re.IGNORECASE)
+
+
+class Document:
+    """
+    Preprocessed text
+
+    Attributes:
+        text: Original text
+        normalized: Lowercased text
+        tokens: Lowercased word tokens without URLs and mentions
+        offsets: (start, end) of every token in ``text``
+        language: Detected language, filled in by SentimentAnalyzer
+        language_confidence: Confidence of ``language``
+    """
+
+    __slots__ = ('text', 'normalized', 'tokens', 'offsets', 'language', 'language_confidence')
+
+    def __init__(self, text: str):
+        self.text = text or ''
+        self.normalized = self.text.lower()
+        self.tokens: List[str] = []
+        self.offsets: List[Tuple[int, int]] = []
+        self.language: Optional[str] = None
+        self.language_confidence: Optional[float] = None
+
+        for m in _TOKEN_RE.finditer(self.text):
+            if m.group(1):
+                self.tokens.append(m.group(1).lower())
+                self.offsets.append(m.span(1))
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.text.strip()
+
+    def __repr__(self):
+        return f"Document({self.text[:30]!r}, tokens={len(self.tokens)})"
+
+
+def preprocess(text) -> Document:
+    """Document for ``text``; an existing Document is returned as is"""
+    if isinstance(text, Document):
+        return text
+    return Document(text)
+
+
+def preprocess_many(texts: Iterable) -> List[Document]:
+    return [preprocess(text) for text in texts]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens without URLs and mentions"""
+    return preprocess(text).tokens
@@ -0,0 +1,322 @@
+"""
+Batched Translation Service
+
+Terjemahan banyak teks sekaligus untuk jalur hybrid sentiment:
+- Teks pendek digabung per request (di bawah batas karakter provider)
+- Beberapa request jalan paralel di thread pool terbatas
+- Token bucket untuk rate limit, circuit breaker saat provider bermasalah
+- Translation memory di depan semuanya (lihat translation_cache)
+
+Jika translator tidak tersedia, hasilnya None dan pemanggil memakai skor
+lexicon saja.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+import logging
+import re
+import threading
+import time
+
+from .translation_cache import TranslationMemory, get_sentiment_config
+
+logger = logging.getLogger(__name__)
+
+# Pemisah antar teks di dalam satu request
+SEPARATOR = '\n'
+
+_LINE_BREAK_RE = re.compile(r'[\r\n]+')
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests/second, bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take one token, waiting for it up to ``timeout`` seconds (None = forever)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing provider for a while
+
+    closed -> open after ``failure_threshold`` consecutive failures;
+    after ``reset_timeout`` seconds one trial call is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._trial:
+                    logger.warning("Translation circuit opened after repeated failures")
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+    def release_trial(self):
+        """The half-open trial was not attempted (e.g. rate limited): let another one through"""
+        with self._lock:
+            self._trial = False
+
+
+class StubTranslator:
+    """
+    Offline translator with the GoogleTranslator.translate() interface
+
+    Args:
+        mapping: Optional {text: translation}; other texts come back unchanged
+        fail: Raise on every call (to exercise the fallback path)
+    """
+
+    def __init__(self, source: str = 'id', target: str = 'en', mapping: Dict[str, str] = None, fail: bool = False):
+        self.source = source
+        self.target = target
+        self.mapping = mapping or {}
+        self.fail = fail
+        self.calls = 0
+
+    def translate(self, text: str) -> str:
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("stub translator failure")
+        return SEPARATOR.join(self.mapping.get(line, line) for line in text.split(SEPARATOR))
+
+
+def google_translator_factory(source: str = 'id', target: str = 'en'):
+    """GoogleTranslator instance, or None when deep-translator is not installed"""
+    try:
+        from deep_translator import GoogleTranslator
+    except ImportError:
+        return None
+    return GoogleTranslator(source=source, target=target)
+
+
+# Shared by every analyzer in this process (one provider quota)
+_limiter = None
+_breaker = None
+_executor = None
+_shared_lock = threading.Lock()
+
+
+def _shared():
+    global _limiter, _breaker, _executor
+
+    with _shared_lock:
+        if _limiter is None:
+            _limiter = TokenBucket(
+                rate=get_sentiment_config('TRANSLATION_RATE', 5),
+                capacity=get_sentiment_config('TRANSLATION_BURST', 10),
+            )
+            _breaker = CircuitBreaker(
+                failure_threshold=get_sentiment_config('TRANSLATION_FAILURE_THRESHOLD', 5),
+                reset_timeout=get_sentiment_config('TRANSLATION_RESET_TIMEOUT', 60),
+            )
+            _executor = ThreadPoolExecutor(
+                max_workers=get_sentiment_config('TRANSLATION_WORKERS', 4),
+                thread_name_prefix='translation',
+            )
+        return _limiter, _breaker, _executor
+
+
+class BatchTranslator:
+    """
+    Translate many texts with as few provider round trips as possible
+
+    Translator instances are not thread-safe (GoogleTranslator keeps
+    request state on the instance), so every worker thread builds its own
+    from ``translator_factory``.
+    """
+
+    def __init__(
+        self,
+        source: str = 'id',
+        target: str = 'en',
+        translator_factory: Callable = None,
+        memory: Optional[TranslationMemory] = None,
+        max_chars: int = None,
+        limiter: TokenBucket = None,
+        breaker: CircuitBreaker = None,
+        executor: ThreadPoolExecutor = None,
+    ):
+        self.source = source
+        self.target = target
+        self.translator_factory = translator_factory or google_translator_factory
+        self.memory = memory
+        self.max_chars = max_chars or get_sentiment_config('TRANSLATION_MAX_CHARS', 4500)
+        self.rate_limit_timeout = get_sentiment_config('TRANSLATION_RATE_LIMIT_TIMEOUT', 30)
+
+        if limiter is None or breaker is None or executor is None:
+            shared_limiter, shared_breaker, shared_executor = _shared()
+            limiter = limiter or shared_limiter
+            breaker = breaker or shared_breaker
+            executor = executor or shared_executor
+        self.limiter = limiter
+        self.breaker = breaker
+        self.executor = executor
+
+        self._local = threading.local()
+        self.available = self._translator() is not None
+
+    def _translator(self):
+        if not hasattr(self._local, 'translator'):
+            self._local.translator = self.translator_factory(source=self.source, target=self.target)
+        return self._local.translator
+
+    def pack(self, texts: List[str]) -> List[List[int]]:
+        """Group text indexes into chunks whose joined length stays under max_chars"""
+        chunks = []
+        current = []
+        size = 0
+
+        for i, text in enumerate(texts):
+            length = len(text) + len(SEPARATOR)
+            if current and size + length > self.max_chars:
+                chunks.append(current)
+                current = []
+                size = 0
+            current.append(i)
+            size += length
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _call(self, text: str) -> Optional[str]:
+        """One provider request behind the circuit breaker and rate limiter"""
+        if not self.breaker.allow():
+            return None
+        if not self.limiter.acquire(timeout=self.rate_limit_timeout):
+            # No call made: a pending half-open trial must not block the breaker
+            self.breaker.release_trial()
+            return None
+
+        try:
+            translated = self._translator().translate(text)
+        except Exception as e:
+            logger.error(f"Translation error: {str(e)}")
+            self.breaker.record_failure()
+            return None
+
+        self.breaker.record_success()
+        return translated
+
+    def _translate_chunk(self, texts: List[str]) -> List[Optional[str]]:
+        if len(texts) == 1:
+            return [self._call(texts[0])]
+
+        joined = self._call(SEPARATOR.join(texts))
+        if joined is None:
+            return [None] * len(texts)
+
+        parts = joined.split(SEPARATOR)
+        if len(parts) == len(texts):
+            return parts
+
+        # Provider merged/split lines: fall back to one request per text
+        logger.warning("Batched translation came back misaligned, translating texts one by one")
+        return [self._call(text) for text in texts]
+
+    def translate_many(self, texts: List[str]) -> List[Optional[str]]:
+        """
+        Translations in input order; None where translation was not possible
+        """
+        results: List[Optional[str]] = [None] * len(texts)
+        if not self.available:
+            return results
+
+        # Satu baris per teks di dalam request
+        cleaned = [_LINE_BREAK_RE.sub(' ', text or '').strip() for text in texts]
+
+        cached = self.memory.get_many([t for t in cleaned if t]) if self.memory is not None else {}
+
+        pending: Dict[str, List[int]] = {}
+        for i, text in enumerate(cleaned):
+            if not text:
+                results[i] = ''
+            elif text in cached:
+                results[i] = cached[text]
+            else:
+                # Duplicates in the batch are translated once
+                pending.setdefault(text, []).append(i)
+
+        if not pending:
+            return results
+
+        unique = list(pending)
+        chunks = self.pack(unique)
+
+        if len(chunks) == 1:
+            translated_chunks = [self._translate_chunk([unique[i] for i in chunks[0]])]
+        else:
+            futures = [
+                self.executor.submit(self._translate_chunk, [unique[i] for i in chunk])
+                for chunk in chunks
+            ]
+            translated_chunks = [future.result() for future in futures]
+
+        fresh = {}
+        for chunk, translated in zip(chunks, translated_chunks):
+            for i, value in zip(chunk, translated):
+                if value is None:
+                    continue
+                fresh[unique[i]] = value
+                for position in pending[unique[i]]:
+                    results[position] = value
+
+        if self.memory is not None and fresh:
+            self.memory.set_many(fresh)
+
+        return results
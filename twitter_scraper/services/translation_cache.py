@@ -0,0 +1,164 @@
+"""
+Translation Memory
+
+Cache persisten hasil terjemahan (id -> en) di tabel `cache` (model
+valemis.Cache), di-key dengan hash teks yang sudah dinormalisasi.
+Retweet dan teks boilerplate yang sama tidak diterjemahkan ulang.
+"""
+
+from typing import Dict, Iterable, Optional
+import hashlib
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+_URL_RE = re.compile(r'http\S+|www.\S+')
+_SPACE_RE = re.compile(r'\s+')
+
+# Batas parameter per query (SQL Server: 2100)
+_CHUNK = 1000
+
+
+def get_sentiment_config(key: str, default=None):
+    """Read a value from settings.SENTIMENT_CONFIG"""
+    if not settings.configured:
+        return default
+    return getattr(settings, 'SENTIMENT_CONFIG', {}).get(key, default)
+
+
+def normalize_text(text: str) -> str:
+    """URLs removed, whitespace collapsed, case folded"""
+    return _SPACE_RE.sub(' ', _URL_RE.sub('', text)).strip().casefold()
+
+
+class TranslationMemory:
+    """
+    Persistent text -> translation store with TTL and max-entry eviction
+
+    Database errors (e.g. the table does not exist) are logged and treated
+    as cache misses; translation still works without the memory.
+    """
+
+    PREFIX = 'sentiment_translation:'
+
+    # Eviction runs after this many writes
+    PRUNE_EVERY = 500
+
+    def __init__(self, source: str = 'id', target: str = 'en', ttl: int = None, max_entries: int = None):
+        self.source = source
+        self.target = target
+        self.ttl = ttl if ttl is not None else get_sentiment_config('TRANSLATION_CACHE_TTL', 30 * 24 * 3600)
+        self.max_entries = (
+            max_entries if max_entries is not None
+            else get_sentiment_config('TRANSLATION_CACHE_MAX_ENTRIES', 100000)
+        )
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _model():
+        from django.apps import apps
+        return apps.get_model('valemis', 'Cache')
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(
+            f"{self.source}:{self.target}:{normalize_text(text)}".encode('utf-8')
+        ).hexdigest()
+        return f"{self.PREFIX}{digest}"
+
+    def get_many(self, texts: Iterable[str]) -> Dict[str, str]:
+        """
+        Cached translations
+
+        Returns:
+            {text: translation} for the texts that are in the memory
+        """
+        keys = {}
+        for text in texts:
+            keys.setdefault(self.key(text), []).append(text)
+        if not keys:
+            return {}
+
+        found = {}
+        now = int(time.time())
+        key_list = list(keys)
+
+        try:
+            Cache = self._model()
+            for i in range(0, len(key_list), _CHUNK):
+                rows = Cache.objects.filter(
+                    key__in=key_list[i:i + _CHUNK], expiration__gt=now
+                ).values_list('key', 'value')
+                for key, value in rows:
+                    for text in keys[key]:
+                        found[text] = value
+        except DatabaseError as e:
+            logger.warning(f"Translation memory unavailable: {str(e)}")
+            return {}
+
+        return found
+
+    def get(self, text: str) -> Optional[str]:
+        return self.get_many([text]).get(text)
+
+    def set_many(self, translations: Dict[str, str]):
+        """Store {text: translation}; existing entries are refreshed"""
+        if not translations:
+            return
+
+        expiration = int(time.time()) + self.ttl
+        entries = {self.key(text): value for text, value in translations.items() if value}
+        if not entries:
+            return
+
+        try:
+            Cache = self._model()
+            key_list = list(entries)
+            with transaction.atomic():
+                for i in range(0, len(key_list), _CHUNK):
+                    Cache.objects.filter(key__in=key_list[i:i + _CHUNK]).delete()
+                Cache.objects.bulk_create(
+                    [Cache(key=key, value=value, expiration=expiration) for key, value in entries.items()],
+                    batch_size=_CHUNK,
+                )
+        except DatabaseError as e:
+            logger.warning(f"Translation memory unavailable: {str(e)}")
+            return
+
+        with self._lock:
+            self._writes += len(entries)
+            due = self._writes >= self.PRUNE_EVERY
+            if due:
+                self._writes = 0
+        if due:
+            self.prune()
+
+    def set(self, text: str, translation: str):
+        self.set_many({text: translation})
+
+    def prune(self):
+        """Drop expired entries, then the oldest ones above max_entries"""
+        try:
+            Cache = self._model()
+            entries = Cache.objects.filter(key__startswith=self.PREFIX)
+            entries.filter(expiration__lte=int(time.time())).delete()
+
+            if not self.max_entries:
+                return
+
+            excess = entries.count() - self.max_entries
+            if excess <= 0:
+                return
+
+            # Same TTL for every entry: smallest expiration = least recently stored
+            oldest = list(entries.order_by('expiration').values_list('key', flat=True)[:excess])
+            for i in range(0, len(oldest), _CHUNK):
+                Cache.objects.filter(key__in=oldest[i:i + _CHUNK]).delete()
+        except DatabaseError as e:
+            logger.warning(f"Translation memory prune failed: {str(e)}")
@@ -0,0 +1,498 @@
+import asyncio
+import base64
+import pickle
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from valemis.models import Cache
+
+from .models import TweetSentiment, TwitterAccount
+from .services import registry, translation
+from .services.indonesian_sentiment import IndonesianLexiconAnalyzer
+from .services.response_cache import HIT, MISS, STALE, AccountAnalysisCache
+from .services.scraper import StubTwitterClient, TwitterScraper
+from .services.sentiment_analyzer import SentimentAnalyzer, detect_language
+from .services.store import score_tweets
+from .services.translation import BatchTranslator, CircuitBreaker, StubTranslator, TokenBucket
+from .services.translation_cache import TranslationMemory
+
+
+def stub_tweets(count, now, hours_apart=3, first_id=1000):
+    """Oldest first, ``hours_apart`` between tweets, the last one at ``now``"""
+    return [
+        {
+            'id': str(first_id + i),
+            'text': f'tweet {i}',
+            'created_at': now - timedelta(hours=hours_apart * (count - 1 - i)),
+        }
+        for i in range(count)
+    ]
+
+
+def user_tweet_calls(client):
+    return [call for call in client.calls if call[0] == 'get_users_tweets']
+
+
+@override_settings(SCRAPING_CONFIG={'MAX_TWEETS_PER_REQUEST': 200, 'DEFAULT_DAYS': 7})
+class TwitterScraperTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.tweets = stub_tweets(250, self.now)  # ~31 days
+        self.client = StubTwitterClient(users={'Vale': {'id': '42', 'name': 'Vale Indonesia'}}, tweets={'42': self.tweets})
+        self.scraper = TwitterScraper(client=self.client)
+
+    def test_follows_pagination_up_to_max_tweets(self):
+        tweets = self.scraper.scrape_by_username('vale', days=60, max_tweets=150, incremental=False)
+
+        self.assertEqual(len(tweets), 150)
+        self.assertEqual(tweets[0]['tweet_id'], '1249')
+        calls = user_tweet_calls(self.client)
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(calls[0][3])
+        self.assertEqual(calls[1][3], '100')
+
+    def test_max_tweets_is_capped(self):
+        with self.settings(SCRAPING_CONFIG={'MAX_TWEETS_PER_REQUEST': 100}):
+            scraper = TwitterScraper(client=self.client)
+
+        self.assertEqual(len(scraper.scrape_by_username('vale', days=60, max_tweets=10000, incremental=False)), 100)
+        self.assertEqual(len(user_tweet_calls(self.client)), 1)
+
+        with self.settings(SCRAPING_CONFIG={'MAX_TWEETS_PER_REQUEST': 20}):
+            scraper = TwitterScraper(client=self.client)
+        self.assertEqual(len(scraper.search_recent('tweet', max_tweets=10000)), 20)
+
+    def test_days_sets_start_time(self):
+        tweets = self.scraper.scrape_by_username('vale', days=3, max_tweets=200, incremental=False)
+
+        # 3 days of one tweet every 3 hours
+        self.assertEqual(len(tweets), 24)
+        self.assertTrue(all(t['created_at'] >= self.now - timedelta(days=3) for t in tweets))
+
+    def test_since_id_checkpoint_fetches_only_new_tweets(self):
+        first = self.scraper.scrape_by_username('vale', days=7, max_tweets=200)
+        account = TwitterAccount.objects.get(user_id='42')
+        self.assertEqual(account.since_id, '1249')
+        self.assertEqual(len(first), 56)
+
+        self.tweets.append({'id': '2000', 'text': 'baru', 'created_at': timezone.now()})
+        self.client.calls.clear()
+        second = self.scraper.scrape_by_username('@Vale', days=7, max_tweets=200)
+
+        calls = user_tweet_calls(self.client)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0][2], '1249')
+        self.assertEqual(second[0]['tweet_id'], '2000')
+        self.assertEqual(len(second), 57)
+        self.assertEqual(TwitterAccount.objects.get(user_id='42').since_id, '2000')
+
+    def test_wider_window_than_checkpoint_backfills(self):
+        self.scraper.scrape_by_username('vale', days=7, max_tweets=200)
+        self.client.calls.clear()
+
+        self.scraper.scrape_by_username('vale', days=20, max_tweets=200)
+
+        self.assertIsNone(user_tweet_calls(self.client)[0][2])
+
+    def test_user_lookup_is_cached(self):
+        self.scraper.scrape_by_username('vale', days=1)
+        self.scraper.scrape_by_username('VALE', days=1)
+        # A new scraper (other worker) reads the twitter_account table
+        TwitterScraper(client=self.client).get_user('vale')
+
+        self.assertEqual([call for call in self.client.calls if call[0] == 'get_user'], [('get_user', 'vale')])
+
+    def test_unknown_user(self):
+        with self.assertRaises(Exception):
+            self.scraper.scrape_by_username('nobody')
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch.object(translation.time, 'monotonic', side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+
+    def open_circuit(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+    def test_opens_after_threshold(self):
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_lets_one_trial_through(self):
+        self.open_circuit()
+        self.clock += 61
+
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.is_open)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_trial_reopens(self):
+        self.open_circuit()
+        self.clock += 61
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+
+        self.assertTrue(self.breaker.is_open)
+        self.assertFalse(self.breaker.allow())
+
+    def test_released_trial_allows_another(self):
+        self.open_circuit()
+        self.clock += 61
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.release_trial()
+
+        self.assertTrue(self.breaker.allow())
+
+    def test_rate_limited_call_releases_trial(self):
+        limiter = TokenBucket(rate=0.001, capacity=1)
+        limiter.acquire()
+        translator = BatchTranslator(
+            translator_factory=lambda source, target: StubTranslator(source, target),
+            limiter=limiter, breaker=self.breaker, executor=mock.Mock(),
+        )
+        translator.rate_limit_timeout = 0
+        self.open_circuit()
+        self.clock += 61
+
+        self.assertIsNone(translator._call('halo'))
+        self.assertTrue(self.breaker.allow())
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_burst_then_timeout(self):
+        bucket = TokenBucket(rate=0.001, capacity=2)
+
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertTrue(bucket.acquire(timeout=0))
+        self.assertFalse(bucket.acquire(timeout=0))
+
+    def test_refills_over_time(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        bucket.acquire()
+
+        self.assertTrue(bucket.acquire(timeout=1))
+
+
+class TranslationMemoryTests(TestCase):
+    def setUp(self):
+        self.memory = TranslationMemory(ttl=3600, max_entries=100)
+
+    def test_hit_and_miss(self):
+        self.memory.set('Pelayanan bagus', 'Good service')
+
+        self.assertEqual(self.memory.get('Pelayanan bagus'), 'Good service')
+        # Normalized: case, whitespace and URLs do not matter
+        self.assertEqual(self.memory.get('  pelayanan   BAGUS https://t.co/x'), 'Good service')
+        self.assertIsNone(self.memory.get('Pelayanan buruk'))
+
+    def test_expired_entry_is_a_miss(self):
+        memory = TranslationMemory(ttl=-1)
+        memory.set('Pelayanan bagus', 'Good service')
+
+        self.assertIsNone(memory.get('Pelayanan bagus'))
+
+    def test_prune_keeps_max_entries(self):
+        memory = TranslationMemory(ttl=3600, max_entries=2)
+        for i in range(4):
+            memory.set(f'teks {i}', f'text {i}')
+
+        memory.prune()
+
+        self.assertEqual(len(memory.get_many([f'teks {i}' for i in range(4)])), 2)
+
+    def test_batch_translator_skips_cached_texts(self):
+        stub = StubTranslator(mapping={'bagus': 'good', 'buruk': 'bad'})
+        translator = BatchTranslator(
+            translator_factory=lambda source, target: stub,
+            memory=self.memory,
+            limiter=TokenBucket(rate=1000, capacity=1000),
+            breaker=CircuitBreaker(),
+            executor=mock.Mock(),
+        )
+
+        self.assertEqual(translator.translate_many(['bagus', 'buruk', 'bagus']), ['good', 'bad', 'good'])
+        self.assertEqual(stub.calls, 1)
+
+        self.assertEqual(translator.translate_many(['Bagus', 'buruk']), ['good', 'bad'])
+        self.assertEqual(stub.calls, 1)
+
+
+class SentimentTests(SimpleTestCase):
+    def test_multi_word_lexicon_entries(self):
+        analyzer = IndonesianLexiconAnalyzer()
+
+        self.assertEqual(analyzer.analyze('hasilnya luar biasa')['sentiment'], 'positive')
+        self.assertEqual(analyzer.analyze('perusahaan itu gulung tikar')['sentiment'], 'negative')
+
+    def test_language_confidence_is_measured_for_both_labels(self):
+        self.assertEqual(detect_language(['pelayanan', 'bagus', 'sekali']), ('id', 1.0))
+        self.assertEqual(detect_language(['this', 'was', 'great']), ('en', 0.6667))
+        self.assertEqual(detect_language(['xyz', 'qwerty']), ('en', 0.0))
+        self.assertEqual(detect_language([]), ('en', 0.0))
+
+    def test_batch_matches_single_analysis(self):
+        analyzer = SentimentAnalyzer(method='lexicon')
+        texts = ['pelayanan sangat bagus', 'harga naik, rugi besar', 'great service', '', 'tidak bagus @vale']
+
+        batch = analyzer.batch_analyze(texts)
+
+        for text, result in zip(texts, batch):
+            single = analyzer.analyze(text)
+            self.assertEqual(result['sentiment'], single['sentiment'], text)
+            self.assertAlmostEqual(result['score'], single['score'], places=6, msg=text)
+
+
+class ScoreTweetsTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.tweets = [
+            {
+                'tweet_id': str(500 + i), 'username': 'vale', 'user_display_name': 'Vale',
+                'text': text, 'created_at': now - timedelta(hours=i),
+            }
+            for i, text in enumerate(['pelayanan bagus', 'harga naik, rugi', 'kerja keras'])
+        ]
+
+    def test_stored_results_are_reused(self):
+        analyzer = SentimentAnalyzer(method='lexicon', language='auto')
+        with mock.patch.object(analyzer, 'batch_analyze', wraps=analyzer.batch_analyze) as batch:
+            first = score_tweets(self.tweets, analyzer)
+            second = score_tweets(self.tweets + [dict(self.tweets[0], tweet_id='999')], analyzer)
+
+        self.assertEqual(batch.call_count, 2)
+        self.assertEqual(len(batch.call_args_list[1][0][0]), 1)
+        self.assertEqual([r['sentiment'] for r in first], [r['sentiment'] for r in second[:3]])
+
+    def test_new_analyzer_version_rescores(self):
+        old = SentimentAnalyzer(method='lexicon', language='auto')
+        new = SentimentAnalyzer(method='lexicon', language='id')
+        self.assertNotEqual(old.version, new.version)
+        score_tweets(self.tweets, old)
+
+        with mock.patch.object(new, 'batch_analyze', wraps=new.batch_analyze) as batch:
+            score_tweets(self.tweets, new)
+
+        self.assertEqual(len(batch.call_args[0][0]), 3)
+        self.assertEqual(TweetSentiment.objects.filter(analyzer_version=old.version).count(), 3)
+        self.assertEqual(TweetSentiment.objects.filter(analyzer_version=new.version).count(), 3)
+
+    @override_settings(SENTIMENT_CONFIG={'DEGRADED_RETRY_INTERVAL': 60})
+    def test_degraded_results_are_stored_and_retried(self):
+        analyzer = SentimentAnalyzer(
+            method='hybrid', language='id',
+            translator_factory=lambda source, target: StubTranslator(source, target, fail=True),
+        )
+        degraded = {'sentiment': 'neutral', 'score': 0.0, 'language': 'id', 'method': 'lexicon', 'details': {}}
+        upgraded = dict(degraded, sentiment='positive', score=0.5, method='hybrid')
+
+        with mock.patch.object(analyzer, 'batch_analyze', side_effect=lambda texts: [degraded] * len(texts)) as batch:
+            score_tweets(self.tweets, analyzer)
+            score_tweets(self.tweets, analyzer)
+        # Stored: the second request within the retry interval reuses them
+        batch.assert_called_once()
+        self.assertEqual(TweetSentiment.objects.filter(method='lexicon').count(), 3)
+
+        TweetSentiment.objects.update(analyzed_at=timezone.now() - timedelta(minutes=2))
+        with mock.patch.object(analyzer, 'batch_analyze', side_effect=lambda texts: [upgraded] * len(texts)):
+            results = score_tweets(self.tweets, analyzer)
+
+        self.assertEqual([r['method'] for r in results], ['hybrid'] * 3)
+        self.assertEqual(TweetSentiment.objects.filter(analyzer_version=analyzer.version, method='hybrid').count(), 3)
+        self.assertEqual(TweetSentiment.objects.count(), 3)
+
+
+class AccountAnalysisCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = AccountAnalysisCache(alias='default', timeout=60, stale_timeout=60)
+        self.cache.cache.clear()
+        self.key = self.cache.make_key('Vale', 20, 7, 'v1')
+
+    def test_key_includes_parameters(self):
+        self.assertEqual(self.key, self.cache.make_key('vale', '20', '7', 'v1'))
+        self.assertNotEqual(self.key, self.cache.make_key('vale', 20, 7, 'v2'))
+        self.assertNotEqual(self.key, self.cache.make_key('vale', 50, 7, 'v1'))
+
+    def test_miss_then_hit(self):
+        compute = mock.Mock(return_value={'n': 1})
+
+        self.assertEqual(self.cache.get_or_compute(self.key, compute), ({'n': 1}, MISS))
+        self.assertEqual(self.cache.get_or_compute(self.key, compute), ({'n': 1}, HIT))
+        compute.assert_called_once()
+
+    def test_none_is_not_cached(self):
+        compute = mock.Mock(return_value=None)
+        self.cache.get_or_compute(self.key, compute)
+        self.cache.get_or_compute(self.key, compute)
+
+        self.assertEqual(compute.call_count, 2)
+
+    def test_concurrent_requests_share_one_compute(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'n': len(calls)}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(self.cache.get_or_compute(self.key, compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([value for value, _ in results], [{'n': 1}] * 5)
+
+    def test_stale_value_is_served_while_refreshing(self):
+        self.cache.store(self.key, {'n': 1})
+        refreshed = threading.Event()
+
+        def compute():
+            refreshed.set()
+            return {'n': 2}
+
+        with mock.patch('twitter_scraper.services.response_cache.time.time', return_value=time.time() + 90):
+            self.assertEqual(self.cache.get_or_compute(self.key, compute), ({'n': 1}, STALE))
+            self.assertTrue(refreshed.wait(5))
+        # Background refresh stored the new value
+        for _ in range(50):
+            if self.cache.peek(self.key) == ({'n': 2}, HIT):
+                break
+            time.sleep(0.05)
+        self.assertEqual(self.cache.peek(self.key), ({'n': 2}, HIT))
+
+    def test_async_single_flight(self):
+        calls = []
+
+        async def acompute():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return {'n': 1}
+
+        async def run():
+            return await asyncio.gather(*[self.cache.aget_or_compute(self.key, acompute) for _ in range(5)])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [({'n': 1}, MISS)] * 5)
+        self.assertEqual(self.cache.peek(self.key), ({'n': 1}, HIT))
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'table': {'BACKEND': 'twitter_scraper.services.cache_backend.TableCache', 'KEY_PREFIX': 'test_cache'},
+})
+class TableCacheTests(TestCase):
+    def setUp(self):
+        self.cache = caches['table']
+
+    def test_round_trip(self):
+        created_at = timezone.now()
+        value = {'value': {'tweets': [{'created_at': created_at, 'score': 0.5}]}, 'stored_at': 1.5}
+
+        self.cache.set('entry', value)
+
+        self.assertEqual(self.cache.get('entry'), value)
+        self.assertTrue(self.cache.add('lock', 1))
+        self.assertFalse(self.cache.add('lock', 1))
+
+    def test_values_are_not_unpickled(self):
+        key = self.cache.make_and_validate_key('entry')
+        payload = base64.b64encode(pickle.dumps({'x': 1})).decode('ascii')
+        Cache.objects.create(key=key, value=payload, expiration=9999999999)
+
+        self.assertEqual(self.cache.get('entry', 'miss'), 'miss')
+
+    def test_clear_keeps_other_rows(self):
+        Cache.objects.create(key='laravel_key', value='s:1:"x";', expiration=9999999999)
+        self.cache.set('entry', 1)
+
+        self.cache.clear()
+
+        self.assertIsNone(self.cache.get('entry'))
+        self.assertTrue(Cache.objects.filter(key='laravel_key').exists())
+
+
+class AnalyzeAccountValidationTests(SimpleTestCase):
+    def test_invalid_counts_are_bad_requests(self):
+        for url in (reverse('analyze-account'), reverse('analyze-account-async')):
+            for body in ({'max_tweets': 'abc'}, {'days': 0}, {'max_tweets': None}, {'days': '1.5'}):
+                response = self.client.post(url, dict(body, username='vale'), content_type='application/json')
+                self.assertEqual(response.status_code, 400, (url, body))
+                self.assertIn('must be a positive integer', response.json()['message'])
+
+    def test_async_view_is_csrf_exempt(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(reverse('analyze-account-async'), {'days': 0}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(SCRAPING_CONFIG={'MAX_TWEETS_PER_REQUEST': 100, 'MAX_DAYS': 30})
+    def test_counts_above_the_limit_are_bad_requests(self):
+        for url in (reverse('analyze-account'), reverse('analyze-account-async'), reverse('watch-targets')):
+            for body in ({'max_tweets': 101}, {'days': 31}):
+                response = self.client.post(url, dict(body, username='vale', value='vale'), content_type='application/json')
+                self.assertEqual(response.status_code, 400, (url, body))
+                self.assertIn('must be at most', response.json()['message'])
+
+
+class AnalyzeAccountStreamTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        tweets = stub_tweets(30, now)
+        for i, tweet in enumerate(tweets):
+            tweet['text'] = 'pelayanan bagus sekali' if i % 2 else 'listrik mati lagi buruk'
+        self.client_stub = StubTwitterClient(users={'Vale': {'id': '42', 'name': 'Vale'}}, tweets={'42': tweets})
+
+        self.addCleanup(registry.reset)
+        registry._instances['scraper'] = TwitterScraper(client=self.client_stub)
+        registry._instances[('sentiment', 'auto', 'auto')] = SentimentAnalyzer(method='lexicon', language='auto')
+
+        cache = AccountAnalysisCache(alias='default', timeout=60, stale_timeout=60)
+        cache.cache.clear()
+        patcher = mock.patch('twitter_scraper.views.analysis_cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, **body):
+        return self.client.post(
+            reverse('analyze-account'), dict(body, username='vale', max_tweets=30), content_type='application/json'
+        )
+
+    def test_streamed_result_is_cached(self):
+        response = self.post(stream=True)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 31)
+        self.client_stub.calls.clear()
+
+        response = self.post()
+
+        self.assertEqual(response['X-Analysis-Cache'], HIT)
+        self.assertEqual(response.json()['data']['total_tweets'], 30)
+        self.assertEqual(self.client_stub.calls, [])
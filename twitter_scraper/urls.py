@@ -7,4 +7,11 @@ urlpatterns = [
     
     # Account Analysis (scrape + analyze in one endpoint)
     path('analyze-account/', views.analyze_account, name='analyze-account'),
+    
+    # Async variant (ASGI: uvicorn valemis_backend.asgi:application)
+    path('analyze-account-async/', views.analyze_account_async, name='analyze-account-async'),
+    
+    # Scheduled monitoring (see manage.py run_sentiment_monitor)
+    path('monitor/targets/', views.watch_targets, name='watch-targets'),
+    path('monitor/trends/', views.sentiment_trends, name='sentiment-trends'),
 ]
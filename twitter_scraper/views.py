@@ -1,10 +1,24 @@
-from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework import renderers, status
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
-from .services.scraper import TwitterScraper
-from .services.sentiment_analyzer import SentimentAnalyzer
+from .models import WatchTarget
+from .services.aggregation import query_rollups
+from .services.registry import get_async_scraper, get_scraper, get_sentiment_analyzer
+from .services.response_cache import MISS, STALE, analysis_cache
+from .services.store import iter_scored_tweets, score_tweets
+from .services.summary import SentimentSummary
+
+from datetime import datetime, time, timedelta
+from functools import wraps
+import json
 
 import logging
 
@@ -23,7 +37,149 @@ def health_check(request):
     })
 
 
+class NDJSONRenderer(renderers.JSONRenderer):
+    """Accept: application/x-ndjson (streaming mode of analyze_account)"""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+def _positive_int(data, name: str, default: int, maximum: int = None) -> int:
+    """
+    Positive integer field of a request body (``default`` if missing)
+
+    Raises:
+        ValueError: not a positive integer, or larger than ``maximum``
+    """
+    value = data.get(name, default)
+    try:
+        if isinstance(value, bool):
+            raise ValueError
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a positive integer")
+    if value < 1:
+        raise ValueError(f"{name} must be a positive integer")
+    if maximum is not None and value > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
+    return value
+
+
+def _scrape_limits() -> dict:
+    """Upper bounds of max_tweets / days (SCRAPING_CONFIG)"""
+    config = getattr(settings, 'SCRAPING_CONFIG', {})
+    return {
+        'max_tweets': config.get('MAX_TWEETS_PER_REQUEST', 100),
+        'days': config.get('MAX_DAYS', 30),
+    }
+
+
+def _wants_stream(request) -> bool:
+    stream = request.data.get('stream', request.query_params.get('stream'))
+    if isinstance(stream, str):
+        stream = stream.lower() in ('1', 'true', 'yes')
+    return bool(stream) or request.accepted_renderer.format == 'ndjson'
+
+
+def _ndjson_response(lines, cache_state):
+    response = StreamingHttpResponse(lines, content_type='application/x-ndjson')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx: do not buffer the stream
+    response['X-Analysis-Cache'] = cache_state
+    return response
+
+
+def _stream_account_analysis(username, tweets_data, analyzer, cache_key=None):
+    """
+    NDJSON: one {"type": "tweet", ...} line per tweet as soon as its chunk
+    is scored, then one {"type": "summary", ...} line. Once every tweet is
+    scored the assembled response is stored under ``cache_key``, like the
+    non-streaming path.
+    """
+    chunk_size = getattr(settings, 'SENTIMENT_CONFIG', {}).get('STREAM_CHUNK_SIZE', 20)
+    
+    def lines():
+        summary = SentimentSummary(username)
+        items = []
+        try:
+            for tweet, sentiment_result in iter_scored_tweets(tweets_data, analyzer, chunk_size):
+                item = summary.add(tweet, sentiment_result)
+                items.append(item)
+                yield json.dumps({'type': 'tweet', **item}, cls=DjangoJSONEncoder) + '\n'
+        except Exception as e:
+            # Status line already sent: the error goes into the stream
+            logger.error(f"Error streaming analysis of @{username}: {str(e)}")
+            yield json.dumps({'type': 'error', 'message': f'Failed to analyze account: {str(e)}'}) + '\n'
+            return
+        
+        logger.info(f"Successfully streamed {summary.total_tweets} tweets from @{username}")
+        response_data = summary.to_dict()
+        if cache_key is not None:
+            analysis_cache.store(cache_key, dict(response_data, tweets=items))
+        yield json.dumps({'type': 'summary', **response_data}, cls=DjangoJSONEncoder) + '\n'
+    
+    return _ndjson_response(lines(), MISS)
+
+
+def _stream_cached_analysis(response_data, cache_state):
+    """Cached analysis replayed in the streaming format"""
+    def lines():
+        for item in response_data['tweets']:
+            yield json.dumps({'type': 'tweet', **item}, cls=DjangoJSONEncoder) + '\n'
+        summary = {key: value for key, value in response_data.items() if key != 'tweets'}
+        yield json.dumps({'type': 'summary', **summary}, cls=DjangoJSONEncoder) + '\n'
+    
+    return _ndjson_response(lines(), cache_state)
+
+
+def _scrape_account(scraper, username, max_tweets, days):
+    """Scrape step of analyze-account (JSON and streaming responses)"""
+    logger.info(f"Scraping tweets from @{username}...")
+    
+    # Scrape tweets using Twitter API
+    return scraper.scrape_by_username(username, days=days, max_tweets=max_tweets)
+
+
+def _no_tweets_response(username):
+    return Response({
+        'status': 'error',
+        'message': f'No tweets found for @{username}'
+    }, status=status.HTTP_404_NOT_FOUND)
+
+
+def _account_analysis(scraper, analyzer, username, max_tweets, days):
+    """
+    Scrape + score one account
+    
+    Returns:
+        analyze-account response data, or None when there are no tweets
+    """
+    tweets_data = _scrape_account(scraper, username, max_tweets, days)
+    if not tweets_data:
+        return None
+    
+    # Stored results are reused; only unseen tweets are scored (one batch)
+    sentiment_results = score_tweets(tweets_data, analyzer)
+    return _build_analysis(username, tweets_data, sentiment_results)
+
+
+def _build_analysis(username, tweets_data, sentiment_results):
+    """analyze-account response data from the scored tweets"""
+    summary = SentimentSummary(username)
+    results = [
+        summary.add(tweet, sentiment_result)
+        for tweet, sentiment_result in zip(tweets_data, sentiment_results)
+    ]
+    
+    # Create response
+    response_data = summary.to_dict()
+    response_data['tweets'] = results
+    
+    logger.info(f"Successfully analyzed {summary.total_tweets} tweets from @{username}")
+    return response_data
+
+
 @api_view(['POST'])
+@renderer_classes([renderers.JSONRenderer, NDJSONRenderer])
 def analyze_account(request):
     """
     Comprehensive endpoint untuk analyze Twitter account:
@@ -35,9 +191,15 @@ def analyze_account(request):
     {
         "username": "twitter_username",
         "max_tweets": 20,  // optional, default 20
-        "days": 7  // optional, default 7
+        "days": 7,  // optional, default 7
+        "stream": false  // optional, NDJSON stream (also Accept: application/x-ndjson)
     }
     
+    Streaming response (application/x-ndjson), one JSON object per line:
+        {"type": "tweet", "tweet_id": ..., "sentiment": ..., ...}
+        ...
+        {"type": "summary", "total_tweets": ..., "sentiment_distribution": ..., ...}
+    
     Response:
     {
         "status": "success",
@@ -58,8 +220,6 @@ def analyze_account(request):
     }
     """
     username = request.data.get('username', '').strip().replace('@', '')
-    max_tweets = request.data.get('max_tweets', 20)
-    days = request.data.get('days', 7)
     
     if not username:
         return Response({
@@ -68,122 +228,309 @@ def analyze_account(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Initialize services
-        scraper = TwitterScraper()
-        analyzer = SentimentAnalyzer(method='auto', language='auto')
+        limits = _scrape_limits()
+        max_tweets = _positive_int(request.data, 'max_tweets', 20, limits['max_tweets'])
+        days = _positive_int(request.data, 'days', 7, limits['days'])
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        # Shared services (built once per worker, see services/registry.py)
+        scraper = get_scraper()
+        analyzer = get_sentiment_analyzer(method='auto', language='auto')
         
-        logger.info(f"Scraping tweets from @{username}...")
+        # Cached per username + max_tweets + days + analyzer version
+        # (SCRAPING_CONFIG CACHE_TIMEOUT), see services/response_cache.py
+        cache_key = analysis_cache.make_key(username, max_tweets, days, analyzer.version)
         
-        # Scrape tweets using Twitter API
-        tweets_data = scraper.scrape_by_username(username, days=days, max_tweets=max_tweets)
+        def compute():
+            return _account_analysis(scraper, analyzer, username, max_tweets, days)
         
-        if not tweets_data:
+        if _wants_stream(request):
+            cached, cache_state = analysis_cache.peek(cache_key)
+            if cached is not None:
+                if cache_state == STALE:
+                    analysis_cache.revalidate(cache_key, compute)
+                return _stream_cached_analysis(cached, cache_state)
+            
+            tweets_data = _scrape_account(scraper, username, max_tweets, days)
+            if not tweets_data:
+                return _no_tweets_response(username)
+            return _stream_account_analysis(username, tweets_data, analyzer, cache_key)
+        
+        response_data, cache_state = analysis_cache.get_or_compute(cache_key, compute)
+        
+        if response_data is None:
+            return _no_tweets_response(username)
+        
+        response = Response({
+            'status': 'success',
+            'data': response_data
+        }, status=status.HTTP_200_OK)
+        response['X-Analysis-Cache'] = cache_state
+        return response
+        
+    except Exception as e:
+        logger.error(f"Error analyzing account @{username}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': f'Failed to analyze account: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _target_to_dict(target):
+    return {
+        'id': target.id,
+        'kind': target.kind,
+        'value': target.value,
+        'label': target.label,
+        'is_active': target.is_active,
+        'days': target.days,
+        'max_tweets': target.max_tweets,
+        'interval_minutes': target.interval_minutes,
+        'last_run_at': target.last_run_at.isoformat() if target.last_run_at else None,
+        'last_error': target.last_error,
+    }
+
+
+@api_view(['GET', 'POST'])
+def watch_targets(request):
+    """
+    List or add monitored accounts / keywords
+    
+    Request body (POST):
+    {
+        "kind": "account",  // or "keyword"
+        "value": "username or search query",
+        "label": "optional",
+        "days": 7, "max_tweets": 100, "interval_minutes": 60  // optional
+    }
+    """
+    if request.method == 'GET':
+        return Response({
+            'status': 'success',
+            'data': [_target_to_dict(t) for t in WatchTarget.objects.all()]
+        })
+    
+    kind = request.data.get('kind', 'account')
+    value = str(request.data.get('value', '')).strip()
+    if kind == 'account':
+        value = value.replace('@', '')
+    
+    if kind not in dict(WatchTarget.KIND_CHOICES) or not value:
+        return Response({
+            'status': 'error',
+            'message': 'kind must be account or keyword and value is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    limits = _scrape_limits()
+    try:
+        defaults = {
+            field: _positive_int(request.data, field, None, limits.get(field))
+            for field in ('days', 'max_tweets', 'interval_minutes')
+            if request.data.get(field) is not None
+        }
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    defaults['label'] = request.data.get('label')
+    defaults['is_active'] = bool(request.data.get('is_active', True))
+    
+    target, created = WatchTarget.objects.update_or_create(kind=kind, value=value, defaults=defaults)
+    return Response({
+        'status': 'success',
+        'data': _target_to_dict(target)
+    }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def sentiment_trends(request):
+    """
+    Sentiment per hour / day / week of accounts and monitored keywords
+    
+    Query params:
+        account: username
+        keyword: query of a keyword watch target
+        target: WatchTarget id (instead of account / keyword)
+        period: hour, day (default) or week
+        start, end: YYYY-MM-DD (inclusive, local dates)
+    
+    Response:
+    {
+        "status": "success",
+        "data": [
+            {"kind": "account", "key": "username", "period": "day",
+             "bucket": "2024-01-01T00:00:00+08:00", "total": 10,
+             "positive": 5, "neutral": 3, "negative": 2,
+             "average_score": 0.12, "engagement": 340, "weighted_score": 0.2}
+        ]
+    }
+    """
+    params = request.query_params
+    kind = key = None
+    if params.get('target'):
+        target = WatchTarget.objects.filter(pk=params['target']).first()
+        if target is None:
             return Response({
                 'status': 'error',
-                'message': f'No tweets found for @{username}'
+                'message': 'Watch target not found'
             }, status=status.HTTP_404_NOT_FOUND)
-        
-        # Analyze sentiment for each tweet
-        results = []
-        positive_count = 0
-        neutral_count = 0
-        negative_count = 0
-        total_score = 0
-        
-        for tweet in tweets_data:
-            text = tweet.get('text', '')
-            
-            # Analyze sentiment
-            sentiment_result = analyzer.analyze(text)
-            
-            sentiment = sentiment_result['sentiment']
-            score = sentiment_result['score']
-            language = sentiment_result.get('language', 'unknown')
-            
-            # Count by sentiment
-            if sentiment == 'positive':
-                positive_count += 1
-            elif sentiment == 'negative':
-                negative_count += 1
-            else:
-                neutral_count += 1
-            
-            total_score += score
-            
-            # Store result
-            result = {
-                'tweet_id': tweet.get('tweet_id'),
-                'text': text,
-                'created_at': tweet.get('created_at'),
-                'likes_count': tweet.get('likes_count', 0),
-                'retweets_count': tweet.get('retweets_count', 0),
-                'replies_count': tweet.get('replies_count', 0),
-                'url': tweet.get('url', ''),
-                'sentiment': sentiment,
-                'score': round(score, 3),
-                'language': language,
-                'details': {
-                    'positive': round(sentiment_result.get('details', {}).get('positive', 0), 3),
-                    'neutral': round(sentiment_result.get('details', {}).get('neutral', 0), 3),
-                    'negative': round(sentiment_result.get('details', {}).get('negative', 0), 3)
-                }
+        kind, key = target.kind, target.value
+    elif params.get('account'):
+        kind, key = 'account', params['account'].replace('@', '')
+    elif params.get('keyword'):
+        kind, key = 'keyword', params['keyword']
+    
+    bounds = {}
+    for param in ('start', 'end'):
+        if params.get(param):
+            date = parse_date(params[param])
+            if date is None:
+                return Response({
+                    'status': 'error',
+                    'message': f'{param} must be YYYY-MM-DD'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            if param == 'end':
+                date += timedelta(days=1)
+            bounds[param] = timezone.make_aware(datetime.combine(date, time.min))
+    
+    try:
+        rollups = query_rollups(kind, key, period=params.get('period', 'day'), **bounds)
+    except ValueError as e:
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'status': 'success',
+        'data': [
+            {
+                'kind': rollup.kind,
+                'key': rollup.key,
+                'period': rollup.period,
+                'bucket': timezone.localtime(rollup.bucket).isoformat(),
+                'total': rollup.total,
+                'positive': rollup.positive,
+                'neutral': rollup.neutral,
+                'negative': rollup.negative,
+                'average_score': rollup.average_score,
+                'engagement': rollup.engagement,
+                'weighted_score': rollup.weighted_score,
             }
-            results.append(result)
-        
-        # Calculate overall conclusion
-        total_tweets = len(results)
-        average_score = total_score / total_tweets if total_tweets > 0 else 0
+            for rollup in rollups
+        ]
+    })
+
+
+def _score_in_thread(tweets_data, analyzer):
+    """score_tweets() for a sync_to_async(thread_sensitive=False) worker thread"""
+    try:
+        return score_tweets(tweets_data, analyzer)
+    finally:
+        # Thread-local connections are not closed by request_finished
+        connections.close_all()
+
+
+def async_csrf_exempt(view_func):
+    """csrf_exempt() for async views; Django 4.2's wrapper is a sync function"""
+    @wraps(view_func)
+    async def wrapper_view(*args, **kwargs):
+        return await view_func(*args, **kwargs)
+    
+    wrapper_view.csrf_exempt = True
+    return wrapper_view
+
+
+# Like the DRF views, which are CSRF exempt without session authentication
+@async_csrf_exempt
+async def analyze_account_async(request):
+    """
+    Async analyze-account (same request body and response as
+    analyze_account, without streaming) for ASGI deployments
+    
+    Twitter API calls are awaited (tweepy AsyncClient); translation and
+    scoring run in the sync_to_async thread pool, so one worker can serve
+    many analyses at once.
+    """
+    if request.method != 'POST':
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Method not allowed'
+        }, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    
+    try:
+        body = json.loads(request.body or b'{}')
+        if not isinstance(body, dict):
+            raise ValueError
+    except ValueError:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Invalid JSON body'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    username = str(body.get('username', '')).strip().replace('@', '')
+    
+    if not username:
+        return JsonResponse({
+            'status': 'error',
+            'message': 'Username is required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limits = _scrape_limits()
+        max_tweets = _positive_int(body, 'max_tweets', 20, limits['max_tweets'])
+        days = _positive_int(body, 'days', 7, limits['days'])
+    except ValueError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        scraper = await sync_to_async(get_async_scraper)()
+        analyzer = await sync_to_async(get_sentiment_analyzer)(method='auto', language='auto')
         
-        positive_pct = (positive_count / total_tweets * 100) if total_tweets > 0 else 0
-        neutral_pct = (neutral_count / total_tweets * 100) if total_tweets > 0 else 0
-        negative_pct = (negative_count / total_tweets * 100) if total_tweets > 0 else 0
+        cache_key = analysis_cache.make_key(username, max_tweets, days, analyzer.version)
         
-        # Determine overall sentiment
-        if average_score > 0.2:
-            overall_sentiment = 'POSITIVE'
-            conclusion = f"Account @{username} cenderung posting tweets dengan sentimen positif"
-        elif average_score < -0.2:
-            overall_sentiment = 'NEGATIVE'
-            conclusion = f"Account @{username} cenderung posting tweets dengan sentimen negatif"
-        else:
-            overall_sentiment = 'NEUTRAL'
-            conclusion = f"Account @{username} cenderung posting tweets dengan sentimen netral/seimbang"
+        async def acompute():
+            logger.info(f"Scraping tweets from @{username} (async)...")
+            tweets_data = await scraper.ascrape_by_username(username, days=days, max_tweets=max_tweets)
+            if not tweets_data:
+                return None
+            
+            # Translation + sentiment are blocking: run in the thread pool,
+            # not on the shared sync thread, so analyses overlap
+            sentiment_results = await sync_to_async(_score_in_thread, thread_sensitive=False)(
+                tweets_data, analyzer
+            )
+            return _build_analysis(username, tweets_data, sentiment_results)
         
-        # Create response
-        response_data = {
-            'username': username,
-            'analyzed_at': timezone.now().isoformat(),
-            'total_tweets': total_tweets,
-            'sentiment_distribution': {
-                'positive': {
-                    'count': positive_count,
-                    'percentage': round(positive_pct, 2)
-                },
-                'neutral': {
-                    'count': neutral_count,
-                    'percentage': round(neutral_pct, 2)
-                },
-                'negative': {
-                    'count': negative_count,
-                    'percentage': round(negative_pct, 2)
-                }
-            },
-            'average_score': round(average_score, 3),
-            'overall_sentiment': overall_sentiment,
-            'conclusion': conclusion,
-            'tweets': results
-        }
+        # Identical concurrent requests share one scrape (single-flight);
+        # stale entries are refreshed by an asyncio task with the async scraper
+        response_data, cache_state = await analysis_cache.aget_or_compute(cache_key, acompute)
         
-        logger.info(f"Successfully analyzed {total_tweets} tweets from @{username}")
+        if response_data is None:
+            return JsonResponse({
+                'status': 'error',
+                'message': f'No tweets found for @{username}'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        return Response({
+        response = JsonResponse({
             'status': 'success',
             'data': response_data
-        }, status=status.HTTP_200_OK)
+        }, encoder=DjangoJSONEncoder, status=status.HTTP_200_OK)
+        response['X-Analysis-Cache'] = cache_state
+        return response
         
     except Exception as e:
         logger.error(f"Error analyzing account @{username}: {str(e)}")
-        return Response({
+        return JsonResponse({
             'status': 'error',
             'message': f'Failed to analyze account: {str(e)}'
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
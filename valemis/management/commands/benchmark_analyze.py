@@ -0,0 +1,83 @@
+"""
+Management command to benchmark the api_analyze overlay pipeline.
+Run with: python manage.py benchmark_analyze [--baseline bench.json]
+
+The synthetic layer tables (bench_layer_*) are created in the default
+database and dropped afterwards; point it at a scratch database.
+"""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from valemis.services.benchmark import STAGES, find_regressions, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Time each stage of the spatial overlay pipeline on synthetic layers and report regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--layers', type=int, default=7, help='Number of synthetic reference layers')
+        parser.add_argument('--features', type=int, default=500, help='Features per layer')
+        parser.add_argument('--vertices', type=int, default=64, help='Vertices per layer feature')
+        parser.add_argument('--upload-features', type=int, default=5, help='Features in the upload')
+        parser.add_argument('--upload-vertices', type=int, default=256, help='Vertices per upload feature')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs (after one warm-up)')
+        parser.add_argument('--bbox', action='store_true', help='Filter layers by the upload envelope in the query instead of the STRtree')
+        parser.add_argument('--zoom-tolerance', type=float, help='Output simplification tolerance (meters)')
+        parser.add_argument('--precision', type=int, help='Output coordinate decimals')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Write the results as JSON')
+        parser.add_argument('--baseline', help='Compare against a previous --output file')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown (0.2 = 20%%)')
+
+    def handle(self, *args, **options):
+        try:
+            result = run_benchmark(
+                layers=options['layers'],
+                features=options['features'],
+                vertices=options['vertices'],
+                upload_features=options['upload_features'],
+                upload_vertices=options['upload_vertices'],
+                repeat=options['repeat'],
+                use_bbox=options['bbox'],
+                tolerance=options['zoom_tolerance'],
+                precision=options['precision'],
+                seed=options['seed'],
+            )
+        except ImportError as e:
+            raise CommandError(f'Spatial libraries not available: {e}')
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        self.stdout.write(f"{'stage':<10} {'median ms':>10} {'min ms':>10}" + (f" {'baseline':>10}" if baseline else ''))
+        for stage in STAGES + ('total',):
+            timing = result['total'] if stage == 'total' else result['stages'][stage]
+            line = f"{stage:<10} {timing['median'] * 1000:>10.2f} {timing['min'] * 1000:>10.2f}"
+            if baseline:
+                before = baseline['total'] if stage == 'total' else baseline['stages'].get(stage)
+                if before:
+                    line += f" {before['median'] * 1000:>10.2f}"
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(result, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline:
+            if baseline.get('config') != result['config']:
+                self.stdout.write(self.style.WARNING('Baseline was recorded with a different configuration'))
+
+            regressions = find_regressions(result, baseline, options['threshold'])
+            if regressions:
+                for r in regressions:
+                    self.stdout.write(self.style.ERROR(
+                        f"{r['stage']}: {r['baseline'] * 1000:.2f} ms -> {r['current'] * 1000:.2f} ms ({r['ratio']:.2f}x)"
+                    ))
+                raise CommandError(f'{len(regressions)} stage(s) regressed more than {options["threshold"]:.0%}')
+
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
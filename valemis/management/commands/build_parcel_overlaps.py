@@ -0,0 +1,37 @@
+"""
+Management command to build the parcel x reference layer overlap matrix.
+Run with: python manage.py build_parcel_overlaps
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from valemis.services.layers import REFERENCE_LAYERS
+from valemis.services.overlaps import build_overlaps
+
+
+class Command(BaseCommand):
+    help = 'Build/refresh ParcelLayerOverlap (only changed claims or layers are recomputed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--layer',
+            action='append',
+            choices=list(REFERENCE_LAYERS),
+            help='Only refresh this layer (repeatable)',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Recompute every pair even if nothing changed',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            refreshed = build_overlaps(layers=options['layer'], full=options['full'])
+        except ImportError as e:
+            raise CommandError(f'Spatial libraries not available: {e}')
+
+        for layer, count in refreshed.items():
+            self.stdout.write(f'{layer}: {count} polygon claims recomputed')
+
+        self.stdout.write(self.style.SUCCESS('Overlap matrix is up to date'))
@@ -0,0 +1,47 @@
+"""
+Management command to run the background spatial analysis worker.
+Run with: python manage.py process_analysis_jobs
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from valemis.services.analysis_jobs import process_job, reserve_next_job
+
+
+class Command(BaseCommand):
+    help = 'Process queued spatial analysis jobs (api_analyze background mode)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling',
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=3,
+            help='Seconds to wait between polls when the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Waiting for spatial analysis jobs...')
+        processed = 0
+
+        while True:
+            close_old_connections()
+            job = reserve_next_job()
+
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['sleep'])
+                continue
+
+            process_job(job)
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
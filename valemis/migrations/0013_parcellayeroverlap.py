@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-16 23:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('valemis', '0012_add_census_larap_models'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParcelLayerOverlap',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('layer', models.CharField(db_index=True, max_length=100)),
+                ('luas_m2', models.FloatField(default=0)),
+                ('luas_ha', models.FloatField(default=0)),
+                ('jumlah_fitur', models.IntegerField(default=0)),
+                ('geometry_hash', models.CharField(help_text='Hash of the claim geometry used', max_length=64)),
+                ('layer_version', models.CharField(help_text='Layer signature used', max_length=255)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('polygon_claim', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='layer_overlaps', to='valemis.polygonclaim')),
+            ],
+            options={
+                'verbose_name': 'Parcel Layer Overlap',
+                'verbose_name_plural': 'Parcel Layer Overlaps',
+                'db_table': 'parcel_layer_overlap',
+                'ordering': ['polygon_claim', 'layer'],
+                'unique_together': {('polygon_claim', 'layer')},
+            },
+        ),
+    ]
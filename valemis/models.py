@@ -1247,3 +1247,32 @@ class CensusQuestion(models.Model):
 
     def __str__(self):
         return f"{self.question_number}. {self.question_text[:50]}"
+
+
+# =============================================================================
+# SPATIAL ANALYSIS - PARCEL x LAYER OVERLAP
+# =============================================================================
+class ParcelLayerOverlap(models.Model):
+    """
+    Materialized overlap between a PolygonClaim and a reference layer
+    (APL, HGB, IPPKH, IUPK, KKPR, Kawasan Hutan, Lahan Bebas)
+    Built incrementally by: python manage.py build_parcel_overlaps
+    """
+    polygon_claim = models.ForeignKey(PolygonClaim, on_delete=models.CASCADE, related_name='layer_overlaps')
+    layer = models.CharField(max_length=100, db_index=True)
+    luas_m2 = models.FloatField(default=0)
+    luas_ha = models.FloatField(default=0)
+    jumlah_fitur = models.IntegerField(default=0)
+    geometry_hash = models.CharField(max_length=64, help_text='Hash of the claim geometry used')
+    layer_version = models.CharField(max_length=255, help_text='Layer signature used')
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'parcel_layer_overlap'
+        verbose_name = 'Parcel Layer Overlap'
+        verbose_name_plural = 'Parcel Layer Overlaps'
+        ordering = ['polygon_claim', 'layer']
+        unique_together = [('polygon_claim', 'layer')]
+
+    def __str__(self):
+        return f"Polygon Claim {self.polygon_claim_id} x {self.layer}: {self.luas_ha} ha"
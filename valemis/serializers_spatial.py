@@ -0,0 +1,31 @@
+"""
+Serializers for Spatial Analysis results
+"""
+
+from rest_framework import serializers
+from .models import ParcelLayerOverlap
+
+
+class ParcelLayerOverlapSerializer(serializers.ModelSerializer):
+    """Overlap row with the parcels attached to its polygon claim"""
+
+    parcels = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ParcelLayerOverlap
+        fields = [
+            'id', 'polygon_claim', 'layer', 'luas_m2', 'luas_ha', 'jumlah_fitur',
+            'computed_at', 'parcels',
+        ]
+        read_only_fields = fields
+
+    def get_parcels(self, obj):
+        return [
+            {
+                'id_parcel': parcel.id_parcel,
+                'nama_parcel': parcel.nama_parcel,
+                'desa': parcel.desa,
+                'kecamatan': parcel.kecamatan,
+            }
+            for parcel in obj.polygon_claim.parcel_set.all()
+        ]
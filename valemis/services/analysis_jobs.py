@@ -0,0 +1,338 @@
+"""
+Spatial Analysis Job Service
+
+Analisis upload besar dijalankan di background memakai tabel antrian
+yang sudah ada:
+- JobBatch : satu batch per upload (progress per layer)
+- Job      : satu job per layer referensi
+- FailedJob: job yang gagal setelah MAX_ATTEMPTS
+
+Hasil per layer disimpan di storage (MEDIA_ROOT/analysis/<batch>/), jadi
+retry hanya mengerjakan layer yang belum selesai.
+"""
+
+from typing import Dict, Optional
+import json
+import logging
+import os
+import time
+import traceback
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils.text import slugify
+
+from ..models import FailedJob, Job, JobBatch
+from .layers import ANALYSIS_CRS, GEOPANDAS_AVAILABLE, REFERENCE_LAYERS, SOURCE_CRS, get_spatial_config, layer_cache
+from .overlay import analyze_layer
+
+if GEOPANDAS_AVAILABLE:
+    import geopandas as gpd
+
+logger = logging.getLogger(__name__)
+
+QUEUE = 'spatial-analysis'
+
+
+def _now() -> int:
+    return int(time.time())
+
+
+def _batch_dir(batch_id: str) -> str:
+    return f"analysis/{batch_id}"
+
+
+def _input_path(batch_id: str) -> str:
+    return f"{_batch_dir(batch_id)}/input.geojson"
+
+
+def _layer_path(batch_id: str, layer: str) -> str:
+    return f"{_batch_dir(batch_id)}/layers/{slugify(layer)}.json"
+
+
+def _result_path(batch_id: str) -> str:
+    return f"{_batch_dir(batch_id)}/result.json"
+
+
+def _write(path: str, content: str) -> str:
+    """
+    Replace ``path`` atomically: the content is saved under a temporary
+    name and renamed over ``path``, so readers never see a missing or
+    partial file and two workers writing the same layer do not race.
+    Needs a storage with local paths (FileSystemStorage, the default).
+    """
+    tmp_name = default_storage.save(f"{path}.{uuid.uuid4().hex}.tmp", ContentFile(content.encode('utf-8')))
+    os.replace(default_storage.path(tmp_name), default_storage.path(path))
+    return path
+
+
+def _read(path: str) -> str:
+    with default_storage.open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+
+# ==============================
+# Submit
+# ==============================
+def submit_analysis(gdf_input, file_name: str = '') -> str:
+    """
+    Store the uploaded geometry and enqueue one job per reference layer
+
+    Returns:
+        Batch id (used as job id by the API)
+    """
+    batch_id = uuid.uuid4().hex
+    now = _now()
+
+    _write(_input_path(batch_id), gdf_input.to_crs(SOURCE_CRS).to_json())
+
+    with transaction.atomic():
+        JobBatch.objects.create(
+            id=batch_id,
+            name=f"analyze:{file_name}"[:255],
+            total_jobs=len(REFERENCE_LAYERS),
+            pending_jobs=len(REFERENCE_LAYERS),
+            failed_jobs=0,
+            failed_job_ids='[]',
+            options=json.dumps({'file_name': file_name, 'layers': list(REFERENCE_LAYERS)}),
+            created_at=now,
+        )
+        for layer in REFERENCE_LAYERS:
+            _enqueue(batch_id, layer, now)
+
+    return batch_id
+
+
+def _enqueue(batch_id: str, layer: str, now: int):
+    Job.objects.create(
+        queue=QUEUE,
+        payload=json.dumps({'uuid': str(uuid.uuid4()), 'batch_id': batch_id, 'layer': layer}),
+        attempts=0,
+        available_at=now,
+        created_at=now,
+    )
+
+
+# ==============================
+# Worker
+# ==============================
+def reserve_next_job() -> Optional[Job]:
+    """
+    Claim the next available job
+
+    Reservations older than JOB_RETRY_AFTER seconds belong to a dead
+    worker and are picked up again, until JOB_MAX_ATTEMPTS is reached;
+    then the job is moved to failed_jobs instead of being retried forever.
+    """
+    now = _now()
+    retry_after = get_spatial_config('JOB_RETRY_AFTER', 900)
+    max_attempts = get_spatial_config('JOB_MAX_ATTEMPTS', 3)
+
+    available = Job.objects.filter(queue=QUEUE, available_at__lte=now).filter(
+        Q(reserved_at__isnull=True) | Q(reserved_at__lt=now - retry_after)
+    ).order_by('id')
+
+    for job in available[:10]:
+        # Optimistic claim: only one worker wins the update
+        claimed = Job.objects.filter(pk=job.pk, reserved_at=job.reserved_at).update(
+            reserved_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if not claimed:
+            continue
+
+        job.refresh_from_db()
+        if job.attempts > max_attempts:
+            # Stale reservation that already used every attempt (worker crashed or timed out)
+            _bury(job, json.loads(job.payload), f"Reservation expired after {max_attempts} attempts")
+            continue
+        return job
+
+    return None
+
+
+def process_job(job: Job):
+    """Run one layer overlay and record the outcome on its batch"""
+    payload = json.loads(job.payload)
+    batch_id = payload['batch_id']
+    layer = payload['layer']
+
+    try:
+        layer_path = _layer_path(batch_id, layer)
+
+        # Finished by an earlier attempt: do not redo the overlay
+        if not default_storage.exists(layer_path):
+            gdf_input = gpd.GeoDataFrame.from_features(
+                json.loads(_read(_input_path(batch_id))), crs=SOURCE_CRS
+            ).to_crs(ANALYSIS_CRS)
+            candidates = layer_cache.get(layer).query(gdf_input.geometry.values)
+            stat, geojson = analyze_layer(layer, candidates, gdf_input)
+
+            _write(layer_path, f'{{"stat": {json.dumps(stat)}, "geojson": {geojson or "null"}}}')
+
+        _complete(job, batch_id)
+
+    except Exception as e:
+        logger.error(f"Analysis job {payload['uuid']} ({layer}) failed: {str(e)}")
+        _fail(job, payload, traceback.format_exc())
+
+
+def _complete(job: Job, batch_id: str):
+    with transaction.atomic():
+        batch = JobBatch.objects.select_for_update().get(id=batch_id)
+        # A re-reserved job can finish twice: only the worker that removes it counts
+        if not Job.objects.filter(pk=job.pk).delete()[0]:
+            return
+        batch.pending_jobs = max(batch.pending_jobs - 1, 0)
+        _maybe_finish(batch)
+        batch.save()
+
+
+def _fail(job: Job, payload: Dict, exception: str):
+    max_attempts = get_spatial_config('JOB_MAX_ATTEMPTS', 3)
+
+    if job.attempts < max_attempts:
+        # Release with a linear backoff
+        Job.objects.filter(pk=job.pk).update(
+            reserved_at=None,
+            available_at=_now() + 30 * job.attempts,
+        )
+        return
+
+    _bury(job, payload, exception)
+
+
+def _bury(job: Job, payload: Dict, exception: str):
+    """Move a job to failed_jobs and count it as failed on its batch"""
+    with transaction.atomic():
+        batch = JobBatch.objects.select_for_update().get(id=payload['batch_id'])
+        if not Job.objects.filter(pk=job.pk).delete()[0]:
+            # Already completed or buried by another worker
+            return
+        FailedJob.objects.create(
+            uuid=payload['uuid'],
+            connection='database',
+            queue=job.queue,
+            payload=job.payload,
+            exception=exception,
+        )
+
+        failed_ids = json.loads(batch.failed_job_ids or '[]')
+        failed_ids.append(payload['uuid'])
+        batch.failed_job_ids = json.dumps(failed_ids)
+        batch.failed_jobs = len(failed_ids)
+        batch.pending_jobs = max(batch.pending_jobs - 1, 0)
+        _maybe_finish(batch)
+        batch.save()
+
+
+def _maybe_finish(batch: JobBatch):
+    if batch.pending_jobs > 0:
+        return
+
+    batch.finished_at = _now()
+    if batch.failed_jobs == 0:
+        _write(_result_path(batch.id), build_result(batch.id))
+
+
+def build_result(batch_id: str) -> str:
+    """Assemble the api_analyze response body from the stored layer results"""
+    stats = []
+    geojson_layers = {}
+
+    for layer in REFERENCE_LAYERS:
+        stored = json.loads(_read(_layer_path(batch_id, layer)))
+        stats.append(stored['stat'])
+        geojson_layers[layer] = stored['geojson']
+
+    return json.dumps({
+        'input': json.loads(_read(_input_path(batch_id))),
+        'layers': geojson_layers,
+        'stats': stats,
+    })
+
+
+# ==============================
+# Status / result / retry
+# ==============================
+def batch_status(batch: JobBatch) -> Dict:
+    """Progress of a batch, per layer"""
+    failed_ids = json.loads(batch.failed_job_ids or '[]')
+    failed_layers = {
+        json.loads(f.payload)['layer']
+        for f in FailedJob.objects.filter(uuid__in=failed_ids)
+    }
+    running_layers = {
+        json.loads(j.payload)['layer']
+        for j in Job.objects.filter(queue=QUEUE, reserved_at__isnull=False, payload__contains=batch.id)
+    }
+
+    layers = {}
+    for layer in REFERENCE_LAYERS:
+        if default_storage.exists(_layer_path(batch.id, layer)):
+            layers[layer] = 'done'
+        elif layer in failed_layers:
+            layers[layer] = 'failed'
+        elif layer in running_layers:
+            layers[layer] = 'running'
+        else:
+            layers[layer] = 'pending'
+
+    if batch.finished_at is None:
+        state = 'queued' if all(v == 'pending' for v in layers.values()) else 'running'
+    elif batch.failed_jobs:
+        state = 'failed'
+    else:
+        state = 'finished'
+
+    done = list(layers.values()).count('done')
+
+    return {
+        'job_id': batch.id,
+        'status': state,
+        'total_layers': batch.total_jobs,
+        'pending_layers': batch.pending_jobs,
+        'failed_layers': batch.failed_jobs,
+        'progress': round(done / batch.total_jobs * 100, 2) if batch.total_jobs else 100.0,
+        'layers': layers,
+        'created_at': batch.created_at,
+        'finished_at': batch.finished_at,
+    }
+
+
+def result_path(batch: JobBatch) -> Optional[str]:
+    """Storage path of the final GeoJSON, or None while it is not ready"""
+    path = _result_path(batch.id)
+    return path if default_storage.exists(path) else None
+
+
+def retry_batch(batch: JobBatch) -> int:
+    """
+    Re-enqueue only the layers that failed
+
+    Returns:
+        Number of re-enqueued layers
+    """
+    now = _now()
+
+    with transaction.atomic():
+        batch = JobBatch.objects.select_for_update().get(id=batch.id)
+        failed_ids = json.loads(batch.failed_job_ids or '[]')
+        failed = FailedJob.objects.filter(uuid__in=failed_ids)
+
+        layers = [json.loads(f.payload)['layer'] for f in failed]
+        for layer in layers:
+            _enqueue(batch.id, layer, now)
+        failed.delete()
+
+        batch.failed_job_ids = '[]'
+        batch.failed_jobs = 0
+        batch.pending_jobs += len(layers)
+        batch.finished_at = None
+        _maybe_finish(batch)
+        batch.save()
+
+    return len(layers)
@@ -0,0 +1,257 @@
+"""
+Spatial Overlay Benchmark
+
+Layer konsesi dan upload sintetis untuk mengukur pipeline api_analyze per
+tahap. Tabel layer dibuat di database Django (PostGIS, SQL Server atau
+SQLite/SpatiaLite) dan dibaca dengan loader yang sama dengan api_analyze
+(fetch_layer_wkb / parse_layer_wkb = load_layer_from_db, ReferenceLayer,
+clip_layer / layer_stat = analyze_layer, to_geojson / render_response),
+bukan salinannya. Overlay dijalankan berurutan di proses ini supaya
+setiap tahap terukur sendiri (api_analyze membaginya ke process pool).
+Dipakai oleh command benchmark_analyze.
+"""
+
+from typing import Dict, List, Optional
+import math
+import random
+import statistics
+import time
+
+from django.db import connection
+
+from .layers import (
+    ANALYSIS_CRS,
+    GEOPANDAS_AVAILABLE,
+    SOURCE_CRS,
+    ReferenceLayer,
+    bbox_pushdown,
+    fetch_layer_wkb,
+    parse_layer_wkb,
+)
+from .overlay import clip_layer, layer_stat, render_response, to_geojson
+
+if GEOPANDAS_AVAILABLE:
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import Polygon
+
+# fetch     : layer rows from the database as WKB (whole layer, or the upload envelope with --bbox)
+# parse     : WKB -> GeoDataFrame
+# reproject : layers and upload to ANALYSIS_CRS
+# candidates: STRtree build + query (layer cache path; the bbox query already returns candidates)
+# overlay   : intersection with the upload
+# area      : area statistics
+# serialize : layer + input GeoJSON and render_response()
+STAGES = ("fetch", "parse", "reproject", "candidates", "overlay", "area", "serialize")
+
+# Sekitar Sorowako, supaya UTM 51S masih valid
+DEFAULT_BOUNDS = (121.25, -2.65, 121.45, -2.45)
+
+
+def synthetic_polygons(count: int, vertices: int, bounds=DEFAULT_BOUNDS, radius: float = 0.01, seed: int = 0) -> List:
+    """
+    Random star-shaped polygons (always valid) inside ``bounds``
+
+    Args:
+        count: Number of polygons
+        vertices: Vertices per polygon ring
+        radius: Maximum radius in degrees
+    """
+    rng = random.Random(seed)
+    minx, miny, maxx, maxy = bounds
+    polygons = []
+
+    for _ in range(count):
+        cx = rng.uniform(minx, maxx)
+        cy = rng.uniform(miny, maxy)
+        r_max = rng.uniform(radius / 2, radius)
+        ring = []
+        for i in range(vertices):
+            angle = 2 * math.pi * i / vertices
+            r = rng.uniform(r_max / 3, r_max)
+            ring.append((cx + r * math.cos(angle), cy + r * math.sin(angle)))
+        polygons.append(Polygon(ring))
+
+    return polygons
+
+
+class BenchmarkDatabase:
+    """
+    Layer tables for the benchmark in the default Django database, in the
+    format the reference layers are imported in (ogr_geometry column)
+    """
+
+    def __init__(self):
+        self.vendor = connection.vendor
+        if getattr(connection.ops, 'spatialite', False):
+            self.vendor = "spatialite"
+        self.tables: List[str] = []
+
+    def create_layer(self, table: str, geometries: List):
+        quoted = connection.ops.quote_name(table)
+
+        if self.vendor == "postgresql":
+            ddl = f"CREATE TABLE {quoted} (ogr_geometry geometry(Geometry, 4326))"
+            insert = f"INSERT INTO {quoted} (ogr_geometry) VALUES (ST_GeomFromWKB(%s, 4326))"
+        elif self.vendor == "microsoft":
+            ddl = f"CREATE TABLE {quoted} (ogr_geometry geometry)"
+            insert = f"INSERT INTO {quoted} (ogr_geometry) VALUES (geometry::STGeomFromWKB(%s, 4326))"
+        elif self.vendor == "spatialite":
+            ddl = f"CREATE TABLE {quoted} (ogr_geometry GEOMETRY)"
+            insert = f"INSERT INTO {quoted} (ogr_geometry) VALUES (GeomFromWKB(%s, 4326))"
+        else:
+            # Plain SQLite: WKB blobs, like ogr2ogr's SQLite driver
+            ddl = f"CREATE TABLE {quoted} (ogr_geometry BLOB)"
+            insert = f"INSERT INTO {quoted} (ogr_geometry) VALUES (%s)"
+
+        with connection.cursor() as cursor:
+            cursor.execute(ddl)
+            self.tables.append(table)
+            cursor.executemany(insert, [(shapely.to_wkb(g),) for g in geometries])
+
+    def drop(self):
+        with connection.cursor() as cursor:
+            for table in self.tables:
+                cursor.execute(f"DROP TABLE {connection.ops.quote_name(table)}")
+        self.tables = []
+
+
+def _timed(timings: Dict[str, float], stage: str, func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    timings[stage] += time.perf_counter() - start
+    return result
+
+
+def run_once(tables: Dict[str, str], upload: List, use_bbox: bool = False,
+             tolerance: Optional[float] = None, precision: Optional[int] = None) -> Dict[str, float]:
+    """
+    One pass of the api_analyze pipeline with cold layers (what the first
+    request after a layer change pays), seconds per stage
+    """
+    timings = {stage: 0.0 for stage in STAGES}
+
+    gdf_input = gpd.GeoDataFrame(geometry=upload, crs=SOURCE_CRS)
+    input_bbox = gdf_input.total_bounds
+    gdf_input = _timed(timings, "reproject", gdf_input.to_crs, ANALYSIS_CRS)
+
+    # Same steps as load_layer_from_db + LayerCache.get / candidate_layers
+    bbox = input_bbox if use_bbox else None
+    layers = {}
+    for name, table in tables.items():
+        blobs = _timed(timings, "fetch", fetch_layer_wkb, table, bbox=bbox)
+        gdf = _timed(timings, "parse", parse_layer_wkb, blobs, bbox=None if bbox_pushdown() else bbox)
+        gdf = _timed(timings, "reproject", gdf.to_crs, ANALYSIS_CRS)
+        if not use_bbox:
+            layer = _timed(timings, "candidates", ReferenceLayer, name, gdf, "benchmark")
+            gdf = _timed(timings, "candidates", layer.query, gdf_input.geometry.values)
+        layers[name] = gdf
+
+    # Same steps as run_overlays / analyze_layer
+    results = []
+    for name, gdf in layers.items():
+        clipped = _timed(timings, "overlay", clip_layer, gdf, gdf_input)
+        stat = _timed(timings, "area", layer_stat, name, clipped)
+        geojson = None
+        if not clipped.empty:
+            geojson = _timed(timings, "serialize", to_geojson, clipped, tolerance, precision)
+        results.append((name, stat, geojson))
+
+    input_geojson = _timed(timings, "serialize", to_geojson, gdf_input, tolerance, precision)
+    _timed(timings, "serialize", render_response, input_geojson, results)
+
+    return timings
+
+
+def run_benchmark(
+    layers: int = 7,
+    features: int = 500,
+    vertices: int = 64,
+    upload_features: int = 5,
+    upload_vertices: int = 256,
+    repeat: int = 5,
+    use_bbox: bool = False,
+    tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+    seed: int = 42,
+) -> Dict:
+    """
+    Generate synthetic layers + upload in the Django database and time the
+    pipeline; the tables are dropped afterwards
+
+    Returns:
+        {"config": {...}, "stages": {stage: {"min", "median", "mean"}}, "total": {...}}
+    """
+    if not GEOPANDAS_AVAILABLE:
+        raise ImportError("benchmark requires geopandas")
+
+    config = {
+        "vendor": None,
+        "layers": layers,
+        "features": features,
+        "vertices": vertices,
+        "upload_features": upload_features,
+        "upload_vertices": upload_vertices,
+        "repeat": repeat,
+        "use_bbox": use_bbox,
+        "tolerance": tolerance,
+        "precision": precision,
+        "seed": seed,
+    }
+
+    db = BenchmarkDatabase()
+    config["vendor"] = db.vendor
+    try:
+        tables = {}
+        for i in range(layers):
+            table = f"bench_layer_{i}"
+            db.create_layer(table, synthetic_polygons(features, vertices, seed=seed + i))
+            tables[f"BENCH{i}"] = table
+
+        upload = synthetic_polygons(upload_features, upload_vertices, radius=0.05, seed=seed - 1)
+
+        # Warm-up (pyproj transformer cache, imports)
+        run_once(tables, upload, use_bbox, tolerance, precision)
+        runs = [run_once(tables, upload, use_bbox, tolerance, precision) for _ in range(repeat)]
+    finally:
+        db.drop()
+
+    def summarize(values):
+        return {
+            "min": min(values),
+            "median": statistics.median(values),
+            "mean": statistics.mean(values),
+        }
+
+    return {
+        "config": config,
+        "stages": {stage: summarize([run[stage] for run in runs]) for stage in STAGES},
+        "total": summarize([sum(run.values()) for run in runs]),
+    }
+
+
+def find_regressions(current: Dict, baseline: Dict, threshold: float = 0.2, min_seconds: float = 0.001) -> List[Dict]:
+    """
+    Stages whose median got slower than the baseline by more than ``threshold``
+
+    Stages faster than ``min_seconds`` in both runs are ignored (noise).
+    """
+    regressions = []
+    pairs = [(stage, current["stages"].get(stage), baseline["stages"].get(stage)) for stage in STAGES]
+    pairs.append(("total", current["total"], baseline["total"]))
+
+    for stage, now, before in pairs:
+        if not now or not before:
+            continue
+        if max(now["median"], before["median"]) < min_seconds:
+            continue
+        ratio = now["median"] / before["median"] if before["median"] else float("inf")
+        if ratio > 1 + threshold:
+            regressions.append({
+                "stage": stage,
+                "baseline": before["median"],
+                "current": now["median"],
+                "ratio": ratio,
+            })
+
+    return regressions
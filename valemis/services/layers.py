@@ -0,0 +1,518 @@
+"""
+Reference Layer Service
+
+Memuat layer referensi (APL, HGB, IPPKH, IUPK, KKPR, Kawasan Hutan,
+Lahan Bebas) dari database dan menyimpannya di memori proses:
+- Sudah diproyeksikan ke UTM (EPSG:32751)
+- Diindeks dengan STRtree untuk query bounding box
+- Dibangun ulang hanya jika tabel sumber berubah
+- Selama layer belum dimuat, request memakai query bbox ke database dan
+  layer dimuat di background
+
+Geometri PolygonClaim/Parcel (WKT di tabel Django) juga disediakan di sini
+untuk vector tiles.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections
+
+try:
+    import geopandas as gpd
+    import numpy as np
+    import shapely
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+    GEOPANDAS_AVAILABLE = True
+except ImportError:  # requires GDAL
+    GEOPANDAS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SOURCE_CRS = "EPSG:4326"
+ANALYSIS_CRS = "EPSG:32751"
+
+# Nama layer -> nama tabel di database
+REFERENCE_LAYERS = {
+    "APL": "apl",
+    "HGB": "hgb",
+    "IPPKH": "ippkh",
+    "IUPK": "iupk",
+    "KKPR": "kkpr",
+    "Kawasan Hutan": "kawasan hutan",
+    "Lahan Bebas": "lahan_bebas",
+}
+
+
+def get_spatial_config(key: str, default=None):
+    """Read a value from settings.SPATIAL_ANALYSIS"""
+    return getattr(settings, 'SPATIAL_ANALYSIS', {}).get(key, default)
+
+
+# ==============================
+# Helper: load layer from DB
+# ==============================
+def bbox_pushdown() -> bool:
+    """Whether the database filters by envelope (PostGIS, SQL Server, SpatiaLite)"""
+    return connection.vendor in ('postgresql', 'microsoft') or getattr(connection.ops, 'spatialite', False)
+
+
+def fetch_layer_wkb(table, bbox=None) -> List[Optional[bytes]]:
+    """
+    Geometries of a reference layer table as WKB (database part of
+    load_layer_from_db)
+
+    Args:
+        table: Layer table name
+        bbox: Optional (minx, miny, maxx, maxy) in SOURCE_CRS, applied in
+              the query when bbox_pushdown(); plain SQLite (WKB blobs as
+              written by ogr2ogr) returns every row
+    """
+    quoted = connection.ops.quote_name(table)
+    params = []
+
+    if connection.vendor == 'postgresql':
+        sql = f"SELECT ST_AsBinary(ogr_geometry) AS wkb_geom FROM {quoted}"
+        if bbox is not None:
+            sql += " WHERE ogr_geometry && ST_MakeEnvelope(%s, %s, %s, %s, 4326)"
+            params = [float(v) for v in bbox]
+    elif connection.vendor == 'sqlite':
+        if getattr(connection.ops, 'spatialite', False):
+            sql = f"SELECT AsBinary(ogr_geometry) AS wkb_geom FROM {quoted}"
+            if bbox is not None:
+                sql += " WHERE MbrIntersects(ogr_geometry, BuildMbr(%s, %s, %s, %s, 4326))"
+                params = [float(v) for v in bbox]
+        else:
+            sql = f"SELECT ogr_geometry AS wkb_geom FROM {quoted}"
+    else:
+        sql = f"SELECT ogr_geometry.STAsBinary() AS wkb_geom FROM {quoted}"
+        if bbox is not None:
+            sql += " WHERE ogr_geometry.STIntersects(geometry::STGeomFromText(%s, 4326)) = 1"
+            params = [box(*bbox).wkt]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    # psycopg2 returns memoryview for bytea
+    return [bytes(row[0]) if row[0] is not None else None for row in rows]
+
+
+def parse_layer_wkb(blobs, bbox=None):
+    """
+    WKB rows -> GeoDataFrame in SOURCE_CRS
+
+    Args:
+        blobs: fetch_layer_wkb() result
+        bbox: Envelope to apply here, for databases without bbox_pushdown()
+    """
+    gdf = gpd.GeoDataFrame(
+        geometry=shapely.from_wkb(blobs) if blobs else [],
+        crs=SOURCE_CRS,
+    )
+    if bbox is not None and not gdf.empty:
+        gdf = gdf[gdf.intersects(box(*bbox))]
+    return gdf
+
+
+def load_layer_from_db(table, bbox=None):
+    """
+    Load a reference layer as a GeoDataFrame in SOURCE_CRS
+
+    Args:
+        table: Layer table name
+        bbox: Optional (minx, miny, maxx, maxy) in SOURCE_CRS. Only the
+              features intersecting this envelope are returned; on spatial
+              databases the filter runs in the query so the rest never
+              crosses the wire.
+
+    Returns:
+        GeoDataFrame with one geometry column
+    """
+    blobs = fetch_layer_wkb(table, bbox=bbox)
+    return parse_layer_wkb(blobs, bbox=None if bbox_pushdown() else bbox)
+
+
+def table_signature(table) -> Optional[str]:
+    """
+    Cheap fingerprint of a table from the database statistics, without
+    reading any rows:
+    - PostgreSQL: live rows + insert/update/delete counters (pg_stat_user_tables)
+    - SQL Server: row count (sys.partitions) + last write (sys.dm_db_index_usage_stats)
+
+    Counter resets (server restart, pg_stat_reset) only cause one reload.
+
+    Returns:
+        None on other databases
+    """
+    quoted = connection.ops.quote_name(table)
+
+    if connection.vendor == 'postgresql':
+        sql = """
+            SELECT n_live_tup, n_tup_ins, n_tup_upd, n_tup_del
+            FROM pg_stat_user_tables
+            WHERE relid = %s::regclass
+        """
+    elif connection.vendor == 'microsoft':
+        # last_user_update needs VIEW SERVER STATE
+        sql = """
+            SELECT
+                (SELECT SUM(rows) FROM sys.partitions
+                 WHERE object_id = OBJECT_ID(%s) AND index_id IN (0, 1)),
+                (SELECT MAX(last_user_update) FROM sys.dm_db_index_usage_stats
+                 WHERE database_id = DB_ID() AND object_id = OBJECT_ID(%s))
+        """
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [quoted] * sql.count('%s'))
+        row = cursor.fetchone()
+
+    return ":".join(str(value) for value in row or ())
+
+
+def layer_signature(table) -> str:
+    """
+    Fingerprint of a layer table, see table_signature()
+
+    Other databases (SQLite): row count + max rowid.
+    """
+    signature = table_signature(table)
+    if signature is not None:
+        return signature
+
+    quoted = connection.ops.quote_name(table)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*), MAX(rowid) FROM {quoted}")
+        count, last = cursor.fetchone()
+    return f"{count}:{last}"
+
+
+def _srid_to_source_crs(gdf):
+    """Reproject rows whose ``srid`` column is not 4326 to SOURCE_CRS (in place)"""
+    for srid in set(gdf['srid'].dropna()) - {4326}:
+        mask = gdf['srid'] == srid
+        gdf.loc[mask, 'geometry'] = (
+            gdf.loc[mask, 'geometry']
+            .set_crs(f"EPSG:{int(srid)}", allow_override=True)
+            .to_crs(SOURCE_CRS)
+            .values
+        )
+    return gdf
+
+
+def load_polygon_claims():
+    """
+    PolygonClaim (tbl_Polygon_claim) geometries in SOURCE_CRS
+
+    geom_wkt disimpan dalam SRID parcel yang memakai claim tersebut
+    (tbl_parcel.srid), sama seperti load_parcels.
+    """
+    from ..models import Parcel, PolygonClaim
+
+    rows = list(PolygonClaim.objects.values_list(
+        'polygon_claim_id', 'type_poligon', 'sumber_data', 'geom_wkt'
+    ))
+
+    srids = {}
+    for claim_id, srid in Parcel.objects.values_list('polygon_claim_id', 'srid').distinct():
+        if srids.setdefault(claim_id, srid) != srid:
+            logger.warning(f"Polygon claim {claim_id} has parcels in SRID {srids[claim_id]} and {srid}")
+
+    gdf = gpd.GeoDataFrame(
+        {
+            'polygon_claim_id': [r[0] for r in rows],
+            'type_poligon': [r[1] for r in rows],
+            'sumber_data': [r[2] for r in rows],
+            'srid': [srids.get(r[0]) for r in rows],
+        },
+        geometry=shapely.from_wkt([r[3] or None for r in rows], on_invalid='ignore'),
+        crs=SOURCE_CRS,
+    )
+
+    return _srid_to_source_crs(gdf)
+
+
+def load_parcels():
+    """Parcel (tbl_parcel) with the geometry of its polygon claim, in SOURCE_CRS"""
+    from ..models import Parcel
+
+    rows = list(Parcel.objects.values_list(
+        'id_parcel', 'nama_parcel', 'desa', 'kecamatan', 'status_penguasaan',
+        'srid', 'polygon_claim__geom_wkt'
+    ))
+
+    gdf = gpd.GeoDataFrame(
+        {
+            'id_parcel': [r[0] for r in rows],
+            'nama_parcel': [r[1] for r in rows],
+            'desa': [r[2] for r in rows],
+            'kecamatan': [r[3] for r in rows],
+            'status_penguasaan': [r[4] for r in rows],
+            'srid': [r[5] for r in rows],
+        },
+        geometry=shapely.from_wkt([r[6] or None for r in rows], on_invalid='ignore'),
+        crs=SOURCE_CRS,
+    )
+
+    # Parcels may be stored in another SRID
+    return _srid_to_source_crs(gdf)
+
+
+def model_signature(model, fields) -> str:
+    """
+    Fingerprint of a Django model table
+
+    Statistik tabel di SQL Server / PostgreSQL (table_signature), hash dari
+    ``fields`` di database lain.
+    """
+    signature = table_signature(model._meta.db_table)
+    if signature is not None:
+        return signature
+
+    digest = hashlib.sha1()
+    for row in model.objects.order_by('pk').values_list(*fields):
+        digest.update(repr(row).encode('utf-8'))
+    return f"{model.objects.count()}:{digest.hexdigest()}"
+
+
+def polygon_claim_signature() -> str:
+    from ..models import Parcel, PolygonClaim
+    claims = model_signature(
+        PolygonClaim, ['polygon_claim_id', 'geom_wkt', 'type_poligon', 'sumber_data']
+    )
+    # The SRID of a claim comes from its parcels
+    srids = model_signature(Parcel, ['polygon_claim', 'srid'])
+    return f"{claims}:{srids}"
+
+
+def parcel_signature() -> str:
+    from ..models import Parcel
+    parcels = model_signature(
+        Parcel,
+        ['id_parcel', 'nama_parcel', 'desa', 'kecamatan', 'status_penguasaan', 'srid', 'polygon_claim'],
+    )
+    return f"{parcels}:{polygon_claim_signature()}"
+
+
+class ReferenceLayer:
+    """Satu layer referensi dalam CRS analisis beserta STRtree-nya"""
+
+    def __init__(self, name: str, gdf, version: str):
+        self.name = name
+        self.gdf = gdf.reset_index(drop=True)
+        self.version = version
+        self.tree = STRtree(self.gdf.geometry.values)
+        self.checked_at = time.monotonic()
+
+    def query(self, geometries):
+        """
+        Return the features whose bounding box intersects any of ``geometries``
+
+        Args:
+            geometries: Array of shapely geometries in ANALYSIS_CRS
+
+        Returns:
+            GeoDataFrame subset (candidates only, not yet clipped)
+        """
+        if self.gdf.empty:
+            return self.gdf
+
+        indices = self.tree.query(geometries)
+        if indices.ndim == 2:
+            indices = indices[1]
+
+        return self.gdf.iloc[np.unique(indices)]
+
+
+class LayerCache:
+    """
+    In-process cache of reference layers
+
+    Setiap layer dimuat sekali per proses. Perubahan sumber dicek paling
+    sering setiap LAYER_CHECK_INTERVAL detik lewat fungsi signature-nya.
+    """
+
+    def __init__(self, layers: Dict[str, str] = None, crs: str = ANALYSIS_CRS):
+        self.crs = crs
+        self.sources: Dict[str, tuple] = {}
+        self._layers: Dict[str, ReferenceLayer] = {}
+        # name -> (version, checked_at) of layers that are only fingerprinted
+        self._signatures: Dict[str, tuple] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        # Layers being loaded in the background (warm())
+        self._warming = set()
+        self._warming_lock = threading.Lock()
+        self._executor = None
+
+        for name, table in (layers or REFERENCE_LAYERS).items():
+            self.register(name, partial(layer_signature, table), partial(load_layer_from_db, table))
+
+    def register(self, name: str, signature: Callable[[], str], loader: Callable):
+        """
+        Add a layer source
+
+        Args:
+            signature: Returns a string that changes whenever the source changes
+            loader: Returns the layer as a GeoDataFrame with a CRS
+        """
+        self.sources[name] = (signature, loader)
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> ReferenceLayer:
+        """Return the cached layer, rebuilding it if the source changed"""
+        signature, loader = self.sources[name]
+        check_interval = get_spatial_config('LAYER_CHECK_INTERVAL', 60)
+
+        with self._locks[name]:
+            layer = self._layers.get(name)
+            now = time.monotonic()
+
+            if layer is not None and now - layer.checked_at < check_interval:
+                return layer
+
+            version = signature()
+
+            if layer is not None and layer.version == version:
+                layer.checked_at = now
+                return layer
+
+            logger.info(f"Loading layer '{name}' in {self.crs} (version {version})")
+            layer = ReferenceLayer(name, loader().to_crs(self.crs), version)
+            self._layers[name] = layer
+
+            return layer
+
+    def peek(self, name: str) -> Optional[ReferenceLayer]:
+        """
+        The cached layer if it is loaded and current; None if it was never
+        loaded, is being loaded right now or its source changed. Never loads
+        and never waits for a load.
+        """
+        signature, _ = self.sources[name]
+        check_interval = get_spatial_config('LAYER_CHECK_INTERVAL', 60)
+
+        lock = self._locks[name]
+        if not lock.acquire(blocking=False):
+            return None
+        try:
+            layer = self._layers.get(name)
+            if layer is None:
+                return None
+
+            now = time.monotonic()
+            if now - layer.checked_at < check_interval:
+                return layer
+
+            version = signature()
+            if layer.version == version:
+                layer.checked_at = now
+                return layer
+
+            self._signatures[name] = (version, now)
+            return None
+        finally:
+            lock.release()
+
+    def warm(self, name: str):
+        """Load (or rebuild) a layer in a background thread, once at a time"""
+        with self._warming_lock:
+            if name in self._warming:
+                return
+            self._warming.add(name)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='layer-warm')
+            executor = self._executor
+
+        def load():
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.warning(f"Background load of layer '{name}' failed: {str(e)}")
+            finally:
+                with self._warming_lock:
+                    self._warming.discard(name)
+                connections.close_all()
+
+        executor.submit(load)
+
+    def signature(self, name: str) -> str:
+        """
+        Current version of a layer without loading it, checked at most
+        every LAYER_CHECK_INTERVAL seconds (same throttle as get())
+        """
+        signature, _ = self.sources[name]
+        check_interval = get_spatial_config('LAYER_CHECK_INTERVAL', 60)
+
+        with self._locks[name]:
+            now = time.monotonic()
+
+            layer = self._layers.get(name)
+            if layer is not None and now - layer.checked_at < check_interval:
+                return layer.version
+
+            checked = self._signatures.get(name)
+            if checked is not None and now - checked[1] < check_interval:
+                return checked[0]
+
+            version = signature()
+            self._signatures[name] = (version, now)
+            return version
+
+    def versions(self) -> Dict[str, str]:
+        """Current version of every layer"""
+        return {name: self.get(name).version for name in self.sources}
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one layer (or all layers) from the cache"""
+        if name is None:
+            self._layers.clear()
+            self._signatures.clear()
+        else:
+            self._layers.pop(name, None)
+            self._signatures.pop(name, None)
+
+
+layer_cache = LayerCache()
+
+
+def candidate_layers(gdf_input, input_bbox, use_cache: bool = True, cache: LayerCache = None,
+                     tables: Dict[str, str] = None) -> Dict:
+    """
+    Candidate features of every reference layer for an upload (api_analyze)
+
+    Args:
+        gdf_input: Uploaded geometry in ANALYSIS_CRS
+        input_bbox: Upload envelope in SOURCE_CRS
+        use_cache: Query the in-process layer cache (STRtree). Layers that
+                   are not loaded (cold, being loaded or changed) are served
+                   with the envelope query below and loaded in the background.
+                   Otherwise the envelope is always pushed down to the database.
+        cache: LayerCache to use (default: layer_cache)
+        tables: {name: table} (default: REFERENCE_LAYERS)
+
+    Returns:
+        Ordered {name: GeoDataFrame in ANALYSIS_CRS}
+    """
+    cache = cache or layer_cache
+    layers = {}
+    for name, table in (tables or REFERENCE_LAYERS).items():
+        layer = cache.peek(name) if use_cache else None
+        if layer is not None:
+            # Only the candidates whose bbox hits the upload
+            layers[name] = layer.query(gdf_input.geometry.values)
+            continue
+
+        # Push the upload envelope down to the database
+        layers[name] = load_layer_from_db(table, bbox=input_bbox).to_crs(ANALYSIS_CRS)
+        if use_cache:
+            cache.warm(name)
+    return layers
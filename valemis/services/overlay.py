@@ -0,0 +1,202 @@
+"""
+Spatial Overlay Service
+
+Overlay per layer referensi dengan geometri upload. Layer saling
+independen, jadi dijalankan paralel di process pool (shapely dan pandas
+masih memegang GIL di beberapa bagian).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+import json
+import logging
+import math
+import multiprocessing
+import os
+import threading
+
+from .layers import GEOPANDAS_AVAILABLE, SOURCE_CRS, get_spatial_config
+
+if GEOPANDAS_AVAILABLE:
+    import geopandas as gpd
+    import numpy as np
+    import shapely
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Web Mercator ground resolution at the equator, zoom 0 (m/pixel)
+EQUATOR_RESOLUTION = 156543.03392
+
+# Accepted response parameters (api_analyze); larger values are clamped
+MAX_ZOOM = 24
+MAX_PRECISION = 15
+
+
+def zoom_tolerance(zoom: int, latitude: float, pixels: float = 0.5) -> float:
+    """Simplification tolerance in meters that stays below ``pixels`` at ``zoom``"""
+    return EQUATOR_RESOLUTION * math.cos(math.radians(latitude)) / (2 ** zoom) * pixels
+
+
+def to_geojson(gdf, tolerance: Optional[float] = None, precision: Optional[int] = None) -> str:
+    """
+    Serialize a GeoDataFrame in ANALYSIS_CRS to a GeoJSON string in SOURCE_CRS
+
+    Args:
+        tolerance: Topology-preserving simplification tolerance (meters)
+        precision: Number of decimals kept in the output coordinates
+    """
+    if tolerance:
+        gdf = gdf.set_geometry(gdf.geometry.simplify(tolerance, preserve_topology=True))
+
+    gdf = gdf.to_crs(SOURCE_CRS)
+
+    if precision is not None:
+        rounded = shapely.transform(gdf.geometry.values, lambda coords: np.round(coords, precision))
+        gdf = gdf.set_geometry(gpd.GeoSeries(rounded, index=gdf.index, crs=SOURCE_CRS))
+
+    return gdf.to_json()
+
+
+def render_response(input_geojson: str, results: List[Tuple[str, Dict, Optional[str]]]) -> str:
+    """
+    Build the api_analyze body from already-serialized GeoJSON strings
+
+    The layer GeoJSON is spliced in as-is instead of being parsed back
+    into dicts and serialized a second time.
+    """
+    layers = ", ".join(
+        f"{json.dumps(name)}: {geojson or 'null'}" for name, _, geojson in results
+    )
+    stats = json.dumps([stat for _, stat, _ in results])
+
+    return f'{{"input": {input_geojson}, "layers": {{{layers}}}, "stats": {stats}}}'
+
+
+def clip_layer(gdf, gdf_input):
+    """Intersection of reference layer candidates with the upload (ANALYSIS_CRS)"""
+    if gdf.empty:
+        return gdf
+    return gpd.overlay(gdf, gdf_input, how="intersection")
+
+
+def layer_stat(name: str, clipped) -> Dict:
+    """Feature count and area of a clipped layer; adds the area_m2 column"""
+    area_m2 = 0
+    if not clipped.empty:
+        clipped["area_m2"] = clipped.geometry.area
+        area_m2 = clipped["area_m2"].sum()
+
+    return {
+        "layer": name,
+        "jumlah_fitur": len(clipped),
+        "luas_m2": round(area_m2, 2),
+        "luas_ha": round(area_m2 / 10000, 4)
+    }
+
+
+def analyze_layer(
+    name: str,
+    gdf,
+    gdf_input,
+    tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+) -> Tuple[Dict, str]:
+    """
+    Intersect one reference layer with the uploaded geometry
+
+    Runs inside a worker process, so it must not touch Django.
+
+    Args:
+        name: Layer name
+        gdf: Reference layer (candidates) in ANALYSIS_CRS
+        gdf_input: Uploaded geometry in ANALYSIS_CRS
+        tolerance: Output simplification tolerance (meters), see to_geojson()
+        precision: Output coordinate decimals, see to_geojson()
+
+    Returns:
+        (stat, geojson) - geojson is a GeoJSON string or None
+    """
+    clipped = clip_layer(gdf, gdf_input)
+    stat = layer_stat(name, clipped)
+
+    # Areas come from the full-resolution geometry
+    geojson = None if clipped.empty else to_geojson(clipped, tolerance, precision)
+    return stat, geojson
+
+
+def _pool_size() -> int:
+    workers = get_spatial_config('OVERLAY_WORKERS')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def get_executor():
+    """Process pool shared by every request in this worker process"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a threaded app server is not safe
+            _executor = ProcessPoolExecutor(
+                max_workers=_pool_size(),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _reset_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def run_overlays(
+    layers: Dict,
+    gdf_input,
+    tolerance: Optional[float] = None,
+    precision: Optional[int] = None,
+) -> List[Tuple[str, Dict, str]]:
+    """
+    Overlay every layer with the upload
+
+    Args:
+        layers: Ordered {name: GeoDataFrame in ANALYSIS_CRS}
+        gdf_input: Uploaded geometry in ANALYSIS_CRS
+        tolerance: Output simplification tolerance (meters)
+        precision: Output coordinate decimals
+
+    Returns:
+        List of (name, stat, geojson) in the order of ``layers``
+    """
+    # Layers without candidates are answered without a round trip to the pool
+    busy = [name for name, gdf in layers.items() if not gdf.empty]
+
+    if _pool_size() > 1 and len(busy) > 1:
+        try:
+            executor = get_executor()
+            futures = {
+                name: executor.submit(analyze_layer, name, layers[name], gdf_input, tolerance, precision)
+                for name in busy
+            }
+            done = {name: future.result() for name, future in futures.items()}
+        except BrokenProcessPool:
+            logger.warning("Overlay process pool broke, falling back to sequential overlay")
+            _reset_executor()
+            done = {}
+    else:
+        done = {}
+
+    results = []
+    for name, gdf in layers.items():
+        stat, geojson = done.get(name) or analyze_layer(name, gdf, gdf_input, tolerance, precision)
+        results.append((name, stat, geojson))
+
+    return results
@@ -0,0 +1,126 @@
+"""
+Analysis Result Cache
+
+Cache in-process untuk response api_analyze, di-key dengan hash geometri
+input (dinormalisasi, tidak tergantung nama file) + versi semua layer
+referensi. LRU dengan batas ukuran total (byte UTF-8 dari body).
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import hashlib
+import json
+import threading
+
+from .layers import GEOPANDAS_AVAILABLE, REFERENCE_LAYERS, SOURCE_CRS, get_spatial_config, layer_cache
+
+if GEOPANDAS_AVAILABLE:
+    import shapely
+
+
+def input_hash(gdf_input) -> str:
+    """
+    Content hash of the uploaded features
+
+    Geometries are compared in SOURCE_CRS after shapely.normalize, so the
+    same boundary re-exported or renamed hashes the same. Feature order
+    does not matter; attributes do (they end up in the output).
+    """
+    gdf = gdf_input.to_crs(SOURCE_CRS)
+    columns = [c for c in gdf.columns if c != gdf.geometry.name]
+
+    digests = []
+    for geom, (_, row) in zip(gdf.geometry.values, gdf[columns].iterrows()):
+        digest = hashlib.sha256()
+        if geom is not None:
+            digest.update(shapely.to_wkb(shapely.normalize(geom)))
+        digest.update(json.dumps(row.to_dict(), sort_keys=True, default=str).encode('utf-8'))
+        digests.append(digest.hexdigest())
+
+    return hashlib.sha256("".join(sorted(digests)).encode('utf-8')).hexdigest()
+
+
+def layer_versions() -> Dict[str, str]:
+    """
+    Current version of every reference layer
+
+    Without the layer cache the layers are only fingerprinted, still at
+    most every LAYER_CHECK_INTERVAL seconds
+    """
+    if get_spatial_config('LAYER_CACHE_ENABLED', True):
+        return layer_cache.versions()
+    return {name: layer_cache.signature(name) for name in REFERENCE_LAYERS}
+
+
+class AnalysisResultCache:
+    """Size-bounded LRU of serialized api_analyze responses"""
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes
+        # key -> (versions_key, body, size in bytes)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._versions_key = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def versions_key(versions: Dict[str, str]) -> str:
+        return hashlib.sha256(json.dumps(versions, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_key(geometry_hash: str, versions_key: str, **options) -> str:
+        options_key = json.dumps(options, sort_keys=True)
+        return hashlib.sha256(f"{geometry_hash}:{versions_key}:{options_key}".encode('utf-8')).hexdigest()
+
+    def _limit(self) -> int:
+        if self.max_bytes is not None:
+            return self.max_bytes
+        return get_spatial_config('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024)
+
+    def _drop(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._size -= size
+
+    def _observe_versions(self, versions_key: str):
+        """A layer changed: everything computed against the old versions is dead"""
+        if versions_key == self._versions_key:
+            return
+        for key in [k for k, (v, _, _) in self._entries.items() if v != versions_key]:
+            self._drop(key)
+        self._versions_key = versions_key
+
+    def get(self, key: str, versions_key: str) -> Optional[str]:
+        with self._lock:
+            self._observe_versions(versions_key)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, versions_key: str, body: str):
+        limit = self._limit()
+        # Non-ASCII attributes take more than one byte per character
+        size = len(body.encode('utf-8'))
+        if size > limit:
+            return
+
+        with self._lock:
+            self._observe_versions(versions_key)
+            if key in self._entries:
+                self._drop(key)
+
+            self._entries[key] = (versions_key, body, size)
+            self._size += size
+
+            # Evict least recently used
+            while self._size > limit:
+                self._drop(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+result_cache = AnalysisResultCache()
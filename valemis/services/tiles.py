@@ -0,0 +1,218 @@
+"""
+Vector Tile Service
+
+Mapbox Vector Tiles (MVT) untuk layer referensi dan PolygonClaim/Parcel:
+- Layer referensi diambil dari layer_cache (UTM + STRtree, sama dengan
+  api_analyze); hanya kandidat per tile yang diproyeksikan ke Web Mercator
+- PolygonClaim/Parcel dimuat dalam Web Mercator saat tile pertama diminta
+- Clip dan simplifikasi per zoom
+- Cache tile di disk, per versi layer (versi baru = cache lama dibuang)
+"""
+
+from typing import Optional
+import hashlib
+import logging
+import math
+import os
+import shutil
+import threading
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from .layers import (
+    GEOPANDAS_AVAILABLE,
+    REFERENCE_LAYERS,
+    LayerCache,
+    get_spatial_config,
+    layer_cache,
+    load_parcels,
+    load_polygon_claims,
+    parcel_signature,
+    polygon_claim_signature,
+)
+
+if GEOPANDAS_AVAILABLE:
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import box
+
+try:
+    import mapbox_vector_tile
+    MVT_AVAILABLE = True
+except ImportError:
+    MVT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+WEB_MERCATOR = "EPSG:3857"
+WEB_MERCATOR_HALF = 20037508.342789244
+TILE_EXTENT = 4096
+TILE_BUFFER = 64  # in tile units, avoids seams between neighbouring tiles
+
+# Edges of reprojected boxes are densified to this many segments per side
+DENSIFY_SEGMENTS = 16
+
+# Only tile layers (reference layers come from layer_cache), loaded on demand
+claim_cache = LayerCache({}, crs=WEB_MERCATOR)
+claim_cache.register('Polygon Claim', polygon_claim_signature, load_polygon_claims)
+claim_cache.register('Parcel', parcel_signature, load_parcels)
+
+# URL slug -> (LayerCache, layer name)
+TILE_LAYERS = {slugify(name): (layer_cache, name) for name in REFERENCE_LAYERS}
+TILE_LAYERS.update({
+    'polygon-claim': (claim_cache, 'Polygon Claim'),
+    'parcel': (claim_cache, 'Parcel'),
+})
+
+# (layer name, version) -> layer extent in Web Mercator
+_extents = {}
+_prune_lock = threading.Lock()
+
+
+def tile_bounds(z: int, x: int, y: int):
+    """(minx, miny, maxx, maxy) of an XYZ tile in Web Mercator"""
+    size = 2 * WEB_MERCATOR_HALF / (2 ** z)
+    minx = -WEB_MERCATOR_HALF + x * size
+    maxy = WEB_MERCATOR_HALF - y * size
+    return (minx, maxy - size, minx + size, maxy)
+
+
+def is_valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= 24 and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def _properties(row, columns) -> dict:
+    """JSON-safe feature properties (MVT has no null values)"""
+    props = {}
+    for col in columns:
+        value = row[col]
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            continue
+        props[col] = value.item() if hasattr(value, 'item') else value
+    return props
+
+
+def _reproject_box(geom, source_crs, target_crs):
+    """Envelope of a box in another CRS (edges densified, they may curve)"""
+    minx, miny, maxx, maxy = geom.bounds
+    densified = shapely.segmentize(geom, max(maxx - minx, maxy - miny) / DENSIFY_SEGMENTS)
+    return gpd.GeoSeries([densified], crs=source_crs).to_crs(target_crs).iloc[0].envelope
+
+
+def _mercator_extent(layer):
+    """Extent of a layer in Web Mercator (None if empty), cached per version"""
+    key = (layer.name, layer.version)
+    if key not in _extents:
+        extent = None
+        if not layer.gdf.empty:
+            extent = _reproject_box(box(*layer.gdf.total_bounds), layer.gdf.crs, WEB_MERCATOR)
+        # Older versions of the layer are not needed any more
+        for old in [k for k in _extents if k[0] == layer.name]:
+            _extents.pop(old, None)
+        _extents[key] = extent
+    return _extents[key]
+
+
+def _tile_candidates(layer, clip_box):
+    """Features of ``layer`` whose bbox hits ``clip_box``, in Web Mercator"""
+    if layer.gdf.crs == WEB_MERCATOR:
+        return layer.query([clip_box])
+
+    # Low zoom tiles cover areas outside the layer CRS (UTM zone): only the
+    # part of the tile over the layer is reprojected
+    extent = _mercator_extent(layer)
+    if extent is None or not extent.intersects(clip_box):
+        return layer.gdf.iloc[:0].to_crs(WEB_MERCATOR)
+
+    query_box = _reproject_box(clip_box.intersection(extent), WEB_MERCATOR, layer.gdf.crs)
+    return layer.query([query_box]).to_crs(WEB_MERCATOR)
+
+
+def render_tile(slug: str, z: int, x: int, y: int) -> bytes:
+    """Encode one tile of a layer"""
+    cache, name = TILE_LAYERS[slug]
+    layer = cache.get(name)
+    bounds = tile_bounds(z, x, y)
+
+    resolution = (bounds[2] - bounds[0]) / TILE_EXTENT
+    pad = resolution * TILE_BUFFER
+    clip_box = box(bounds[0] - pad, bounds[1] - pad, bounds[2] + pad, bounds[3] + pad)
+
+    candidates = _tile_candidates(layer, clip_box)
+    if candidates.empty:
+        return b''
+
+    clipped = candidates.clip(clip_box)
+    clipped = clipped[~clipped.geometry.is_empty]
+    if clipped.empty:
+        return b''
+
+    # Drop detail smaller than one tile unit
+    geometries = clipped.geometry.simplify(resolution, preserve_topology=True)
+    columns = [c for c in clipped.columns if c != clipped.geometry.name]
+
+    features = [
+        {'geometry': geom, 'properties': _properties(row, columns)}
+        for geom, (_, row) in zip(geometries, clipped.iterrows())
+        if geom is not None and not geom.is_empty
+    ]
+
+    return mapbox_vector_tile.encode(
+        [{'name': slug, 'features': features}],
+        default_options={
+            'quantize_bounds': bounds,
+            'extents': TILE_EXTENT,
+            'on_invalid_geometry': mapbox_vector_tile.encoder.on_invalid_geometry_make_valid,
+        },
+    )
+
+
+def _cache_root() -> str:
+    return str(get_spatial_config('TILE_CACHE_DIR') or os.path.join(settings.MEDIA_ROOT, 'tiles'))
+
+
+def _prune_versions(layer_dir: str, keep: str):
+    """Remove tiles rendered from older versions of a layer"""
+    with _prune_lock:
+        if not os.path.isdir(layer_dir):
+            return
+        for entry in os.listdir(layer_dir):
+            if entry != keep:
+                shutil.rmtree(os.path.join(layer_dir, entry), ignore_errors=True)
+
+
+def get_tile(slug: str, z: int, x: int, y: int) -> Optional[bytes]:
+    """
+    Return a tile from the disk cache, rendering it on a miss
+
+    Returns:
+        Tile bytes (possibly empty), or None for an unknown layer
+    """
+    if slug not in TILE_LAYERS:
+        return None
+
+    cache, name = TILE_LAYERS[slug]
+    version = cache.get(name).version
+    version_key = hashlib.sha1(version.encode('utf-8')).hexdigest()[:12]
+
+    layer_dir = os.path.join(_cache_root(), slug)
+    version_dir = os.path.join(layer_dir, version_key)
+    path = os.path.join(version_dir, str(z), str(x), f"{y}.mvt")
+
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    if not os.path.isdir(version_dir):
+        _prune_versions(layer_dir, keep=version_key)
+
+    data = render_tile(slug, z, x, y)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+    return data
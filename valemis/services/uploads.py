@@ -0,0 +1,219 @@
+"""
+Spatial Upload Reader
+
+Membaca file spasial hasil upload tanpa mengekstrak arsip:
+- Zip dibaca langsung lewat path virtual GDAL (/vsizip/), hanya member
+  yang dibutuhkan (.shp/.shx/.dbf/.prj/.cpg) yang dibuka
+- Batas ukuran upload (dicek saat request dibaca, lewat upload handler)
+  dan ukuran hasil dekompresi
+- Dataset di dalam zip dipilih lewat 'dataset' (nama file tanpa ekstensi,
+  atau path di dalam zip jika namanya sama), layer GeoPackage lewat 'layer'
+"""
+
+from typing import List, Optional
+import os
+import tempfile
+import zipfile
+
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+from .layers import GEOPANDAS_AVAILABLE, get_spatial_config
+
+if GEOPANDAS_AVAILABLE:
+    import geopandas as gpd
+
+# Urutan = prioritas jika arsip berisi beberapa jenis file
+SPATIAL_EXTENSIONS = (".shp", ".gpkg", ".geojson", ".json", ".kml")
+SHAPEFILE_SIDECARS = (".shx", ".dbf", ".prj", ".cpg")
+SHAPEFILE_REQUIRED = (".shx", ".dbf")
+
+
+class UploadError(ValueError):
+    """Upload ditolak: format tidak didukung, terlalu besar, atau ambigu"""
+
+
+class UploadSizeLimit(FileUploadHandler):
+    """
+    Stops reading an uploaded file as soon as it exceeds MAX_UPLOAD_BYTES,
+    before Django has buffered it in memory or streamed it to disk.
+    Installed per request by limit_upload_size().
+    """
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_bytes = get_spatial_config('MAX_UPLOAD_BYTES', 200 * 1024 * 1024)
+        self.exceeded = False
+        self._body_too_large = False
+        self._received = 0
+
+    @property
+    def message(self) -> str:
+        return f"Upload exceeds {self.max_bytes} bytes"
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Content-Length is known up front: no need to read the file at all
+        self._body_too_large = content_length > self.max_bytes
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._received = 0
+        if self._body_too_large:
+            self._stop()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._received += len(raw_data)
+        if self._received > self.max_bytes:
+            self._stop()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+    def _stop(self):
+        self.exceeded = True
+        # The rest of the body is read and discarded, so the client gets a response
+        raise StopUpload(connection_reset=False)
+
+
+def limit_upload_size(request) -> UploadSizeLimit:
+    """
+    Enforce MAX_UPLOAD_BYTES while ``request.FILES`` is parsed; call before
+    accessing it and check ``.exceeded`` afterwards
+    """
+    handler = UploadSizeLimit(request)
+    request.upload_handlers.insert(0, handler)
+    return handler
+
+
+def _ext(name: str) -> str:
+    return os.path.splitext(name)[1].lower()
+
+
+def _stem(name: str) -> str:
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def _choose(options: List[str], selected: Optional[str], kind: str, param: str) -> str:
+    """Pick one entry by name (request parameter ``param``), or the only one"""
+    if selected:
+        if selected not in options:
+            raise UploadError(f"'{selected}' not found. Available {kind}: {', '.join(options)}")
+        return selected
+
+    if len(options) == 1:
+        return options[0]
+
+    raise UploadError(f"Multiple {kind} found, choose one with '{param}': {', '.join(options)}")
+
+
+def _select_zip_member(archive: zipfile.ZipFile, dataset: Optional[str]):
+    """
+    Pick the dataset inside a zip without extracting it
+
+    Returns:
+        (member name, member names needed to read it)
+    """
+    names = [
+        info.filename for info in archive.infolist()
+        if not info.is_dir()
+        and not info.filename.startswith('__MACOSX/')
+        and not os.path.basename(info.filename).startswith('.')
+    ]
+    lookup = {name.lower(): name for name in names}
+
+    for ext in SPATIAL_EXTENSIONS:
+        datasets = {}
+        for name in sorted(names):
+            if _ext(name) != ext:
+                continue
+
+            needed = [name]
+            if ext == ".shp":
+                base = os.path.splitext(name)[0].lower()
+                if any(base + sidecar not in lookup for sidecar in SHAPEFILE_REQUIRED):
+                    continue  # incomplete shapefile
+                needed += [lookup[base + s] for s in SHAPEFILE_SIDECARS if base + s in lookup]
+
+            # Keyed by path: a/roads.shp and b/roads.shp are two datasets
+            datasets[os.path.splitext(name)[0]] = (name, needed)
+
+        if not datasets:
+            continue
+
+        if dataset in datasets:
+            return datasets[dataset]
+
+        # Offered by file name, or by path where file names repeat
+        stems = [_stem(path) for path in datasets]
+        options = {
+            (_stem(path) if stems.count(_stem(path)) == 1 else path): path
+            for path in datasets
+        }
+        return datasets[options[_choose(sorted(options), dataset, 'datasets', 'dataset')]]
+
+    raise UploadError("Unsupported spatial file")
+
+
+def _read_dataset(path: str, layer: Optional[str]):
+    if path.lower().endswith(".gpkg"):
+        layers = [str(name) for name in gpd.list_layers(path)["name"]]
+        return gpd.read_file(path, layer=_choose(layers, layer, 'layers', 'layer'))
+
+    return gpd.read_file(path)
+
+
+def _read_local(path: str, name: str, layer: Optional[str], dataset: Optional[str]):
+    if zipfile.is_zipfile(path):
+        max_uncompressed = get_spatial_config('MAX_UNCOMPRESSED_BYTES', 1024 * 1024 * 1024)
+
+        with zipfile.ZipFile(path, "r") as archive:
+            member, needed = _select_zip_member(archive, dataset)
+            size = sum(archive.getinfo(n).file_size for n in needed)
+
+        if size > max_uncompressed:
+            raise UploadError(f"Uncompressed dataset exceeds {max_uncompressed} bytes")
+
+        return _read_dataset(f"/vsizip/{path}/{member}", layer)
+
+    ext = _ext(name)
+    if ext == ".shp":
+        raise UploadError("Shapefiles must be uploaded as a .zip with .shx and .dbf")
+    if ext not in SPATIAL_EXTENSIONS:
+        raise UploadError("Unsupported spatial file")
+
+    return _read_dataset(path, layer)
+
+
+def read_uploaded_file(uploaded_file, layer: Optional[str] = None, dataset: Optional[str] = None):
+    """
+    Read an uploaded spatial file into a GeoDataFrame
+
+    Args:
+        uploaded_file: Django UploadedFile
+        layer: Layer name inside a GeoPackage
+        dataset: File name without extension of the dataset inside a zip
+            (e.g. 'batas_desa' for batas_desa.shp), or its path inside the
+            zip when several datasets share a name (e.g. 'data/batas_desa')
+
+    Returns:
+        GeoDataFrame
+
+    Raises:
+        UploadError: unsupported, too large or ambiguous upload
+    """
+    # Also enforced while the request is read, see limit_upload_size()
+    max_upload = get_spatial_config('MAX_UPLOAD_BYTES', 200 * 1024 * 1024)
+    if uploaded_file.size > max_upload:
+        raise UploadError(f"Upload exceeds {max_upload} bytes")
+
+    # Large uploads were already streamed to disk by Django's upload handler
+    if hasattr(uploaded_file, 'temporary_file_path'):
+        return _read_local(uploaded_file.temporary_file_path(), uploaded_file.name, layer, dataset)
+
+    # Small in-memory upload: spool it with the original extension
+    with tempfile.NamedTemporaryFile(suffix=_ext(uploaded_file.name)) as tmp:
+        for chunk in uploaded_file.chunks():
+            tmp.write(chunk)
+        tmp.flush()
+
+        return _read_local(tmp.name, uploaded_file.name, layer, dataset)
@@ -1,3 +1,660 @@
-from django.test import TestCase
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock, skipUnless
+import json
+import os
+import tempfile
+import zipfile
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from django.test import RequestFactory, SimpleTestCase, TestCase
+
+from .services import analysis_jobs, benchmark, layers, overlaps, overlay, tiles
+from .services.layers import GEOPANDAS_AVAILABLE, LayerCache
+from .services.result_cache import AnalysisResultCache
+from .models import FailedJob, Job, JobBatch, ParcelLayerOverlap, PolygonClaim
+from .services.uploads import UploadError, UploadSizeLimit, read_uploaded_file
+from .views import _int_param, api_analyze
+
+if GEOPANDAS_AVAILABLE:
+    import geopandas as gpd
+    import shapely
+    from shapely.geometry import box
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class BenchmarkHarnessTests(TestCase):
+    """services/benchmark.py times the service functions used by api_analyze"""
+
+    def run_small(self, **kwargs):
+        options = dict(layers=2, features=20, vertices=16, upload_features=2, upload_vertices=32, repeat=2)
+        options.update(kwargs)
+        return benchmark.run_benchmark(**options)
+
+    def test_reports_every_stage(self):
+        result = self.run_small()
+
+        self.assertEqual(set(result['stages']), set(benchmark.STAGES))
+        self.assertEqual(result['config']['vendor'], 'sqlite')
+        for timing in list(result['stages'].values()) + [result['total']]:
+            self.assertGreaterEqual(timing['median'], 0)
+            self.assertLessEqual(timing['min'], timing['median'])
+
+    def test_calls_the_service_functions(self):
+        with mock.patch.object(benchmark, 'fetch_layer_wkb', wraps=benchmark.fetch_layer_wkb) as fetch, \
+                mock.patch.object(benchmark, 'clip_layer', wraps=benchmark.clip_layer) as clip, \
+                mock.patch.object(benchmark, 'layer_stat', wraps=benchmark.layer_stat) as area, \
+                mock.patch.object(benchmark, 'render_response', wraps=benchmark.render_response) as render:
+            self.run_small(repeat=1)
+
+        # One warm-up pass + one timed pass, two layers each
+        self.assertEqual(fetch.call_count, 4)
+        self.assertEqual([c[0][0] for c in fetch.call_args_list[:2]], ['bench_layer_0', 'bench_layer_1'])
+        self.assertEqual(clip.call_count, 4)
+        self.assertEqual([c[0][0] for c in area.call_args_list[:2]], ['BENCH0', 'BENCH1'])
+        self.assertEqual(render.call_count, 2)
+
+    def test_bbox_mode_reads_only_the_envelope(self):
+        with mock.patch.object(benchmark, 'parse_layer_wkb', wraps=benchmark.parse_layer_wkb) as parse:
+            result = self.run_small(repeat=1, use_bbox=True)
+
+        self.assertEqual(result['stages']['candidates']['median'], 0)
+        # Plain SQLite cannot filter in the query: the envelope is applied after parsing
+        self.assertIsNotNone(parse.call_args[1]['bbox'])
+
+    def test_find_regressions(self):
+        def result(median):
+            timing = {'min': median, 'median': median, 'mean': median}
+            return {
+                'stages': {stage: dict(timing) for stage in benchmark.STAGES},
+                'total': {'min': 1.0, 'median': 1.0, 'mean': 1.0},
+            }
+
+        baseline = result(0.1)
+        current = result(0.1)
+        current['stages']['overlay']['median'] = 0.2
+
+        regressions = benchmark.find_regressions(current, baseline, threshold=0.2)
+        self.assertEqual([r['stage'] for r in regressions], ['overlay'])
+        self.assertAlmostEqual(regressions[0]['ratio'], 2.0)
+        self.assertEqual(benchmark.find_regressions(baseline, baseline), [])
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class UploadReaderTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+
+    def write(self, name, features=1, layer=None):
+        gdf = gpd.GeoDataFrame(
+            {'n': list(range(features))},
+            geometry=[box(i, 0, i + 1, 1) for i in range(features)],
+            crs='EPSG:4326',
+        )
+        gdf.to_file(os.path.join(self.dir, name), layer=layer)
+
+    def zipped(self, name, members):
+        buffer = os.path.join(self.dir, name)
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for member in members:
+                archive.write(os.path.join(self.dir, member), f'data/{member}')
+        with open(buffer, 'rb') as f:
+            return SimpleUploadedFile(name, f.read())
+
+    def shapefile(self, stem, features):
+        self.write(f'{stem}.shp', features)
+        return [f'{stem}{ext}' for ext in ('.shp', '.shx', '.dbf', '.prj')]
+
+    def test_zip_dataset_is_chosen_by_name(self):
+        members = self.shapefile('parcel', 1) + self.shapefile('desa', 3)
+
+        with self.assertRaises(UploadError):
+            read_uploaded_file(self.zipped('two.zip', members))
+        self.assertEqual(len(read_uploaded_file(self.zipped('two.zip', members), dataset='desa')), 3)
+
+    def test_zip_datasets_with_the_same_name(self):
+        self.shapefile('roads', 1)
+        with zipfile.ZipFile(os.path.join(self.dir, 'roads.zip'), 'w') as archive:
+            for folder, stem in (('a', 'roads'), ('b', 'roads'), ('b', 'desa')):
+                for ext in ('.shp', '.shx', '.dbf', '.prj'):
+                    archive.write(os.path.join(self.dir, f'roads{ext}'), f'{folder}/{stem}{ext}')
+        with open(os.path.join(self.dir, 'roads.zip'), 'rb') as f:
+            data = f.read()
+
+        with self.assertRaisesMessage(UploadError, 'a/roads, b/roads, desa'):
+            read_uploaded_file(SimpleUploadedFile('roads.zip', data))
+        self.assertEqual(len(read_uploaded_file(SimpleUploadedFile('roads.zip', data), dataset='b/roads')), 1)
+        self.assertEqual(len(read_uploaded_file(SimpleUploadedFile('roads.zip', data), dataset='desa')), 1)
+
+    def test_geopackage_layer_inside_zip(self):
+        self.write('site.gpkg', 1, layer='batas')
+        self.write('site.gpkg', 2, layer='claim')
+        self.write('other.gpkg', 4, layer='claim')
+
+        upload = self.zipped('gpkg.zip', ['site.gpkg', 'other.gpkg'])
+        gdf = read_uploaded_file(upload, dataset='site', layer='claim')
+        self.assertEqual(len(gdf), 2)
+
+        # The layer name does not pick the dataset
+        with self.assertRaises(UploadError):
+            read_uploaded_file(self.zipped('gpkg.zip', ['site.gpkg', 'other.gpkg']), layer='claim')
+
+    def test_geopackage_layer(self):
+        self.write('site.gpkg', 1, layer='batas')
+        self.write('site.gpkg', 2, layer='claim')
+        with open(os.path.join(self.dir, 'site.gpkg'), 'rb') as f:
+            data = f.read()
+
+        with self.assertRaises(UploadError):
+            read_uploaded_file(SimpleUploadedFile('site.gpkg', data))
+        self.assertEqual(len(read_uploaded_file(SimpleUploadedFile('site.gpkg', data), layer='claim')), 2)
+
+    def test_rejects_bare_shapefile(self):
+        with self.assertRaises(UploadError):
+            read_uploaded_file(SimpleUploadedFile('parcel.shp', b'not a zip'))
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class AnalyzeParameterTests(SimpleTestCase):
+    def post(self, **data):
+        upload = SimpleUploadedFile('input.geojson', b'{"type": "FeatureCollection", "features": []}')
+        return RequestFactory().post('/api/analyze/', dict(data, file=upload))
+
+    def test_invalid_zoom_or_precision_is_a_bad_request(self):
+        for data in ({'zoom': 'abc'}, {'precision': '1.5'}):
+            response = api_analyze(self.post(**data))
+            self.assertEqual(response.status_code, 400, data)
+            self.assertIn('must be an integer', response.content.decode())
+
+    def test_oversized_upload_is_not_buffered(self):
+        with self.settings(SPATIAL_ANALYSIS={'MAX_UPLOAD_BYTES': 16}):
+            request = self.post()
+            response = api_analyze(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Upload exceeds 16 bytes', response.content.decode())
+        self.assertNotIn('file', request.FILES)
+
+    def test_upload_limit_counts_chunks(self):
+        handler = UploadSizeLimit()
+        handler.max_bytes = 10
+        handler.handle_raw_input(None, {}, 1000, b'boundary')
+        handler._body_too_large = False  # e.g. chunked request without Content-Length
+
+        handler.new_file('file', 'input.geojson', 'application/json', None)
+        self.assertEqual(handler.receive_data_chunk(b'x' * 8, 0), b'x' * 8)
+        with self.assertRaises(StopUpload):
+            handler.receive_data_chunk(b'x' * 8, 8)
+        self.assertTrue(handler.exceeded)
+
+    def test_values_are_clamped(self):
+        request = self.post(zoom='99', precision='-3')
+
+        self.assertEqual(_int_param(request, 'zoom', 24), 24)
+        self.assertEqual(_int_param(request, 'precision', 15), 0)
+        self.assertIsNone(_int_param(request, 'missing', 15))
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class OverlayPoolTests(SimpleTestCase):
+    def setUp(self):
+        def layer(seed):
+            polygons = benchmark.synthetic_polygons(10, 16, seed=seed)
+            return gpd.GeoDataFrame(geometry=polygons, crs=layers.SOURCE_CRS).to_crs(layers.ANALYSIS_CRS)
+
+        self.layers = {'A': layer(1), 'B': layer(2), 'C': layer(3).iloc[:0]}
+        upload = benchmark.synthetic_polygons(2, 32, radius=0.1, seed=0)
+        self.upload = gpd.GeoDataFrame(geometry=upload, crs=layers.SOURCE_CRS).to_crs(layers.ANALYSIS_CRS)
+        self.addCleanup(overlay._reset_executor)
+
+    def sequential(self):
+        with self.settings(SPATIAL_ANALYSIS={'OVERLAY_WORKERS': 1}):
+            return overlay.run_overlays(self.layers, self.upload)
+
+    def test_pool_uses_spawn(self):
+        with self.settings(SPATIAL_ANALYSIS={'OVERLAY_WORKERS': 2}):
+            executor = overlay.get_executor()
+            self.assertIs(overlay.get_executor(), executor)
+        self.assertEqual(executor._mp_context.get_start_method(), 'spawn')
+
+    def test_pool_matches_sequential_overlay(self):
+        with self.settings(SPATIAL_ANALYSIS={'OVERLAY_WORKERS': 2}):
+            pooled = overlay.run_overlays(self.layers, self.upload)
+
+        self.assertEqual(pooled, self.sequential())
+        self.assertEqual([name for name, _, _ in pooled], ['A', 'B', 'C'])
+
+    def test_broken_pool_falls_back_to_sequential(self):
+        executor = mock.Mock()
+        executor.submit.return_value.result.side_effect = BrokenProcessPool()
+
+        with self.settings(SPATIAL_ANALYSIS={'OVERLAY_WORKERS': 2}), \
+                mock.patch.object(overlay, 'get_executor', return_value=executor), \
+                mock.patch.object(overlay, '_reset_executor') as reset:
+            results = overlay.run_overlays(self.layers, self.upload)
+
+        reset.assert_called_once()
+        # Layers without candidates never go to the pool
+        self.assertEqual(executor.submit.call_count, 2)
+        self.assertEqual(results, self.sequential())
+
+
+class AnalysisResultCacheTests(SimpleTestCase):
+    def test_budget_counts_bytes(self):
+        cache = AnalysisResultCache(max_bytes=10)
+
+        # 6 characters, 12 bytes: larger than the whole budget
+        cache.set('big', 'v1', 'éééééé')
+        self.assertIsNone(cache.get('big', 'v1'))
+
+        cache.set('a', 'v1', 'éé')
+        cache.set('b', 'v1', 'éé')
+        cache.set('c', 'v1', 'éé')
+        # 12 bytes > 10: the least recently used entry is evicted
+        self.assertIsNone(cache.get('a', 'v1'))
+        self.assertEqual(cache.get('c', 'v1'), 'éé')
+
+    def test_new_layer_versions_drop_old_entries(self):
+        cache = AnalysisResultCache(max_bytes=100)
+        cache.set('a', 'v1', 'body')
+
+        self.assertIsNone(cache.get('a', 'v2'))
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class LayerCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.gdf = gpd.GeoDataFrame(
+            geometry=[box(121.30, -2.60, 121.31, -2.59), box(121.40, -2.50, 121.41, -2.49)],
+            crs=layers.SOURCE_CRS,
+        )
+        self.signature = mock.Mock(return_value='v1')
+        self.loader = mock.Mock(return_value=self.gdf)
+        self.cache = LayerCache({})
+        self.cache.register('Layer', self.signature, self.loader)
+
+    def test_layer_is_loaded_once_and_indexed(self):
+        layer = self.cache.get('Layer')
+
+        self.assertIs(self.cache.get('Layer'), layer)
+        self.loader.assert_called_once()
+        self.assertEqual(layer.gdf.crs, layers.ANALYSIS_CRS)
+        self.assertEqual(layer.version, 'v1')
+
+        upload = gpd.GeoSeries([box(121.295, -2.605, 121.305, -2.595)], crs=layers.SOURCE_CRS).to_crs(layers.ANALYSIS_CRS)
+        self.assertEqual(len(layer.query(upload.values)), 1)
+
+    def test_source_is_checked_at_most_every_interval(self):
+        with self.settings(SPATIAL_ANALYSIS={'LAYER_CHECK_INTERVAL': 60}):
+            self.cache.get('Layer')
+            self.signature.return_value = 'v2'
+            self.assertEqual(self.cache.get('Layer').version, 'v1')
+        self.signature.assert_called_once()
+
+        with self.settings(SPATIAL_ANALYSIS={'LAYER_CHECK_INTERVAL': 0}):
+            self.assertEqual(self.cache.get('Layer').version, 'v2')
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_unchanged_source_is_not_reloaded(self):
+        with self.settings(SPATIAL_ANALYSIS={'LAYER_CHECK_INTERVAL': 0}):
+            self.cache.get('Layer')
+            self.cache.get('Layer')
+
+        self.assertEqual(self.signature.call_count, 2)
+        self.loader.assert_called_once()
+
+    def test_invalidate(self):
+        self.cache.get('Layer')
+        self.cache.invalidate('Layer')
+        self.cache.get('Layer')
+        self.cache.invalidate()
+        self.cache.get('Layer')
+
+        self.assertEqual(self.loader.call_count, 3)
+
+    def test_invalidate_drops_throttled_signatures(self):
+        with self.settings(SPATIAL_ANALYSIS={'LAYER_CHECK_INTERVAL': 60}):
+            self.assertEqual(self.cache.signature('Layer'), 'v1')
+            self.signature.return_value = 'v2'
+            self.assertEqual(self.cache.signature('Layer'), 'v1')
+
+            self.cache.invalidate('Layer')
+            self.assertEqual(self.cache.signature('Layer'), 'v2')
+        self.loader.assert_not_called()
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class LayerQueryTests(SimpleTestCase):
+    def setUp(self):
+        self.geoms = [box(121.30, -2.60, 121.31, -2.59), box(121.40, -2.50, 121.41, -2.49)]
+
+    def load(self, vendor, bbox=None):
+        cursor = mock.MagicMock()
+        cursor.fetchall.return_value = [(memoryview(shapely.to_wkb(g)),) for g in self.geoms]
+        db = mock.MagicMock(vendor=vendor)
+        db.ops = mock.Mock(spec=['quote_name'])
+        db.ops.quote_name.side_effect = lambda name: f'"{name}"'
+        db.cursor.return_value.__enter__.return_value = cursor
+
+        with mock.patch.object(layers, 'connection', db):
+            gdf = layers.load_layer_from_db('kawasan hutan', bbox=bbox)
+        return gdf, cursor.execute.call_args[0]
+
+    def test_postgis_envelope_is_pushed_down(self):
+        gdf, (sql, params) = self.load('postgresql', bbox=(121.2, -2.7, 121.35, -2.55))
+
+        self.assertIn('FROM "kawasan hutan" WHERE ogr_geometry && ST_MakeEnvelope(%s, %s, %s, %s, 4326)', sql)
+        self.assertEqual(params, [121.2, -2.7, 121.35, -2.55])
+        # The database filtered: rows are not filtered again
+        self.assertEqual(len(gdf), 2)
+        self.assertEqual(gdf.crs, layers.SOURCE_CRS)
+
+    def test_sql_server_envelope_is_pushed_down(self):
+        _, (sql, params) = self.load('microsoft', bbox=(121.2, -2.7, 121.35, -2.55))
+
+        self.assertIn('ogr_geometry.STIntersects(geometry::STGeomFromText(%s, 4326)) = 1', sql)
+        self.assertEqual(params, [box(121.2, -2.7, 121.35, -2.55).wkt])
+
+    def test_without_bbox_the_whole_layer_is_read(self):
+        _, (sql, params) = self.load('postgresql')
+
+        self.assertNotIn('WHERE', sql)
+        self.assertEqual(params, [])
+
+    def test_plain_sqlite_filters_after_parsing(self):
+        gdf, (sql, params) = self.load('sqlite', bbox=(121.2, -2.7, 121.35, -2.55))
+
+        self.assertNotIn('WHERE', sql)
+        self.assertEqual(len(gdf), 1)
+
+
+class LayerSignatureTests(SimpleTestCase):
+    def test_signature_is_throttled_without_loading(self):
+        signature = mock.Mock(return_value='v1')
+        loader = mock.Mock()
+        cache = LayerCache({})
+        cache.register('Layer', signature, loader)
+
+        with self.settings(SPATIAL_ANALYSIS={'LAYER_CHECK_INTERVAL': 60}):
+            self.assertEqual(cache.signature('Layer'), 'v1')
+            self.assertEqual(cache.signature('Layer'), 'v1')
+        signature.assert_called_once()
+        loader.assert_not_called()
+
+        with self.settings(SPATIAL_ANALYSIS={'LAYER_CHECK_INTERVAL': 0}):
+            signature.return_value = 'v2'
+            self.assertEqual(cache.signature('Layer'), 'v2')
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class CandidateLayerTests(SimpleTestCase):
+    def setUp(self):
+        self.gdf = gpd.GeoDataFrame(geometry=[box(0, 0, 1, 1), box(5, 5, 6, 6)], crs=layers.SOURCE_CRS)
+        self.cache = LayerCache({})
+        self.cache.register('Layer', mock.Mock(return_value='v1'), mock.Mock(return_value=self.gdf))
+        self.upload = gpd.GeoDataFrame(geometry=[box(0, 0, 0.5, 0.5)], crs=layers.SOURCE_CRS).to_crs(layers.ANALYSIS_CRS)
+
+    def candidates(self):
+        with mock.patch.object(layers, 'load_layer_from_db', return_value=self.gdf.iloc[:1]) as load, \
+                mock.patch.object(self.cache, 'warm') as warm:
+            result = layers.candidate_layers(
+                self.upload, (0, 0, 0.5, 0.5), cache=self.cache, tables={'Layer': 'layer'}
+            )
+        return result['Layer'], load, warm
+
+    def test_cold_layer_uses_the_bbox_query(self):
+        candidates, load, warm = self.candidates()
+
+        self.assertEqual(len(candidates), 1)
+        load.assert_called_once_with('layer', bbox=(0, 0, 0.5, 0.5))
+        warm.assert_called_once_with('Layer')
+
+    def test_loaded_layer_uses_the_strtree(self):
+        self.cache.get('Layer')
+        candidates, load, warm = self.candidates()
+
+        self.assertEqual(len(candidates), 1)
+        load.assert_not_called()
+        warm.assert_not_called()
+
+    def test_warm_loads_in_the_background(self):
+        self.cache.warm('Layer')
+        self.cache._executor.shutdown(wait=True)
+
+        self.assertIsNotNone(self.cache.peek('Layer'))
+
+
+@skipUnless(GEOPANDAS_AVAILABLE and tiles.MVT_AVAILABLE, 'geopandas / mapbox-vector-tile not installed')
+class VectorTileTests(SimpleTestCase):
+    def setUp(self):
+        # Two parcels near Sorowako, one far away
+        gdf = gpd.GeoDataFrame(
+            {'nama': ['a', 'b', 'c']},
+            geometry=[box(121.35, -2.55, 121.36, -2.54), box(121.37, -2.55, 121.38, -2.54), box(125, -1, 125.01, -0.99)],
+            crs=layers.SOURCE_CRS,
+        )
+        self.loader = mock.Mock(return_value=gdf)
+        self.cache = LayerCache({})
+        self.cache.register('Layer', mock.Mock(return_value='v1'), self.loader)
+        patcher = mock.patch.dict(tiles.TILE_LAYERS, {'layer': (self.cache, 'Layer')})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def decode(self, data):
+        import mapbox_vector_tile
+        return mapbox_vector_tile.decode(data).get('layer', {}).get('features', [])
+
+    def test_reference_layers_share_the_analysis_cache(self):
+        self.assertIs(tiles.TILE_LAYERS['apl'][0], layers.layer_cache)
+        self.assertEqual(self.cache.crs, layers.ANALYSIS_CRS)
+
+    def test_render_tile_reprojects_the_candidates(self):
+        # z=12 tile over the first two parcels
+        features = self.decode(tiles.render_tile('layer', 12, 3428, 2076))
+        self.assertEqual(sorted(f['properties']['nama'] for f in features), ['a', 'b'])
+
+        # z=4: the tile extends far outside the UTM zone
+        features = self.decode(tiles.render_tile('layer', 4, 13, 8))
+        self.assertEqual(sorted(f['properties']['nama'] for f in features), ['a', 'b', 'c'])
+
+        self.assertEqual(tiles.render_tile('layer', 12, 0, 0), b'')
+        self.loader.assert_called_once()
+
+    def test_is_valid_tile(self):
+        self.assertTrue(tiles.is_valid_tile(0, 0, 0))
+        self.assertTrue(tiles.is_valid_tile(3, 7, 7))
+        self.assertFalse(tiles.is_valid_tile(3, 8, 0))
+        self.assertFalse(tiles.is_valid_tile(-1, 0, 0))
+        self.assertFalse(tiles.is_valid_tile(25, 0, 0))
+
+
+class AnalysisJobStorageTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        override = self.settings(MEDIA_ROOT=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_write_replaces_the_file_in_place(self):
+        path = analysis_jobs._layer_path('batch', 'Kawasan Hutan')
+
+        self.assertEqual(analysis_jobs._write(path, 'first'), path)
+        self.assertEqual(analysis_jobs._write(path, 'second'), path)
+
+        self.assertEqual(analysis_jobs._read(path), 'second')
+        # No renamed copies (kawasan-hutan_AbC12.json) or leftover temporary files
+        self.assertEqual(os.listdir(os.path.dirname(os.path.join(self.dir, path))), ['kawasan-hutan.json'])
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class AnalysisJobQueueTests(TestCase):
+    """Reservation, resume and retry of the per-layer analysis jobs"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = self.settings(
+            MEDIA_ROOT=tmp.name,
+            SPATIAL_ANALYSIS={'JOB_MAX_ATTEMPTS': 1, 'JOB_RETRY_AFTER': 10},
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        for patcher in (
+            mock.patch.object(analysis_jobs, 'REFERENCE_LAYERS', {'APL': 'apl', 'HGB': 'hgb'}),
+            mock.patch.object(analysis_jobs, 'layer_cache'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(analysis_jobs, 'analyze_layer', side_effect=self.analyze)
+        self.analyze_layer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.broken = set()
+        upload = gpd.GeoDataFrame(geometry=[box(121.0, -2.5, 121.1, -2.4)], crs=layers.SOURCE_CRS)
+        self.batch_id = analysis_jobs.submit_analysis(upload, 'upload.geojson')
+
+    def analyze(self, layer, candidates, gdf_input):
+        if layer in self.broken:
+            raise RuntimeError(f"{layer} is broken")
+        return {'layer': layer, 'luas_ha': 1.0}, '{"type": "FeatureCollection", "features": []}'
+
+    def layer_of(self, job):
+        return json.loads(job.payload)['layer']
+
+    def run_all(self):
+        while (job := analysis_jobs.reserve_next_job()) is not None:
+            analysis_jobs.process_job(job)
+
+    def test_jobs_are_claimed_once(self):
+        first = analysis_jobs.reserve_next_job()
+        second = analysis_jobs.reserve_next_job()
+
+        self.assertEqual([self.layer_of(first), self.layer_of(second)], ['APL', 'HGB'])
+        self.assertEqual(first.attempts, 1)
+        self.assertIsNone(analysis_jobs.reserve_next_job())
+
+    def test_expired_reservation_without_attempts_left_is_buried(self):
+        job = analysis_jobs.reserve_next_job()
+        # The worker died: its reservation is older than JOB_RETRY_AFTER
+        Job.objects.filter(pk=job.pk).update(reserved_at=analysis_jobs._now() - 60)
+
+        next_job = analysis_jobs.reserve_next_job()
+
+        self.assertEqual(self.layer_of(next_job), 'HGB')
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
+        self.assertEqual(FailedJob.objects.get().exception, 'Reservation expired after 1 attempts')
+        batch = JobBatch.objects.get(id=self.batch_id)
+        self.assertEqual((batch.pending_jobs, batch.failed_jobs), (1, 1))
+
+    def test_finished_layer_is_not_recomputed(self):
+        job = analysis_jobs.reserve_next_job()
+        analysis_jobs.process_job(job)
+        # A re-run of the same layer (e.g. after a lost delete) finds the stored result
+        Job.objects.create(queue=analysis_jobs.QUEUE, payload=job.payload, attempts=0, available_at=0, created_at=0)
+        JobBatch.objects.filter(id=self.batch_id).update(pending_jobs=2)
+
+        self.run_all()
+
+        self.assertEqual([c.args[0] for c in self.analyze_layer.call_args_list], ['APL', 'HGB'])
+        batch = JobBatch.objects.get(id=self.batch_id)
+        self.assertEqual(analysis_jobs.batch_status(batch)['status'], 'finished')
+        self.assertIsNotNone(analysis_jobs.result_path(batch))
+
+    def test_retry_only_requeues_failed_layers(self):
+        self.broken.add('HGB')
+        self.run_all()
+
+        batch = JobBatch.objects.get(id=self.batch_id)
+        self.assertEqual(analysis_jobs.batch_status(batch)['layers'], {'APL': 'done', 'HGB': 'failed'})
+        self.assertIsNone(analysis_jobs.result_path(batch))
+
+        self.broken.clear()
+        self.analyze_layer.reset_mock()
+        self.assertEqual(analysis_jobs.retry_batch(batch), 1)
+        self.assertFalse(FailedJob.objects.exists())
+        self.assertEqual([self.layer_of(job) for job in Job.objects.all()], ['HGB'])
+
+        self.run_all()
+
+        self.assertEqual([c.args[0] for c in self.analyze_layer.call_args_list], ['HGB'])
+        batch = JobBatch.objects.get(id=self.batch_id)
+        self.assertEqual(analysis_jobs.batch_status(batch)['status'], 'finished')
+        result = json.loads(analysis_jobs._read(analysis_jobs.result_path(batch)))
+        self.assertEqual([stat['layer'] for stat in result['stats']], ['APL', 'HGB'])
+
+
+@skipUnless(GEOPANDAS_AVAILABLE, 'geopandas not installed')
+class ParcelOverlapTests(TestCase):
+    """build_overlaps only recomputes pairs whose claim geometry or layer version changed"""
+
+    def setUp(self):
+        self.inside = PolygonClaim.objects.create(
+            geom_wkt=box(121.300, -2.600, 121.302, -2.598).wkt, type_poligon='claim', sumber_data='test'
+        )
+        self.outside = PolygonClaim.objects.create(
+            geom_wkt=box(121.500, -2.600, 121.502, -2.598).wkt, type_poligon='claim', sumber_data='test'
+        )
+
+        self.signature = mock.Mock(return_value='v1')
+        cache = LayerCache({})
+        cache.register('Layer', self.signature, lambda: gpd.GeoDataFrame(
+            geometry=[box(121.30, -2.60, 121.31, -2.59)], crs=layers.SOURCE_CRS
+        ))
+        patcher = mock.patch.object(overlaps, 'layer_cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        override = self.settings(SPATIAL_ANALYSIS={'LAYER_CHECK_INTERVAL': 0})
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def build(self, **kwargs):
+        return overlaps.build_overlaps(['Layer'], **kwargs)['Layer']
+
+    def overlap(self, claim):
+        return ParcelLayerOverlap.objects.get(polygon_claim=claim, layer='Layer')
+
+    def test_first_build_computes_every_claim(self):
+        self.assertEqual(self.build(), 2)
+
+        inside = self.overlap(self.inside)
+        self.assertEqual(inside.jumlah_fitur, 1)
+        self.assertAlmostEqual(inside.luas_ha, 4.9, delta=0.1)
+        self.assertEqual(inside.layer_version, 'v1')
+        self.assertEqual(self.overlap(self.outside).luas_m2, 0)
+
+    def test_unchanged_claims_are_skipped(self):
+        self.build()
+        self.assertEqual(self.build(), 0)
+
+        # Same polygon, different start vertex: the hash is normalized
+        self.outside.geom_wkt = 'POLYGON ((121.502 -2.6, 121.502 -2.598, 121.5 -2.598, 121.5 -2.6, 121.502 -2.6))'
+        self.outside.save()
+        self.assertEqual(self.build(), 0)
+
+    def test_changed_geometry_is_recomputed(self):
+        self.build()
+        self.outside.geom_wkt = box(121.305, -2.600, 121.307, -2.598).wkt
+        self.outside.save()
+
+        self.assertEqual(self.build(), 1)
+        self.assertEqual(self.overlap(self.outside).jumlah_fitur, 1)
+        self.assertEqual(ParcelLayerOverlap.objects.count(), 2)
+
+    def test_new_layer_version_recomputes_every_claim(self):
+        self.build()
+        self.signature.return_value = 'v2'
+
+        self.assertEqual(self.build(), 2)
+        self.assertEqual(self.overlap(self.inside).layer_version, 'v2')
+
+    def test_full_rebuild_ignores_stored_hashes(self):
+        self.build()
+
+        self.assertEqual(self.build(full=True), 2)
+        self.assertEqual(ParcelLayerOverlap.objects.count(), 2)
@@ -24,6 +24,7 @@ from .views_census_larap import (
     CensusKepalaKeluargaViewSet,
     CensusIndividuViewSet,
 )
+from .views_spatial import ParcelLayerOverlapViewSet
 
 # Create router and register viewsets
 router = routers.DefaultRouter()
@@ -48,6 +49,8 @@ router.register(r'questions', CensusQuestionViewSet, basename='question')
 # Register census LARAP viewsets
 router.register(r'census-kepala-keluarga', CensusKepalaKeluargaViewSet, basename='census-kepala-keluarga')
 router.register(r'census-individu', CensusIndividuViewSet, basename='census-individu')
+# Register spatial analysis viewsets
+router.register(r'parcel-overlaps', ParcelLayerOverlapViewSet, basename='parcel-overlap')
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -55,9 +58,22 @@ urlpatterns = [
 
 # Try to import analyze endpoint (requires geopandas)
 try:
-    from .views import api_analyze, tes
+    from .views import (
+        api_analyze,
+        api_analyze_result,
+        api_analyze_retry,
+        api_analyze_status,
+        api_analyze_submit,
+        api_tile,
+        tes,
+    )
     urlpatterns += [
         path("analyze/", api_analyze, name="analyze"),
+        path("analyze/jobs/", api_analyze_submit, name="analyze-job-submit"),
+        path("analyze/jobs/<str:job_id>/", api_analyze_status, name="analyze-job-status"),
+        path("analyze/jobs/<str:job_id>/result/", api_analyze_result, name="analyze-job-result"),
+        path("analyze/jobs/<str:job_id>/retry/", api_analyze_retry, name="analyze-job-retry"),
+        path("tiles/<slug:layer>/<int:z>/<int:x>/<int:y>.mvt", api_tile, name="tile"),
         path("tes/", tes, name="tes"),
     ]
 except ImportError:
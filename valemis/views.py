@@ -1,65 +1,46 @@
-import os
-import json
-import tempfile
-import zipfile
-
-# import geopandas as gpd  # DISABLED - requires GDAL
-from django.http import JsonResponse
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, JsonResponse
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
-from django.db import connection
-# from shapely import wkt  # DISABLED - requires GDAL
 from rest_framework import viewsets
-from .models import Pidana
+from .models import JobBatch, Pidana
 from .serializers import *
+from .services.layers import (
+    ANALYSIS_CRS,
+    GEOPANDAS_AVAILABLE,
+    SOURCE_CRS,
+    candidate_layers,
+    get_spatial_config,
+)
+from .services.overlay import (
+    MAX_PRECISION,
+    MAX_ZOOM,
+    render_response,
+    run_overlays,
+    to_geojson,
+    zoom_tolerance,
+)
+from .services import analysis_jobs
+from .services.uploads import UploadError, limit_upload_size, read_uploaded_file
+from .services import tiles
+from .services.result_cache import input_hash, layer_versions, result_cache
+
+def _int_param(request, name, maximum):
+    """
+    Optional integer POST parameter clamped to 0..maximum
+
+    Raises:
+        ValueError: not an integer
+    """
+    value = request.POST.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer between 0 and {maximum}")
+    return max(0, min(value, maximum))
 
-# ==============================
-# Helper: load layer from DB
-# ==============================
-def load_layer_from_db(table):
-    geom_col = "ogr_geometry"
-    # print(table )
-    with connection.cursor() as cursor:
-        # print(cursor)
-        cursor.execute(f"""
-            SELECT ogr_geometry.STAsText() AS wkt_geom FROM \"{table}\"
-        """)
-
-        columns = [col[0] for col in cursor.description]
-        rows = cursor.fetchall()
-
-    records = []
-
-    for row in rows:
-        rec = dict(zip(columns, row))
-        geom_wkt = rec.pop("wkt_geom", None)
-        rec["geometry"] = wkt.loads(geom_wkt) if geom_wkt else None
-        records.append(rec)
-
-    gdf = gpd.GeoDataFrame(records, geometry="geometry", crs="EPSG:4326")
-    # print(records)
-    return gdf
-
-# ==============================
-# Helper: parse uploaded file
-# ==============================
-def read_uploaded_file(uploaded_file, tmpdir):
-    upload_path = os.path.join(tmpdir, uploaded_file.name)
-
-    with open(upload_path, "wb+") as f:
-        for chunk in uploaded_file.chunks():
-            f.write(chunk)
-
-    if zipfile.is_zipfile(upload_path):
-        with zipfile.ZipFile(upload_path, "r") as z:
-            z.extractall(tmpdir)
-
-        for f in os.listdir(tmpdir):
-            if f.lower().endswith((".shp", ".geojson", ".json", ".kml", ".gpkg")):
-                return os.path.join(tmpdir, f)
-    else:
-        return upload_path
-
-    return None
 
 # ==============================
 # MAIN API
@@ -69,77 +50,186 @@ def api_analyze(request):
     if request.method != "POST":
         return JsonResponse({"error": "Only POST supported"}, status=405)
 
+    if not GEOPANDAS_AVAILABLE:
+        return JsonResponse({"error": "Spatial analysis requires geopandas"}, status=503)
+
     try:
+        upload_limit = limit_upload_size(request)
         uploaded_file = request.FILES.get("file")
+        if upload_limit.exceeded:
+            return JsonResponse({"error": upload_limit.message}, status=400)
         if not uploaded_file:
             return JsonResponse({"error": "No file uploaded"}, status=400)
 
-        # Save & read input file
-        with tempfile.TemporaryDirectory() as tmpdir:
-            spatial_path = read_uploaded_file(uploaded_file, tmpdir)
+        # Response mode: simplification & coordinate precision
+        try:
+            zoom = _int_param(request, "zoom", MAX_ZOOM)
+            precision = _int_param(request, "precision", MAX_PRECISION)
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        # Read input file (zip members are opened in place)
+        try:
+            gdf_input = read_uploaded_file(
+                uploaded_file,
+                layer=request.POST.get("layer"),
+                dataset=request.POST.get("dataset"),
+            )
+        except UploadError as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
-            if not spatial_path:
-                return JsonResponse({"error": "Unsupported spatial file"}, status=400)
+        # CRS standardization
+        input_bbox = gdf_input.to_crs(SOURCE_CRS).total_bounds
+        gdf_input = gdf_input.to_crs(ANALYSIS_CRS)
 
-            gdf_input = gpd.read_file(spatial_path)
+        # ==============================
+        # Simplification tolerance for the requested zoom
+        # ==============================
+        tolerance = None
+        if zoom is not None:
+            latitude = (input_bbox[1] + input_bbox[3]) / 2
+            tolerance = zoom_tolerance(
+                zoom, latitude, get_spatial_config('SIMPLIFY_PIXEL_TOLERANCE', 0.5)
+            )
 
-        # CRS standardization
-        gdf_input = gdf_input.to_crs("EPSG:32751")
+        # ==============================
+        # Result cache: same geometry + same layer versions
+        # ==============================
+        cache_key = versions_key = None
+        if get_spatial_config('RESULT_CACHE_ENABLED', True):
+            versions_key = result_cache.versions_key(layer_versions())
+            cache_key = result_cache.make_key(
+                input_hash(gdf_input), versions_key, tolerance=tolerance, precision=precision
+            )
+            body = result_cache.get(cache_key, versions_key)
+            if body is not None:
+                response = HttpResponse(body, content_type="application/json")
+                response["X-Analysis-Cache"] = "HIT"
+                return response
+
+        use_cache = get_spatial_config('LAYER_CACHE_ENABLED', True)
 
         # ==============================
-        # Load layers from DB
+        # Candidate features per layer
         # ==============================
-        layers = {
-            "APL": load_layer_from_db("apl"),
-            "HGB": load_layer_from_db("hgb"),
-            "IPPKH": load_layer_from_db("ippkh"),
-            "IUPK": load_layer_from_db("iupk"),
-            "KKPR": load_layer_from_db("kkpr"),
-            "Kawasan Hutan": load_layer_from_db("kawasan hutan"),
-            "Lahan Bebas": load_layer_from_db("lahan_bebas"),
-        }
-
-        results = []
-        geojson_layers = {}
+        layers = candidate_layers(gdf_input, input_bbox, use_cache)
 
         # ==============================
-        # Spatial intersect
+        # Spatial intersect (parallel per layer)
         # ==============================
-        for name, gdf in layers.items():
-            gdf = gdf.to_crs("EPSG:32751")
+        results = run_overlays(layers, gdf_input, tolerance, precision)
 
-            clipped = gpd.overlay(gdf, gdf_input, how="intersection")
+        # Input outline (user uploaded geometry)
+        input_geojson = to_geojson(gdf_input, tolerance, precision)
 
-            if clipped.empty:
-                area_m2 = 0
-                geojson_layers[name] = None
-            else:
-                clipped["area_m2"] = clipped.geometry.area
-                area_m2 = clipped["area_m2"].sum()
+        # Single pass: layer GeoJSON strings are spliced into the body
+        body = render_response(input_geojson, results)
+        if cache_key is not None:
+            result_cache.set(cache_key, versions_key, body)
 
-                geojson_layers[name] = json.loads(
-                    clipped.to_crs("EPSG:4326").to_json()
-                )
+        response = HttpResponse(body, content_type="application/json")
+        response["X-Analysis-Cache"] = "MISS"
+        return response
 
-            results.append({
-                "layer": name,
-                "jumlah_fitur": len(clipped),
-                "luas_m2": round(area_m2, 2),
-                "luas_ha": round(area_m2 / 10000, 4)
-            })
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
 
-        # Input outline (user uploaded geometry)
-        input_geojson = json.loads(gdf_input.to_crs("EPSG:4326").to_json())
+# ==============================
+# BACKGROUND ANALYSIS (submit / poll / result)
+# ==============================
+@csrf_exempt
+def api_analyze_submit(request):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST supported"}, status=405)
+
+    if not GEOPANDAS_AVAILABLE:
+        return JsonResponse({"error": "Spatial analysis requires geopandas"}, status=503)
+
+    try:
+        upload_limit = limit_upload_size(request)
+        uploaded_file = request.FILES.get("file")
+        if upload_limit.exceeded:
+            return JsonResponse({"error": upload_limit.message}, status=400)
+        if not uploaded_file:
+            return JsonResponse({"error": "No file uploaded"}, status=400)
+
+        try:
+            gdf_input = read_uploaded_file(
+                uploaded_file,
+                layer=request.POST.get("layer"),
+                dataset=request.POST.get("dataset"),
+            )
+        except UploadError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        job_id = analysis_jobs.submit_analysis(gdf_input, uploaded_file.name)
 
         return JsonResponse({
-            "input": input_geojson,
-            "layers": geojson_layers,
-            "stats": results
-        }, safe=False)
+            "job_id": job_id,
+            "status_url": request.build_absolute_uri(reverse("analyze-job-status", args=[job_id])),
+            "result_url": request.build_absolute_uri(reverse("analyze-job-result", args=[job_id])),
+        }, status=202)
+
+    except Exception as e:
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+def api_analyze_status(request, job_id):
+    batch = JobBatch.objects.filter(id=job_id).first()
+    if not batch:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    return JsonResponse(analysis_jobs.batch_status(batch))
+
+
+def api_analyze_result(request, job_id):
+    batch = JobBatch.objects.filter(id=job_id).first()
+    if not batch:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    path = analysis_jobs.result_path(batch)
+    if not path:
+        return JsonResponse(analysis_jobs.batch_status(batch), status=409)
+
+    return FileResponse(default_storage.open(path, "rb"), content_type="application/json")
 
+
+@csrf_exempt
+def api_analyze_retry(request, job_id):
+    if request.method != "POST":
+        return JsonResponse({"error": "Only POST supported"}, status=405)
+
+    batch = JobBatch.objects.filter(id=job_id).first()
+    if not batch:
+        return JsonResponse({"error": "Job not found"}, status=404)
+
+    requeued = analysis_jobs.retry_batch(batch)
+    batch.refresh_from_db()
+
+    return JsonResponse({"requeued_layers": requeued, **analysis_jobs.batch_status(batch)}, status=202)
+
+# ==============================
+# VECTOR TILES
+# ==============================
+def api_tile(request, layer, z, x, y):
+    if not GEOPANDAS_AVAILABLE or not tiles.MVT_AVAILABLE:
+        return JsonResponse({"error": "Vector tiles require geopandas and mapbox-vector-tile"}, status=503)
+
+    if not tiles.is_valid_tile(z, x, y):
+        return JsonResponse({"error": "Invalid tile coordinates"}, status=400)
+
+    try:
+        data = tiles.get_tile(layer, z, x, y)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
 
+    if data is None:
+        return JsonResponse({"error": f"Unknown layer '{layer}'"}, status=404)
+
+    response = HttpResponse(data, content_type="application/vnd.mapbox-vector-tile")
+    response["Cache-Control"] = "public, max-age=60"
+    return response
+
 def tes():
     return JsonResponse({"mesage":"masuk bro"})
 
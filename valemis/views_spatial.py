@@ -0,0 +1,72 @@
+"""
+API Views for precomputed Spatial Analysis results
+"""
+
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.db.models import Count, Q, Sum
+
+from .models import ParcelLayerOverlap
+from .serializers_spatial import ParcelLayerOverlapSerializer
+
+
+class ParcelLayerOverlapViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Parcel x reference layer overlap matrix (read-only)
+    Built by: python manage.py build_parcel_overlaps
+
+    Endpoints:
+    - GET /api/valemis/parcel-overlaps/ - List overlaps
+    - GET /api/valemis/parcel-overlaps/{id}/ - Retrieve one overlap
+    - GET /api/valemis/parcel-overlaps/summary/ - Total area per layer
+
+    Filters: desa, kecamatan, layer, polygon_claim, only_overlapping=true
+    """
+
+    queryset = ParcelLayerOverlap.objects.all().select_related('polygon_claim').prefetch_related(
+        'polygon_claim__parcel_set'
+    )
+    serializer_class = ParcelLayerOverlapSerializer
+
+    def get_queryset(self):
+        """Filter by query parameters"""
+        queryset = super().get_queryset()
+
+        desa = self.request.query_params.get('desa', None)
+        if desa:
+            queryset = queryset.filter(polygon_claim__parcel__desa=desa)
+
+        kecamatan = self.request.query_params.get('kecamatan', None)
+        if kecamatan:
+            queryset = queryset.filter(polygon_claim__parcel__kecamatan=kecamatan)
+
+        layer = self.request.query_params.get('layer', None)
+        if layer:
+            queryset = queryset.filter(layer=layer)
+
+        polygon_claim = self.request.query_params.get('polygon_claim', None)
+        if polygon_claim:
+            queryset = queryset.filter(polygon_claim_id=polygon_claim)
+
+        if self.request.query_params.get('only_overlapping') == 'true':
+            queryset = queryset.filter(luas_m2__gt=0)
+
+        return queryset.distinct()
+
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Total overlap per layer (same filters as the list)
+        GET /api/valemis/parcel-overlaps/summary/
+        """
+        ids = self.get_queryset().values('id')
+
+        by_layer = ParcelLayerOverlap.objects.filter(id__in=ids).values('layer').annotate(
+            jumlah_polygon_claim=Count('id', filter=Q(luas_m2__gt=0)),
+            luas_m2=Sum('luas_m2'),
+            luas_ha=Sum('luas_ha'),
+            jumlah_fitur=Sum('jumlah_fitur'),
+        ).order_by('layer')
+
+        return Response(list(by_layer))
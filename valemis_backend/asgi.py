@@ -1,10 +1,16 @@
 """
 ASGI config for valemis_backend project.
+
+Run with: uvicorn valemis_backend.asgi:application
+Async views (e.g. /api/twitter/analyze-account-async/) then wait on the
+Twitter API without holding a worker thread.
 """
 
 import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'valemis_backend.settings')
+# Server processes build the sentiment analyzers at startup (SENTIMENT_CONFIG WARM_START)
+os.environ.setdefault('SENTIMENT_WARM_START', 'True')
 
 application = get_asgi_application()
@@ -190,5 +190,55 @@ TWITTER_CONFIG = {
 SCRAPING_CONFIG = {
     'MAX_TWEETS_PER_REQUEST': 100,
     'DEFAULT_DAYS': 7,
-    'CACHE_TIMEOUT': 3600,  # 1 hour
+    'MAX_DAYS': 30,  # analyze-account / watch target upper bound of days
+    'CACHE_TIMEOUT': 3600,  # 1 hour (analyze-account responses; 0 = no caching)
+    'CACHE_STALE_TIMEOUT': 3600,  # after CACHE_TIMEOUT, serve the old response this long while refreshing in the background
+    'CACHE_ALIAS': 'default',  # CACHES alias; 'table' shares the cache between worker processes
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Stored in the `cache` table (valemis.Cache)
+    'table': {
+        'BACKEND': 'twitter_scraper.services.cache_backend.TableCache',
+        'KEY_PREFIX': 'django_cache',
+        'TIMEOUT': 3600,
+    },
+}
+
+# Sentiment Analysis Settings
+SENTIMENT_CONFIG = {
+    'TRANSLATION_CACHE_ENABLED': True,  # translation memory in the `cache` table
+    'TRANSLATION_CACHE_TTL': 30 * 24 * 3600,  # seconds a stored translation stays valid
+    'TRANSLATION_CACHE_MAX_ENTRIES': 100000,  # oldest translations are evicted above this
+    'TRANSLATION_WORKERS': 4,  # concurrent translation requests
+    'TRANSLATION_MAX_CHARS': 4500,  # texts are packed into requests up to this size (provider limit 5000)
+    'TRANSLATION_RATE': 5,  # translation requests per second (token bucket)
+    'TRANSLATION_BURST': 10,  # token bucket capacity
+    'TRANSLATION_RATE_LIMIT_TIMEOUT': 30,  # seconds to wait for a token before giving up on a request
+    'TRANSLATION_FAILURE_THRESHOLD': 5,  # consecutive failures that open the circuit breaker
+    'TRANSLATION_RESET_TIMEOUT': 60,  # seconds before a trial request is let through again
+    'LOCAL_MODEL_PATH': None,  # method='local' model file (None = MEDIA_ROOT/sentiment/local_model.json)
+    # Build the shared analyzers in AppConfig.ready() instead of on the first request.
+    # Off by default so management commands start fast; wsgi.py / asgi.py turn it on
+    'WARM_START': os.getenv('SENTIMENT_WARM_START', 'False') == 'True',
+    'STREAM_CHUNK_SIZE': 20,  # analyze-account streaming: tweets scored per chunk before they are sent
+    'DEGRADED_RETRY_INTERVAL': 300,  # seconds before a stored lexicon fallback (translator unavailable) is scored again
+}
+
+# Spatial Analysis Settings (api_analyze)
+SPATIAL_ANALYSIS = {
+    'LAYER_CACHE_ENABLED': True,
+    'LAYER_CHECK_INTERVAL': 60,  # seconds between checks for changed layer tables
+    'OVERLAY_WORKERS': None,  # process pool size for per-layer overlays (None = CPU count, 1 = sequential)
+    'JOB_MAX_ATTEMPTS': 3,  # background analysis: attempts per layer before it is marked failed
+    'JOB_RETRY_AFTER': 900,  # background analysis: seconds before a stuck reservation is picked up again
+    'MAX_UPLOAD_BYTES': 200 * 1024 * 1024,  # uploaded file size limit
+    'MAX_UNCOMPRESSED_BYTES': 1024 * 1024 * 1024,  # size limit of the dataset read from a zip
+    'SIMPLIFY_PIXEL_TOLERANCE': 0.5,  # simplification tolerance in screen pixels at the requested zoom
+    'TILE_CACHE_DIR': None,  # on-disk vector tile cache (None = MEDIA_ROOT/tiles)
+    'RESULT_CACHE_ENABLED': True,  # reuse api_analyze responses for identical geometry + layer versions
+    'RESULT_CACHE_MAX_BYTES': 256 * 1024 * 1024,  # in-process result cache size limit
 }
@@ -6,5 +6,7 @@ import os
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'valemis_backend.settings')
+# Server processes build the sentiment analyzers at startup (SENTIMENT_CONFIG WARM_START)
+os.environ.setdefault('SENTIMENT_WARM_START', 'True')
 
 application = get_wsgi_application()